@@ -0,0 +1,741 @@
+import calendar
+import json
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+import streamlit.components.v1 as components
+
+from Dashboards.index_specs import INDEX_SPECS
+from data_loader import (
+    BASEMAP_URL,
+    LEAFLET_CSS_URL,
+    LEAFLET_JS_URL,
+    change_report,
+    data_version,
+    default_change_pair,
+    index_cog_scenes,
+    index_summary,
+    index_tile_url,
+    load_aoi_data,
+    load_histogram_data,
+    seasonal_heatmap,
+    tile_scenes,
+)
+
+# Plotly figures kept across reruns and sessions (least recently used first out)
+FIGURE_CACHE_SIZE = 64
+
+
+# --------------------------
+# Figure cache
+# --------------------------
+class FigureCache:
+    """
+    Bounded LRU of built Plotly figures. Keys hold the data version (see
+    `cached_figure`), the figure kind and the parts of the dashboard view
+    (index, selected years, show_var, map_view) the figure depends on, so
+    switching back to a view already shown reuses its figures instead of
+    rebuilding them. Streamlit
+    serializes a figure without modifying it, so one object can be shown
+    any number of times.
+    """
+
+    def __init__(self, maxsize=FIGURE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._figures = OrderedDict()
+        # Streamlit runs each session's script in its own thread
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        """The figure cached under `key`, else `build()` (then cached)."""
+        with self._lock:
+            fig = self._figures.get(key)
+            if fig is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return fig
+        fig = build()
+        with self._lock:
+            self.misses += 1
+            self._figures[key] = fig
+            while len(self._figures) > self.maxsize:
+                self._figures.popitem(last=False)
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+
+
+@st.cache_resource
+def figure_cache():
+    """The process-wide `FigureCache` shared by all sessions."""
+    return FigureCache(FIGURE_CACHE_SIZE)
+
+
+def cached_figure(key, build):
+    """
+    `build()`, cached under `key` and the current `data_version()`, so a
+    re-extraction retires every figure built from the old files.
+    """
+    return figure_cache().get((data_version(),) + key, build)
+
+
+# --------------------------
+# Value formatting
+# --------------------------
+def format_value(spec, value, sep=" "):
+    """`value` at the index precision, with its unit (if any) after `sep`."""
+    text = f"{value:.{spec['precision']}f}"
+    return f"{text}{sep}{spec['unit']}" if spec["unit"] else text
+
+
+def hover_value(spec):
+    """Plotly hover placeholder of `y` at the index precision, with its unit."""
+    return f"%{{y:.{spec['precision']}f}}{spec['unit']}"
+
+
+def rgba(color, alpha):
+    """`#RRGGBB` -> `rgba(r, g, b, alpha)`."""
+    r, g, b = (int(color[i : i + 2], 16) for i in (1, 3, 5))
+    return f"rgba({r}, {g}, {b}, {alpha})"
+
+
+# --------------------------
+# Rate Change
+# --------------------------
+def show_trend(df, name):
+    """
+    Displays the index trend as line and area charts in Streamlit metrics.
+    The delta shows the change between the last two measurements.
+
+    Parameters:
+    - df: DataFrame with columns 'date' and the index mean column
+    - name: index name (key of INDEX_SPECS)
+    """
+    spec = INDEX_SPECS[name]
+    df = df.sort_values("date")
+    values = df[spec["mean"]].values
+    digits = spec["precision"]
+
+    if len(values) < 2:
+        st.metric(
+            f"{name} Trend",
+            round(values[-1], digits) if len(values) > 0 else "N/A",
+            "N/A",
+            chart_data=values,
+            chart_type="line",
+            border=True,
+        )
+        return
+
+    recent_delta = round(values[-1] - values[-2], digits)
+    for chart_type in ("line", "area"):
+        st.metric(
+            f"{name} Trend",
+            round(values[-1], digits),  # Latest value
+            recent_delta,  # Change from the previous scene
+            chart_data=values,
+            chart_type=chart_type,
+            border=True,
+        )
+
+
+# --------------------------
+# Seasonal Heatmap
+# --------------------------
+def heatmap_figure(name, years=(), width: int = 700, height: int = 370):
+    """Interactive seasonal heatmap (year x month) of the selected years."""
+    spec = INDEX_SPECS[name]
+    # year x month means merged from the precomputed aggregate cells
+    heatmap_df = seasonal_heatmap(name, tuple(years))
+
+    month_labels = [calendar.month_abbr[i] for i in range(1, 13)]
+
+    fig = px.imshow(
+        heatmap_df,
+        labels=dict(x="Month", y="Year", color=spec["heatmap_label"]),
+        x=month_labels,
+        color_continuous_scale=spec["colorscale"],
+        text_auto=".2f",
+        aspect="auto",
+        width=width,
+        height=height,
+    )
+
+    fig.update_layout(
+        xaxis_title="Month",
+        yaxis_title="Year",
+        yaxis=dict(autorange="reversed"),
+        margin=dict(l=40, r=40, t=60, b=40),
+    )
+    return fig
+
+
+def plot_heatmap(name, years=()):
+    spec = INDEX_SPECS[name]
+    fig = cached_figure(("heatmap", name, years), lambda: heatmap_figure(name, years))
+    st.write(f":{spec['tag']}[{name} Seasonal Heatmap]")
+    st.plotly_chart(fig, use_container_width=True)
+
+
+# --------------------------
+# Change Detection
+# --------------------------
+def change_figure(report, height: int = 300):
+    stable_km2 = report["valid_km2"] - report["gain_km2"] - report["loss_km2"]
+    fig = px.bar(
+        x=["Loss", "Stable", "Gain"],
+        y=[report["loss_km2"], stable_km2, report["gain_km2"]],
+        labels={"x": "", "y": "Area (km²)"},
+        color=["Loss", "Stable", "Gain"],
+        color_discrete_map={
+            "Loss": "#C62828",
+            "Stable": "#9E9E9E",
+            "Gain": "#2E7D32",
+        },
+        height=height,
+    )
+    fig.update_layout(showlegend=False, margin=dict(l=40, r=40, t=20, b=40))
+    return fig
+
+
+@st.fragment
+def show_change(name):
+    """
+    Pixel-level index change between two scenes (default: the latest scene
+    and the same month of an earlier year), from the per-scene index rasters.
+    Shown only when at least two rasters of the index are available.
+    """
+    spec = INDEX_SPECS[name]
+    scenes = index_cog_scenes(name)
+    if len(scenes) < 2:
+        return
+
+    dates = [d for d, _ in scenes]
+    labels = [d.strftime("%Y-%m-%d") for d in dates]
+    before_idx, after_idx = default_change_pair(dates)
+
+    with st.container(border=True):
+        st.write(f":{spec['tag']}[{name} Change]")
+        col_before, col_after = st.columns(2)
+        before = col_before.selectbox("Before", labels, index=before_idx)
+        after = col_after.selectbox("After", labels, index=after_idx)
+        if before == after:
+            st.info("Select two different scenes to compare.")
+            return
+
+        report = change_report(
+            scenes[labels.index(before)][1], scenes[labels.index(after)][1], name
+        )
+
+        gain_col, loss_col, diff_col = st.columns(3)
+        gain_col.metric(
+            "Gain Area", f"{report['gain_km2']:.1f} km²", f"{report['gain_pct']:.1f}%"
+        )
+        loss_col.metric(
+            "Loss Area",
+            f"{report['loss_km2']:.1f} km²",
+            f"-{report['loss_pct']:.1f}%",
+        )
+        diff_col.metric(f"Mean Δ {name}", format_value(spec, report["mean_diff"]))
+
+        fig = cached_figure(
+            ("change", report["loss_km2"], report["valid_km2"], report["gain_km2"]),
+            lambda: change_figure(report),
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+
+# --------------------------
+# Distribution
+# --------------------------
+def percentile_figure(df: pd.DataFrame, name, height: int = 320):
+    """Percentile bands (p5-p95, p25-p75) and the median over time."""
+    spec = INDEX_SPECS[name]
+    df = df.sort_values("date")
+    fig = go.Figure()
+    for low, high, alpha in (("p5", "p95", 0.15), ("p25", "p75", 0.3)):
+        fig.add_trace(
+            go.Scatter(
+                x=df["date"],
+                y=df[f"{name}_{low}"],
+                mode="lines",
+                line=dict(width=0),
+                showlegend=False,
+                hoverinfo="skip",
+            )
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=df["date"],
+                y=df[f"{name}_{high}"],
+                mode="lines",
+                line=dict(width=0),
+                fill="tonexty",
+                fillcolor=rgba(spec["color"], alpha),
+                name=f"{low}-{high}",
+                hoverinfo="skip",
+            )
+        )
+    fig.add_trace(
+        go.Scatter(
+            x=df["date"],
+            y=df[f"{name}_p50"],
+            mode="lines+markers",
+            line=dict(color=spec["color"], width=3),
+            name="Median",
+            hovertemplate=(
+                f"Date: %{{x}}<br>Median {name}: {hover_value(spec)}<extra></extra>"
+            ),
+        )
+    )
+    fig.update_layout(
+        xaxis_title="Date",
+        yaxis_title=spec["label"],
+        template="plotly_white",
+        hovermode="x unified",
+        height=height,
+        margin=dict(l=40, r=40, t=20, b=40),
+    )
+    return fig
+
+
+def histogram_figure(hists, centers, labels, selected, name, height: int = 320):
+    """Pixel distributions (percent per bin) of the selected scenes, or None."""
+    spec = INDEX_SPECS[name]
+    fig = go.Figure()
+    used = None
+    for label in selected:
+        counts = hists[f"{name}_hist"].iloc[labels.index(label)]
+        if counts.sum() == 0:
+            continue
+        nonzero = counts > 0
+        used = nonzero if used is None else used | nonzero
+        fig.add_trace(
+            go.Scatter(
+                x=centers,
+                y=100.0 * counts / counts.sum(),
+                mode="lines",
+                line_shape="hvh",
+                name=label,
+            )
+        )
+    if used is None:
+        return None
+    span = centers[used]
+    fig.update_layout(
+        xaxis_title=spec["label"],
+        yaxis_title="Pixels (%)",
+        xaxis=dict(range=[span.min(), span.max()]),
+        template="plotly_white",
+        height=height,
+        margin=dict(l=40, r=40, t=20, b=40),
+    )
+    return fig
+
+
+@st.fragment
+def show_distribution(df: pd.DataFrame, name, years=()):
+    """
+    Percentile bands (p5-p95, p25-p75, median) over time and the pixel
+    distribution of selected scenes, from the percentiles and histograms
+    stored by the extraction pipeline. Shown only when they were extracted.
+    """
+    spec = INDEX_SPECS[name]
+    if f"{name}_p50" not in df.columns:
+        return
+
+    with st.container(border=True):
+        st.write(f":{spec['tag']}[{name} Percentile Bands]")
+        fig = cached_figure(
+            ("percentiles", name, years), lambda: percentile_figure(df, name)
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+        hists, edges = load_histogram_data()
+        if hists is None or f"{name}_hist" not in hists.columns:
+            return
+        hists = hists[hists["date"].isin(df["date"])].sort_values("date")
+        if hists.empty:
+            return
+
+        labels = hists["date"].dt.strftime("%Y-%m-%d").tolist()
+        selected = st.multiselect(
+            f"{name} Distribution", labels, default=sorted({labels[0], labels[-1]})
+        )
+        centers = (edges[name][:-1] + edges[name][1:]) / 2
+        fig = cached_figure(
+            ("histograms", name, tuple(selected)),
+            lambda: histogram_figure(hists, centers, labels, selected, name),
+        )
+        if fig is not None:
+            st.plotly_chart(fig, use_container_width=True)
+
+        # pixels outside the histogram range are excluded from the percentiles
+        if f"{name}_outside" in hists.columns:
+            outside = [
+                hists[f"{name}_outside"].iloc[labels.index(label)] for label in selected
+            ]
+            below, above = sum(outside, start=pd.Series([0, 0])).tolist()
+            if below or above:
+                st.caption(
+                    f"Outside the {edges[name][0]:g} to {edges[name][-1]:g} "
+                    f"{spec['unit'] or name} range and left out of the "
+                    f"percentiles: {below:,} pixels below, {above:,} above."
+                )
+
+
+# --------------------------
+# Show Data Table
+# --------------------------
+def show_data(df: pd.DataFrame, name, width: int = 700, height: int = 460):
+    spec = INDEX_SPECS[name]
+    show_cols = ["date", spec["mean"], spec["std"]]
+    st.write(f":{spec['tag']}[{name} Data]")
+    st.dataframe(df[show_cols], width=width, height=height)
+
+
+# --------------------------
+# AOI Map
+# --------------------------
+# "static" shows the cached map HTML in an iframe: panning and zooming stay in
+# the browser and never rerun the script. "interactive" renders with
+# st_folium, which sends back (and reruns on) only the `returned_objects` a
+# feature asks for.
+MAP_MODES = ("static", "interactive")
+MAP_MODE = "static"
+
+
+def build_aoi_map(
+    aoi_geojson: str,
+    map_type: str = "none",
+    overlay_name: str = None,
+    overlay_url: str = None,
+):
+    """
+    Build the AOI map with selectable basemap type.
+
+    Parameters:
+    - aoi_geojson: AOI GeoJSON string (see `load_aoi_data`)
+    - map_type: "none" for no basemap, "local" for the offline basemap
+      (`BASEMAP_URL`), "standard" for OpenStreetMap, "satellite" for ESRI
+      Satellite; only the last two need internet access
+    - overlay_name: Layer name of the index overlay
+    - overlay_url: Optional local XYZ tile URL of a pre-rendered index overlay
+    """
+    # folium and geopandas load with the first map built (see aoi_map_html),
+    # not with this module
+    import folium
+    import geopandas as gpd
+
+    aoi_json = json.loads(aoi_geojson)
+    gdf = gpd.GeoDataFrame.from_features(aoi_json["features"])
+    centroid = gdf.geometry.centroid.iloc[0]
+
+    # Initialize map without tiles
+    m = folium.Map(location=[centroid.y, centroid.x], zoom_start=8, tiles=None)
+    # Load Leaflet from src/static instead of folium's CDN defaults; the map
+    # uses no jQuery, Bootstrap or marker icons, so those are left out
+    m.default_js = [("leaflet", LEAFLET_JS_URL)]
+    m.default_css = [("leaflet_css", LEAFLET_CSS_URL)]
+
+    # Add the selected base layer
+    map_type = map_type.lower()
+    if map_type == "satellite":
+        folium.TileLayer(
+            tiles="https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}",
+            attr="Tiles © Esri & Maxar",
+            name="Satellite",
+            overlay=False,
+            control=False,
+        ).add_to(m)
+    elif map_type == "standard":
+        folium.TileLayer(
+            "OpenStreetMap", name="OSM", overlay=False, control=True
+        ).add_to(m)
+    elif map_type == "local":
+        folium.TileLayer(
+            tiles=BASEMAP_URL,
+            attr="Basemap (local)",
+            name="Basemap",
+            overlay=False,
+            control=True,
+        ).add_to(m)
+
+    # Add the locally served index tiles on top of the basemap
+    if overlay_url:
+        folium.TileLayer(
+            tiles=overlay_url,
+            attr=f"{overlay_name} tiles (local)",
+            name=overlay_name,
+            overlay=True,
+            control=True,
+            opacity=0.75,
+        ).add_to(m)
+
+    # Add AOI polygon
+    folium.GeoJson(
+        aoi_json,
+        name="AOI",
+        style_function=lambda x: {
+            "color": "#4CAF50",
+            "weight": 3,
+            "opacity": 0.7,
+        },
+    ).add_to(m)
+
+    # Layer control to allow switching layers if needed
+    folium.LayerControl(collapsed=False).add_to(m)
+    return m
+
+
+@st.cache_data(max_entries=32)
+def aoi_map_html(
+    aoi_geojson: str,
+    map_type: str = "none",
+    overlay_name: str = None,
+    overlay_url: str = None,
+):
+    """
+    Standalone HTML of `build_aoi_map`, cached per (AOI, basemap, overlay):
+    all dashboards share one entry per basemap when no overlay is shown.
+    """
+    return (
+        build_aoi_map(aoi_geojson, map_type, overlay_name, overlay_url)
+        .get_root()
+        .render()
+    )
+
+
+def render_aoi_map(
+    aoi_geojson: str,
+    name,
+    width: int = 700,
+    height: int = 440,
+    map_type: str = "none",
+    overlay_url: str = None,
+    mode: str = MAP_MODE,
+    returned_objects=(),
+):
+    """
+    Render AOI map with selectable basemap type.
+
+    Parameters:
+    - aoi_geojson: AOI GeoJSON string (see `load_aoi_data`)
+    - name: index name (key of INDEX_SPECS) of the overlay
+    - width: Map width in pixels
+    - height: Map height in pixels
+    - map_type: basemap, see `build_aoi_map`
+    - overlay_url: Optional local XYZ tile URL of a pre-rendered index overlay
+    - mode: "static" (cached HTML) or "interactive" (st_folium), see MAP_MODES
+    - returned_objects: map state st_folium sends back in interactive mode;
+      the app reruns only when one of them changes (none by default)
+
+    Returns the st_folium state in interactive mode, else None.
+    """
+    if mode not in MAP_MODES:
+        raise ValueError(f"mode must be one of {MAP_MODES}, got {mode!r}")
+    overlay_name = name if overlay_url else None
+
+    # Hide attribution (optional)
+    st.markdown(
+        """
+        <style>
+            .leaflet-control-attribution {display:none !important;}
+        </style>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    st.write(":green[Area of Interest (AOI)]")
+    if mode == "static":
+        html = aoi_map_html(aoi_geojson, map_type, overlay_name, overlay_url)
+        if hasattr(st, "iframe"):
+            st.iframe(html, width=width, height=height)
+        else:  # older Streamlit releases
+            components.html(html, width=width, height=height)
+        return None
+
+    # only the interactive mode needs the st_folium component
+    from streamlit_folium import st_folium
+
+    m = build_aoi_map(aoi_geojson, map_type, overlay_name, overlay_url)
+    return st_folium(
+        m,
+        key=f"aoi_map_{name}",
+        width=width,
+        height=height,
+        returned_objects=list(returned_objects),
+    )
+
+
+@st.fragment
+def show_aoi_map(aoi_geojson: str, name, map_view, mode: str = MAP_MODE):
+    """
+    Index overlay selector and AOI map. A fragment: picking an overlay
+    reruns only this panel, not the charts around it.
+    """
+    spec = INDEX_SPECS[name]
+    with st.container(border=True):
+        overlay_url = None
+        scenes = tile_scenes(name)
+        if scenes:
+            scene = st.selectbox(f"{name} Overlay", ["None"] + scenes, index=0)
+            if scene != "None":
+                overlay_url = index_tile_url(scene, name)
+        render_aoi_map(
+            aoi_geojson,
+            name,
+            width=spec["map_width"],
+            map_type=map_view,
+            overlay_url=overlay_url,
+            mode=mode,
+        )
+
+
+# --------------------------
+# Line Chart
+# --------------------------
+def line_figure(
+    df: pd.DataFrame, name, show_var: bool, width: int = 900, height: int = 460
+):
+    spec = INDEX_SPECS[name]
+    df = df.sort_values("date")
+    fig = px.line(
+        df,
+        x="date",
+        y=spec["mean"],
+        error_y=spec["std"] if show_var else None,
+        markers=True,
+        color_discrete_sequence=[spec["color"]],
+    )
+
+    fig.update_traces(
+        line=dict(width=3),
+        hovertemplate=f"Date: %{{x}}<br>{name}: {hover_value(spec)}<extra></extra>",
+    )
+
+    mean_value = df[spec["mean"]].mean()
+    fig.add_hline(
+        y=mean_value,
+        line_dash="dash",
+        line_color="grey",
+        annotation_text=f"Mean {name} = {format_value(spec, mean_value, sep='')}",
+        annotation_position="bottom right",
+    )
+
+    axis_line = dict(showline=True, linewidth=1, linecolor=spec["axis_line"])
+    fig.update_layout(
+        xaxis_title="Date",
+        yaxis_title=spec["label"],
+        template="plotly_white",
+        hovermode="x unified",
+        margin=dict(l=40, r=40, t=60, b=40),
+        xaxis=axis_line,
+        yaxis=axis_line,
+        width=width,
+        height=height,
+    )
+    return fig
+
+
+def plot_line(df: pd.DataFrame, name, show_var: bool, years=()):
+    spec = INDEX_SPECS[name]
+    fig = cached_figure(
+        ("line", name, years, show_var), lambda: line_figure(df, name, show_var)
+    )
+    st.write(f":{spec['tag']}[{spec['line_title']}]")
+    st.plotly_chart(fig, use_container_width=True)
+
+
+# --------------------------
+# Metric Cards
+# --------------------------
+def metric_card(title, value):
+    with st.container(border=True):
+        st.markdown(
+            f"<div style='text-align:center;'><h3>{title}</h3><p style='font-size:26px'>{value}</p></div>",
+            unsafe_allow_html=True,
+        )
+
+
+def show_metric_cards(name, summary):
+    """Mean / max / pixel count and min / std / timeline cards of `summary`."""
+    spec = INDEX_SPECS[name]
+    if summary is None:
+        st.info(f"No {name} scenes in the selected years.")
+        return
+
+    metric_left, metric_right = st.columns([5, 5], gap="small")
+
+    with metric_left:
+        metric_card(f"Mean {name}", format_value(spec, summary["mean"]))
+        metric_card(f"Max {name}", format_value(spec, summary["max"]))
+        metric_card("Pixel Count", f"{summary['count_last']:,}")
+
+    with metric_right:
+        metric_card(f"Min {name}", format_value(spec, summary["min"]))
+        metric_card(f"{name} Std Dev", format_value(spec, summary["std"]))
+        metric_card(
+            "Timeline", f"{summary['date_min'].year} → {summary['date_max'].year}"
+        )
+
+
+# --------------------------
+# Assemble Index Dashboard
+# --------------------------
+def index_dashboard(name, data, selected_years, show_var, map_view, map_mode=MAP_MODE):
+    """
+    Dashboard of index `name` (a key of `INDEX_SPECS`). `data` holds the
+    time series rows of `selected_years`, as `load_data(years=...)` returns
+    them. Figures are cached on the parts of (index, selected years,
+    show_var, map_view) they depend on, see `FigureCache`; the AOI map is
+    rendered in `map_mode` (see `MAP_MODES`).
+    """
+    spec = INDEX_SPECS[name]
+    df = data
+    years = tuple(sorted(selected_years or ()))
+    # Format selected years for display
+    if not selected_years or set(selected_years) == {2022, 2023, 2024}:
+        years_text = "2022 - 2023"
+    else:
+        years_text = " - ".join(str(y) for y in selected_years)
+
+    st.markdown(
+        f"<h1 style='text-align: center; margin-top: -40px;'>{spec['title']} ({years_text})</h1>",
+        unsafe_allow_html=True,
+    )
+    st.write("---")
+
+    # metric-card values merged from the precomputed aggregate cells
+    summary = index_summary(name, years)
+
+    left, mid, right = st.columns([30, 45, 25], gap="small")
+
+    # ---------------- Left Column ----------------
+    with left:
+        show_aoi_map(load_aoi_data(), name, map_view, map_mode)
+
+        show_metric_cards(name, summary)
+
+    # ---------------- Middle Column ----------------
+    with mid:
+        with st.container(border=True):
+            plot_line(df, name, show_var, years)
+        with st.container(border=True):
+            plot_heatmap(name, years)
+        show_change(name)
+        show_distribution(df, name, years)
+
+    # ---------------- Right Column ----------------
+    with right:
+        with st.container(border=True):
+            show_data(df, name)
+        show_trend(df, name)
@@ -0,0 +1,82 @@
+# --------------------------
+# Index dashboard specs
+# --------------------------
+# One entry per dashboard, in sidebar order. A new index (e.g. EVI or SAVI)
+# is a new entry here once the extraction writes its `mean` / `std` columns
+# (and, for the aggregate cube, its `STAT_COLUMNS` entry in Extraction/indices.py):
+#
+# - title / icon: page heading and sidebar (Bootstrap) icon
+# - mean / std: time series columns of the scene mean and std
+# - tag: Streamlit text color of the section titles
+# - color: line / median color (hex); percentile bands use it translucent
+# - colorscale: Plotly color scale of the seasonal heatmap
+# - label / heatmap_label / line_title: axis, heatmap and line chart titles
+# - unit / precision: value suffix and decimals of cards, hovers and metrics
+# - axis_line: axis line color of the line chart
+# - map_width: AOI map width in pixels
+INDEX_SPECS = {
+    "NDVI": {
+        "title": "🌿 Normalized Difference Vegetation Index",
+        "icon": "tree",
+        "mean": "NDVI_mean",
+        "std": "NDVI_std",
+        "tag": "green",
+        "color": "#2E7D32",
+        "colorscale": "YlGn",
+        "label": "NDVI",
+        "heatmap_label": "NDVI Mean",
+        "line_title": "NDVI Mean Over Time",
+        "unit": "",
+        "precision": 3,
+        "axis_line": "white",
+        "map_width": 700,
+    },
+    "NDWI": {
+        "title": "💧 Normalized Difference Water Index",
+        "icon": "droplet",
+        "mean": "NDWI_mean",
+        "std": "NDWI_std",
+        "tag": "blue",
+        "color": "#1E88E5",
+        "colorscale": "Blues",
+        "label": "NDWI",
+        "heatmap_label": "NDWI Mean",
+        "line_title": "NDWI Mean Over Time",
+        "unit": "",
+        "precision": 3,
+        "axis_line": "black",
+        "map_width": 600,
+    },
+    "NDBI": {
+        "title": "🏙️ Normalized Difference Built-up Index",
+        "icon": "building",
+        "mean": "NDBI_mean",
+        "std": "NDBI_std",
+        "tag": "orange",
+        "color": "#FB8C00",
+        "colorscale": "Oranges",
+        "label": "NDBI",
+        "heatmap_label": "NDBI Mean",
+        "line_title": "NDBI Mean Over Time",
+        "unit": "",
+        "precision": 3,
+        "axis_line": "black",
+        "map_width": 600,
+    },
+    "LST": {
+        "title": "🌡️ Land Surface Temperature",
+        "icon": "sun",
+        "mean": "LST_mean_C",
+        "std": "LST_std_C",
+        "tag": "red",
+        "color": "#D32F2F",
+        "colorscale": "RdYlBu_r",
+        "label": "LST (°C)",
+        "heatmap_label": "LST (°C)",
+        "line_title": "LST Over Time",
+        "unit": "°C",
+        "precision": 2,
+        "axis_line": "black",
+        "map_width": 600,
+    },
+}
@@ -0,0 +1,166 @@
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pandas as pd
+
+from Dashboards.index_specs import INDEX_SPECS
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Render function of every dashboard as "module:function", called as
+# `function(name, data=..., selected_years=..., show_var=..., map_view=...)`.
+# A module is imported when a dashboard using it is first rendered, after the
+# page config and sidebar, not with main.py. The four index dashboards share
+# one engine (and plotly), so the first of them pays for it; the engine in
+# turn imports folium and geopandas only when it first builds a map, and
+# streamlit_folium only for interactive maps.
+DASHBOARDS = {
+    name: "Dashboards.index_dashboard:index_dashboard" for name in INDEX_SPECS
+}
+
+# What `src/main.py` imports before any dashboard is selected
+STARTUP_MODULES = (
+    "streamlit",
+    "streamlit_option_menu",
+    "data_loader",
+    "Dashboards.registry",
+)
+
+# Wall time (s) of each dashboard module's first import in this process
+IMPORT_TIMES = {}
+_import_lock = threading.Lock()
+
+
+# --------------------------
+# Lazy dashboard loading
+# --------------------------
+def load_dashboard(name):
+    """Render function of dashboard `name`, importing its module on first use."""
+    module_name, function = DASHBOARDS[name].split(":")
+    module = sys.modules.get(module_name)
+    if module is None:
+        # sessions run in threads; time only the import that does the work
+        with _import_lock:
+            t0 = time.perf_counter()
+            module = importlib.import_module(module_name)
+            IMPORT_TIMES.setdefault(module_name, time.perf_counter() - t0)
+    return getattr(module, function)
+
+
+def import_times():
+    """First-import wall time of the dashboard modules loaded so far."""
+    return pd.DataFrame(
+        {"module": list(IMPORT_TIMES), "import_s": list(IMPORT_TIMES.values())}
+    )
+
+
+# --------------------------
+# Cold import cost
+# --------------------------
+def importtime(modules):
+    """
+    `python -X importtime -c "import <modules>"` in a fresh interpreter (run
+    from `src/`), parsed: (module, depth, self_s, cumulative_s) per import,
+    children before their parent. Depth-0 cumulative times count only the
+    modules not already imported by an earlier depth-0 line.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    lines = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        # one leading space, then two per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        lines.append(
+            (name.strip(), depth, int(self_us) / 1e6, int(cumulative_us) / 1e6)
+        )
+    return lines
+
+
+def import_costs(module):
+    """
+    Cold import cost of `module`: one row for it and one per module it
+    imported directly (costliest first), with self / cumulative seconds.
+    """
+    rows, children = [], []
+    for name, depth, self_s, cumulative_s in importtime([module]):
+        row = {"module": name, "self_s": self_s, "cumulative_s": cumulative_s}
+        if depth == 1:
+            children.append(row)
+        elif depth == 0:
+            # a top-level import: the depth-1 lines since the last one are its own
+            if name == module:
+                children.sort(key=lambda r: r["cumulative_s"], reverse=True)
+                rows = [row] + children
+            children = []
+    costs = pd.DataFrame(rows, columns=["module", "self_s", "cumulative_s"])
+    return costs.astype({"self_s": float, "cumulative_s": float})
+
+
+def startup_cost(modules=STARTUP_MODULES):
+    """Cold seconds to import all `modules` in one interpreter, as main.py does."""
+    modules = set(modules)
+    return sum(
+        cumulative_s
+        for name, depth, _, cumulative_s in importtime(sorted(modules))
+        if depth == 0 and name in modules
+    )
+
+
+def startup_report(modules=None, top=3):
+    """
+    Cold import seconds of each startup module (`STARTUP_MODULES`) and each
+    dashboard module, each in its own fresh interpreter, with its `top`
+    costliest direct imports. Shared libraries are counted under every
+    module that imports them (see `startup_cost` for the startup total).
+    """
+    if modules is None:
+        dashboards = {target.split(":")[0] for target in DASHBOARDS.values()}
+        modules = list(STARTUP_MODULES) + sorted(dashboards)
+    rows = []
+    for module in modules:
+        costs = import_costs(module)
+        deps = costs.iloc[1 : top + 1]
+        rows.append(
+            {
+                "module": module,
+                "startup": module in STARTUP_MODULES,
+                "import_s": costs["cumulative_s"].iloc[0] if len(costs) else None,
+                "heaviest": ", ".join(
+                    f"{m} {s:.2f}s"
+                    for m, s in zip(deps["module"], deps["cumulative_s"])
+                ),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    """
+    Print the cold import cost per module, e.g. from `src/`:
+
+        python -m Dashboards.registry
+    """
+    report = startup_report(argv or None)
+    with pd.option_context("display.max_colwidth", None, "display.width", 200):
+        print(report.to_string(index=False))
+    print(
+        f"startup imports: {startup_cost():.2f}s in one interpreter "
+        "(the dashboard module loads on the first dashboard render)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
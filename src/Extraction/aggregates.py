@@ -0,0 +1,119 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from Extraction.indices import INDEX_NAMES, STAT_COLUMNS
+from Extraction.storage import DEFAULT_AOI
+
+# One cube cell per (AOI, index, year, month)
+CUBE_KEYS = ["aoi", "index", "year", "month"]
+
+
+def aggregates_path(output_csv):
+    """`data/all-landsat-data.csv` -> `data/all-landsat-data_agg.parquet`."""
+    return os.path.splitext(output_csv)[0] + "_agg.parquet"
+
+
+# --------------------------
+# Aggregate cube
+# --------------------------
+def build_aggregate_cube(df, aoi=DEFAULT_AOI):
+    """
+    Per-(AOI, index, year, month) aggregates of the scene means of every
+    index (`<INDEX>_mean` / `LST_mean_C`): number of scenes `n`, `sum`,
+    `sumsq`, `min` and `max`, plus the first / last scene date of the cell
+    and the pixel count of its last scene. Cells of any selection merge by
+    adding sums and counts, so dashboard statistics never rescan the rows.
+    `aoi` labels the rows unless they have an `aoi_id` / `aoi` column.
+    """
+    df = df.rename(columns={"aoi_id": "aoi"})
+    dates = pd.to_datetime(df["date"])
+    base = pd.DataFrame(
+        {
+            "aoi": df["aoi"].astype(str) if "aoi" in df.columns else aoi,
+            "year": (df["year"] if "year" in df.columns else dates.dt.year),
+            "month": dates.dt.month,
+            "date": dates,
+            "count": df["count"],
+        }
+    ).astype({"year": np.int16, "month": np.int8})
+
+    parts = []
+    for name in INDEX_NAMES:
+        col = STAT_COLUMNS[name][0]
+        if col in df.columns:
+            values = df[col].astype(np.float64)
+            parts.append(base.assign(index=name, value=values, sq=values * values))
+    cells = pd.concat(parts).dropna(subset=["value"]).sort_values("date", kind="stable")
+
+    cube = cells.groupby(CUBE_KEYS, sort=True).agg(
+        n=("value", "size"),
+        sum=("value", "sum"),
+        sumsq=("sq", "sum"),
+        min=("value", "min"),
+        max=("value", "max"),
+        date_min=("date", "min"),
+        date_max=("date", "max"),
+        count_last=("count", "last"),
+    )
+    return cube.reset_index()
+
+
+def write_aggregate_cube(cube, path):
+    cube.to_parquet(path, index=False)
+    return path
+
+
+def read_aggregate_cube(path):
+    return pd.read_parquet(path)
+
+
+# --------------------------
+# Queries over merged cells
+# --------------------------
+def select_cells(cube, index_name, years=None, aois=None):
+    """Cube cells of one index, restricted to `years` / `aois` when given."""
+    cells = cube[cube["index"] == index_name]
+    if years:
+        cells = cells[cells["year"].isin([int(y) for y in years])]
+    if aois:
+        cells = cells[cells["aoi"].isin([str(a) for a in aois])]
+    return cells
+
+
+def index_summary_from_cube(cube, index_name, years=None, aois=None):
+    """
+    Mean, sample std, min and max of the selected scenes' index means, the
+    number of scenes, the pixel count of the latest scene and the first /
+    last scene dates; None when no scene is selected.
+    """
+    cells = select_cells(cube, index_name, years, aois)
+    if cells.empty:
+        return None
+    n = int(cells["n"].sum())
+    total = cells["sum"].sum()
+    mean = total / n
+    # sample std (ddof=1), as pandas' Series.std
+    var = (cells["sumsq"].sum() - total * mean) / (n - 1) if n > 1 else np.nan
+    return {
+        "mean": mean,
+        "std": np.sqrt(max(var, 0.0)) if n > 1 else np.nan,
+        "min": cells["min"].min(),
+        "max": cells["max"].max(),
+        "n": n,
+        "count_last": int(cells.loc[cells["date_max"].idxmax(), "count_last"]),
+        "date_min": cells["date_min"].min(),
+        "date_max": cells["date_max"].max(),
+    }
+
+
+def heatmap_from_cube(cube, index_name, years=None, aois=None):
+    """
+    Year x month (columns 1-12) mean of the selected scenes' index means,
+    i.e. the seasonal heatmap, from the merged cell sums and counts.
+    """
+    cells = select_cells(cube, index_name, years, aois)
+    merged = cells.groupby(["year", "month"])[["sum", "n"]].sum()
+    means = (merged["sum"] / merged["n"]).unstack("month")
+    return means.reindex(columns=range(1, 13))
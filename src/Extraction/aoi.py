@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import geopandas as gpd
+import numpy as np
+from affine import Affine
+from rasterio.windows import Window
+from rasterio.windows import transform as window_transform
+
+from Extraction.bands import aoi_window
+from Extraction.stats import aoi_mask
+
+
+def aoi_id(aoi_geojson):
+    """Stable short hash identifying an AOI GeoJSON by its content."""
+    payload = json.dumps(aoi_geojson, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+# Reproject the AOI (EPSG:4326 GeoJSON) to the raster CRS
+def reproject_aoi(aoi_geojson, crs):
+    gdf = gpd.GeoDataFrame.from_features(aoi_geojson["features"], crs="EPSG:4326")
+    return gdf.to_crs(crs)
+
+
+def unpack_mask_rows(packed, rows, width):
+    """Expand `rows` (a slice) of a row-packed AOI mask back to booleans."""
+    return np.unpackbits(packed[rows], axis=1, count=width).astype(bool)
+
+
+# --------------------------
+# Rasterized AOI mask cache
+# --------------------------
+class AOIMaskCache:
+    """
+    Cache of reprojected AOI geometries, read windows and rasterized AOI masks.
+
+    Entries are keyed on (AOI id, CRS, transform, shape) of the scene grid, so
+    every scene of one WRS path/row shares a single entry. Masks are held
+    bit-packed per row in an in-memory LRU of `maxsize` entries and, when
+    `cache_dir` is set, persisted as .npy (mask) + .json (geometry, window)
+    pairs so later runs skip reprojection and rasterization entirely.
+    """
+
+    # distinguishes entry types sharing one cache_dir (see AOILabelCache)
+    kind = "mask"
+
+    def __init__(self, maxsize=32, cache_dir=None):
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+
+    def key(self, aoi_geojson, crs, transform, shape, windowed=True):
+        parts = [
+            aoi_id(aoi_geojson),
+            crs.to_wkt(),
+            ",".join(repr(float(v)) for v in tuple(transform)[:6]),
+            "x".join(str(int(n)) for n in shape),
+            "window" if windowed else "full",
+            self.kind,
+        ]
+        return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+    def get(self, aoi_geojson, crs, transform, shape, windowed=True, unpack=True):
+        """
+        Return a dict with the AOI GeoJSON in the raster CRS (`geojson`), the
+        `window` to read (full grid when `windowed=False`), its `transform`
+        and the boolean AOI `mask` over that window. With `unpack=False` the
+        mask is returned row-packed (see `unpack_mask_rows`) so callers can
+        expand only the rows they need.
+        """
+        key = self.key(aoi_geojson, crs, transform, shape, windowed)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        else:
+            entry = self._load(key)
+            if entry is None:
+                entry = self._build(aoi_geojson, crs, transform, shape, windowed)
+                self._save(key, entry)
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        return {
+            "geojson": entry["geojson"],
+            "window": entry["window"],
+            "transform": entry["transform"],
+            "mask": self._decode(entry, unpack),
+        }
+
+    def clear(self):
+        self._entries.clear()
+
+    def _build(self, aoi_geojson, crs, transform, shape, windowed):
+        height, width = shape
+        gdf_utm = reproject_aoi(aoi_geojson, crs)
+        if windowed:
+            window = aoi_window(gdf_utm.total_bounds, transform, width, height)
+        else:
+            window = Window(0, 0, width, height)
+        win_transform = window_transform(window, transform)
+        geojson_utm = json.loads(gdf_utm.to_json())
+        grid = {
+            "height": int(window.height),
+            "width": int(window.width),
+            "transform": win_transform,
+        }
+        if window.width and window.height:
+            mask = self._encode(geojson_utm, grid)
+        else:
+            # the AOI misses this grid (see `aoi_window`): no pixel to mask
+            mask = np.zeros((0, 0), dtype=np.uint8)
+        return {
+            "geojson": geojson_utm,
+            "window": window,
+            "transform": win_transform,
+            "mask": mask,
+            "mask_shape": (grid["height"], grid["width"]),
+        }
+
+    def _encode(self, geojson_utm, grid):
+        return np.packbits(aoi_mask(geojson_utm, grid), axis=1)
+
+    def _decode(self, entry, unpack):
+        if not unpack:
+            return entry["mask"]
+        height, width = entry["mask_shape"]
+        return unpack_mask_rows(entry["mask"], slice(0, height), width)
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".npy", base + ".json"
+
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+        npy_path, json_path = self._paths(key)
+        if not (os.path.exists(npy_path) and os.path.exists(json_path)):
+            return None
+        with open(json_path) as f:
+            meta = json.load(f)
+        return {
+            "geojson": meta["geojson"],
+            "window": Window(*meta["window"]),
+            "transform": Affine(*meta["transform"]),
+            "mask": np.load(npy_path),
+            "mask_shape": tuple(meta["mask_shape"]),
+        }
+
+    def _save(self, key, entry):
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        npy_path, json_path = self._paths(key)
+        np.save(npy_path, entry["mask"])
+        win = entry["window"]
+        meta = {
+            "geojson": entry["geojson"],
+            "window": [win.col_off, win.row_off, win.width, win.height],
+            "transform": list(entry["transform"])[:6],
+            "mask_shape": list(entry["mask_shape"]),
+        }
+        with open(json_path, "w") as f:
+            json.dump(meta, f)
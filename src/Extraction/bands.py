@@ -0,0 +1,180 @@
+import io
+import os
+import re
+import tarfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+
+import rasterio
+from rasterio.errors import WindowError
+from rasterio.windows import Window, from_bounds
+
+# Filename markers of the bands the pipeline reads (Red, NIR, SWIR1, Thermal)
+BAND_MARKERS = ("_SR_B4", "_SR_B5", "_SR_B6", "_ST_B10")
+QA_MARKER = "_QA_PIXEL"
+
+# USGS Collection 2 products are delivered as uncompressed .tar bundles
+SCENE_ARCHIVE_EXT = ".tar"
+
+# Bands of one scene read at once (the reads are I/O bound and release the GIL)
+BAND_READ_THREADS = 4
+
+# Extra pixels read around the AOI bounds so edge pixels are never clipped
+WINDOW_BUFFER_PX = 2
+
+
+def parse_metadata(path):
+    """
+    Reads a metadata file and extracts key-value pairs into a dictionary.
+    """
+    meta = {}
+    with open_scene_text(path) as f:
+        for line in f:
+            if "=" in line:
+                k, v = line.strip().split("=")
+                meta[k.strip()] = v.strip().strip('"')
+    return meta
+
+
+def scene_date_from_filename(fname):
+    # example LC08_L2SP_141041_20230404_20230412_02_T1_SR_B4.TIF
+    m = re.search(r"_(\d{8})_", fname)
+    if m:
+        return datetime.strptime(m.group(1), "%Y%m%d").date()
+    return None
+
+
+def find_band_files(scene_folder, names=None):
+    """
+    File names of the red, NIR, SWIR1 and thermal bands (`BAND_MARKERS`
+    order) from one listing of `scene_folder`. Raises StopIteration when a
+    band is missing.
+    """
+    if names is None:
+        names = scene_files(scene_folder)
+    return [next(n for n in names if marker in n) for marker in BAND_MARKERS]
+
+
+def read_band(path):
+    """Read a single raster band and return array and profile."""
+    with rasterio.open(path) as src:
+        arr = src.read(1).astype(float)
+        profile = src.profile
+    return arr, profile
+
+
+# --------------------------
+# Scene folders and .tar bundles
+# --------------------------
+def vsitar_path(archive, member):
+    """GDAL path of a member of an uncompressed tar, read in place."""
+    return f"/vsitar/{os.path.abspath(archive)}/{member}"
+
+
+def _split_vsitar(path):
+    # "/vsitar/<archive>.tar/<member>" -> (archive, member)
+    archive, member = path[len("/vsitar/") :].split(SCENE_ARCHIVE_EXT + "/", 1)
+    return archive + SCENE_ARCHIVE_EXT, member
+
+
+def local_file(path):
+    """The file on disk behind `path` (the archive for tar members)."""
+    return _split_vsitar(path)[0] if path.startswith("/vsitar/") else path
+
+
+def scene_archive(scene_folder):
+    """
+    The .tar bundle a scene is read from: `scene_folder` itself when it is a
+    .tar, or the .tar inside it when the folder holds no extracted bands.
+    None for extracted scene folders.
+    """
+    if os.path.isfile(scene_folder):
+        return scene_folder if scene_folder.endswith(SCENE_ARCHIVE_EXT) else None
+    names = os.listdir(scene_folder)
+    if any(BAND_MARKERS[0] in n for n in names):
+        return None
+    tars = sorted(n for n in names if n.endswith(SCENE_ARCHIVE_EXT))
+    return os.path.join(scene_folder, tars[0]) if tars else None
+
+
+def scene_files(scene_folder):
+    """
+    {file name: path} of every file of a scene. Extracted folders map to
+    plain paths; members of a .tar bundle map to `/vsitar/` paths, so
+    rasterio opens them in place and windowed reads only fetch the blocks
+    they need from the archive.
+    """
+    archive = scene_archive(scene_folder)
+    if archive is None:
+        return {n: os.path.join(scene_folder, n) for n in os.listdir(scene_folder)}
+    with tarfile.open(archive) as tar:
+        return {
+            os.path.basename(m.name): vsitar_path(archive, m.name)
+            for m in tar
+            if m.isfile()
+        }
+
+
+def open_scene_text(path):
+    """Open a text file of a scene (e.g. the MTL), also inside a .tar bundle."""
+    if not path.startswith("/vsitar/"):
+        return open(path)
+    archive, member = _split_vsitar(path)
+    with tarfile.open(archive) as tar:
+        data = tar.extractfile(member).read()
+    return io.StringIO(data.decode())
+
+
+# --------------------------
+# Windowed (AOI-cropped) reads
+# --------------------------
+def aoi_window(bounds, transform, width, height, buffer=WINDOW_BUFFER_PX):
+    """
+    Compute the window of a `width` x `height` raster grid covering `bounds`
+    (in the raster CRS), padded by `buffer` pixels and clipped to the grid.
+    An empty (0 x 0) window when `bounds` miss the grid, e.g. for a scene of
+    another path/row.
+    """
+    win = from_bounds(*bounds, transform=transform)
+    win = win.round_offsets(op="floor").round_lengths(op="ceil")
+    win = Window(
+        win.col_off - buffer,
+        win.row_off - buffer,
+        win.width + 2 * buffer,
+        win.height + 2 * buffer,
+    )
+    try:
+        return win.intersection(Window(0, 0, width, height))
+    except WindowError:
+        return Window(0, 0, 0, 0)
+
+
+def read_band_window(path, window):
+    """
+    Read only `window` of a single raster band and return the array and a
+    profile whose transform, width and height describe that window.
+    """
+    with rasterio.open(path) as src:
+        arr = src.read(1, window=window).astype(float)
+        profile = src.profile.copy()
+        profile.update(
+            transform=src.window_transform(window),
+            width=arr.shape[1],
+            height=arr.shape[0],
+        )
+    return arr, profile
+
+
+def read_bands(paths, window=None, threads=BAND_READ_THREADS):
+    """
+    Read several bands, whole or only `window` of each, on up to `threads`
+    threads. GDAL releases the GIL while reading and decoding, so on
+    high-latency storage the reads overlap instead of queueing. Returns the
+    (array, profile) pairs in `paths` order.
+    """
+    read = read_band if window is None else partial(read_band_window, window=window)
+    if threads <= 1 or len(paths) <= 1:
+        return [read(p) for p in paths]
+    with ThreadPoolExecutor(max_workers=min(threads, len(paths))) as pool:
+        return list(pool.map(read, paths))
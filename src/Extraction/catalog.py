@@ -0,0 +1,327 @@
+import hashlib
+import os
+import sqlite3
+from datetime import date
+
+import rasterio
+from rasterio.crs import CRS
+from rasterio.warp import transform_bounds
+from shapely.geometry import shape
+
+from Extraction.bands import (
+    find_band_files,
+    parse_metadata,
+    scene_date_from_filename,
+    scene_files,
+)
+from Extraction.export import scene_id_from_filename
+from Extraction.pipeline import discover_scene_folders
+from Extraction.qa import find_qa_file
+
+# MTL keys of the band files the pipeline reads, in `BAND_MARKERS` order
+MTL_BAND_KEYS = (
+    "FILE_NAME_BAND_4",
+    "FILE_NAME_BAND_5",
+    "FILE_NAME_BAND_6",
+    "FILE_NAME_BAND_ST_B10",
+)
+BAND_COLUMNS = ("red", "nir", "swir", "thermal")
+# Reflective pixel size (m) when the MTL has no GRID_CELL_SIZE_REFLECTIVE
+GRID_CELL_SIZE = 30.0
+
+# Bumped whenever the schema or the stored record changes; catalogs written
+# by another version are rebuilt on open (they only index the folders)
+CATALOG_VERSION = 2
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenes (
+    id INTEGER PRIMARY KEY,
+    folder TEXT NOT NULL UNIQUE,
+    folder_signature TEXT NOT NULL,
+    year TEXT NOT NULL,
+    scene TEXT NOT NULL,
+    product_id TEXT,
+    date TEXT NOT NULL,
+    wrs_path INTEGER,
+    wrs_row INTEGER,
+    sensor TEXT,
+    cloud_cover REAL,
+    crs TEXT,
+    left REAL,
+    bottom REAL,
+    right REAL,
+    top REAL,
+    red TEXT NOT NULL,
+    nir TEXT NOT NULL,
+    swir TEXT NOT NULL,
+    thermal TEXT NOT NULL,
+    qa TEXT
+);
+CREATE INDEX IF NOT EXISTS scenes_date ON scenes (date);
+CREATE INDEX IF NOT EXISTS scenes_cloud ON scenes (cloud_cover);
+CREATE INDEX IF NOT EXISTS scenes_path_row ON scenes (wrs_path, wrs_row, date);
+CREATE VIRTUAL TABLE IF NOT EXISTS scene_bounds USING rtree (
+    id, min_lon, max_lon, min_lat, max_lat
+);
+"""
+
+
+def _mtl_float(meta, key):
+    value = meta.get(key)
+    return float(value) if value not in (None, "") else None
+
+
+def _mtl_int(meta, key):
+    value = meta.get(key)
+    return int(value) if value not in (None, "") else None
+
+
+def folder_signature(scene_folder):
+    """
+    Hash of the name, size and mtime of every file in a scene folder (or of
+    the .tar itself). Unlike the folder mtime, it also changes when a file
+    is rewritten or replaced in place.
+    """
+    if os.path.isfile(scene_folder):
+        entries = [(os.path.basename(scene_folder), os.stat(scene_folder))]
+    else:
+        entries = [(e.name, e.stat()) for e in os.scandir(scene_folder) if e.is_file()]
+    h = hashlib.sha1()
+    for name, st in sorted(entries, key=lambda entry: entry[0]):
+        h.update(f"|{name}:{st.st_size}:{st.st_mtime_ns}".encode())
+    return h.hexdigest()
+
+
+def read_scene_record(scene_folder):
+    """
+    Catalog record of one scene folder, from its MTL file: acquisition date,
+    WRS path/row, sensor, cloud cover, band file paths, CRS, projected bounds
+    and WGS84 bounds. Folders without an MTL fall back to the band file names
+    and the red band's header. Scenes kept as .tar bundles are read in place
+    (see `scene_files`). Returns None when a band is missing.
+    """
+    files = scene_files(scene_folder)
+    names = list(files)
+    mtl = next((n for n in names if n.endswith("_MTL.txt")), None)
+    meta = parse_metadata(files[mtl]) if mtl else {}
+
+    try:
+        if all(meta.get(k) in names for k in MTL_BAND_KEYS):
+            bands = [meta[k] for k in MTL_BAND_KEYS]
+        else:
+            bands = find_band_files(scene_folder, names)
+    except StopIteration:
+        return None
+    qa = meta.get("FILE_NAME_QUALITY_L1_PIXEL")
+    if qa not in names:
+        qa = find_qa_file(scene_folder, names)
+
+    if "DATE_ACQUIRED" in meta:
+        scene_date = date.fromisoformat(meta["DATE_ACQUIRED"])
+    else:
+        scene_date = scene_date_from_filename(bands[0])
+
+    if "UTM_ZONE" in meta and "CORNER_UL_PROJECTION_X_PRODUCT" in meta:
+        # Landsat Collection 2 grids are WGS84 / UTM north, with corner
+        # coordinates given for pixel centres: pad by half a pixel to get the
+        # outer edges, as `src.bounds` below reports them
+        crs = CRS.from_epsg(32600 + int(meta["UTM_ZONE"]))
+        half = (_mtl_float(meta, "GRID_CELL_SIZE_REFLECTIVE") or GRID_CELL_SIZE) / 2
+        bounds = (
+            _mtl_float(meta, "CORNER_UL_PROJECTION_X_PRODUCT") - half,
+            _mtl_float(meta, "CORNER_LR_PROJECTION_Y_PRODUCT") - half,
+            _mtl_float(meta, "CORNER_LR_PROJECTION_X_PRODUCT") + half,
+            _mtl_float(meta, "CORNER_UL_PROJECTION_Y_PRODUCT") + half,
+        )
+    else:
+        with rasterio.open(files[bands[0]]) as src:
+            crs, bounds = src.crs, tuple(src.bounds)
+
+    lat_keys = [f"CORNER_{c}_LAT_PRODUCT" for c in ("UL", "UR", "LL", "LR")]
+    lon_keys = [k.replace("_LAT_", "_LON_") for k in lat_keys]
+    if all(k in meta for k in lat_keys + lon_keys):
+        lons = [_mtl_float(meta, k) for k in lon_keys]
+        lats = [_mtl_float(meta, k) for k in lat_keys]
+        lonlat = (min(lons), min(lats), max(lons), max(lats))
+    else:
+        lonlat = transform_bounds(crs, "EPSG:4326", *bounds)
+
+    year_dir = os.path.dirname(os.path.normpath(scene_folder))
+    return {
+        "folder": scene_folder,
+        "folder_signature": folder_signature(scene_folder),
+        "year": os.path.basename(year_dir),
+        "scene": os.path.basename(os.path.normpath(scene_folder)),
+        "product_id": meta.get("LANDSAT_PRODUCT_ID", scene_id_from_filename(bands[0])),
+        "date": scene_date.isoformat(),
+        "wrs_path": _mtl_int(meta, "WRS_PATH"),
+        "wrs_row": _mtl_int(meta, "WRS_ROW"),
+        "sensor": meta.get("SPACECRAFT_ID"),
+        "cloud_cover": _mtl_float(meta, "CLOUD_COVER"),
+        "crs": crs.to_string(),
+        "left": bounds[0],
+        "bottom": bounds[1],
+        "right": bounds[2],
+        "top": bounds[3],
+        **{col: files[name] for col, name in zip(BAND_COLUMNS, bands)},
+        "qa": files[qa] if qa else None,
+        "lonlat": lonlat,
+    }
+
+
+# --------------------------
+# SQLite scene catalog
+# --------------------------
+class SceneCatalog:
+    """
+    Persistent SQLite index of the scene folders under a data root, one row
+    per scene (see `read_scene_record`), with B-tree indexes on date, cloud
+    cover and path/row and an R*Tree over the WGS84 scene bounds.
+
+    `refresh` walks the year/month tree once and re-reads only folders whose
+    files changed (see `folder_signature`); `query` then selects scenes
+    without touching the filesystem.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != CATALOG_VERSION:
+            self.conn.executescript(
+                "DROP TABLE IF EXISTS scenes; DROP TABLE IF EXISTS scene_bounds;"
+            )
+            self.conn.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM scenes").fetchone()[0]
+
+    def refresh(self, data_root):
+        """
+        Sync the catalog with the folders under `data_root`: new or modified
+        folders are (re)read, folders that disappeared are dropped. Only the
+        folder listings are stat'ed, no MTL or raster is opened for unchanged
+        folders. Returns the number of folders (re)read.
+        """
+        known = {
+            row["folder"]: row["folder_signature"]
+            for row in self.conn.execute("SELECT folder, folder_signature FROM scenes")
+        }
+        on_disk = [mpath for _, _, mpath in discover_scene_folders(data_root)]
+        changed = [
+            mpath for mpath in on_disk if known.get(mpath) != folder_signature(mpath)
+        ]
+
+        with self.conn:
+            for folder in set(known) - set(on_disk):
+                self._delete(folder)
+            for folder in changed:
+                self._delete(folder)
+                record = read_scene_record(folder)
+                if record is not None:
+                    self._insert(record)
+        return len(changed)
+
+    def _delete(self, folder):
+        row = self.conn.execute(
+            "SELECT id FROM scenes WHERE folder = ?", (folder,)
+        ).fetchone()
+        if row is not None:
+            self.conn.execute("DELETE FROM scene_bounds WHERE id = ?", (row["id"],))
+            self.conn.execute("DELETE FROM scenes WHERE id = ?", (row["id"],))
+
+    def _insert(self, record):
+        record = dict(record)
+        min_lon, min_lat, max_lon, max_lat = record.pop("lonlat")
+        columns = ", ".join(record)
+        placeholders = ", ".join("?" for _ in record)
+        cur = self.conn.execute(
+            f"INSERT INTO scenes ({columns}) VALUES ({placeholders})",
+            tuple(record.values()),
+        )
+        self.conn.execute(
+            "INSERT INTO scene_bounds VALUES (?, ?, ?, ?, ?)",
+            (cur.lastrowid, min_lon, max_lon, min_lat, max_lat),
+        )
+
+    def query(
+        self,
+        aoi_geojson=None,
+        start=None,
+        end=None,
+        years=None,
+        max_cloud=None,
+        wrs_path=None,
+        wrs_row=None,
+        sensor=None,
+    ):
+        """
+        Catalog rows (as dicts, ordered by date) matching every given filter:
+        scenes whose bounds intersect the (WGS84) `aoi_geojson`, acquired
+        between the `start` and `end` dates (inclusive), in `years`, with
+        cloud cover <= `max_cloud` percent, on a WRS path/row, or from a
+        `sensor` (MTL SPACECRAFT_ID, e.g. "LANDSAT_8").
+
+        e.g. `query(aoi, years=[2023], max_cloud=20)`
+        """
+        sql = ["SELECT s.* FROM scenes s"]
+        where, params = [], []
+        if aoi_geojson is not None:
+            geoms = [shape(f["geometry"]) for f in aoi_geojson["features"]]
+            minx = min(g.bounds[0] for g in geoms)
+            miny = min(g.bounds[1] for g in geoms)
+            maxx = max(g.bounds[2] for g in geoms)
+            maxy = max(g.bounds[3] for g in geoms)
+            sql.append("JOIN scene_bounds b ON b.id = s.id")
+            where += [
+                "b.max_lon >= ?",
+                "b.min_lon <= ?",
+                "b.max_lat >= ?",
+                "b.min_lat <= ?",
+            ]
+            params += [minx, maxx, miny, maxy]
+        if start is not None:
+            where.append("s.date >= ?")
+            params.append(str(start))
+        if end is not None:
+            where.append("s.date <= ?")
+            params.append(str(end))
+        if years:
+            # date-range predicates keep the date index usable
+            ranges = ["(s.date >= ? AND s.date < ?)" for _ in years]
+            where.append("(" + " OR ".join(ranges) + ")")
+            for y in years:
+                params += [f"{int(y):04d}-01-01", f"{int(y) + 1:04d}-01-01"]
+        if max_cloud is not None:
+            where.append("s.cloud_cover <= ?")
+            params.append(max_cloud)
+        if wrs_path is not None:
+            where.append("s.wrs_path = ?")
+            params.append(wrs_path)
+        if wrs_row is not None:
+            where.append("s.wrs_row = ?")
+            params.append(wrs_row)
+        if sensor is not None:
+            where.append("s.sensor = ?")
+            params.append(sensor)
+
+        if where:
+            sql.append("WHERE " + " AND ".join(where))
+        sql.append("ORDER BY s.date, s.folder")
+        rows = self.conn.execute(" ".join(sql), params).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def band_paths(record):
+        """(red, nir, swir, thermal) band paths of a catalog row."""
+        return [record[col] for col in BAND_COLUMNS]
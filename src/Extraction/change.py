@@ -0,0 +1,136 @@
+import numpy as np
+import rasterio
+from rasterio.vrt import WarpedVRT
+from rasterio.warp import Resampling
+from rasterio.windows import Window
+
+from Extraction.export import COG_NODATA
+
+# Absolute change (after - before) counted as significant, per index
+CHANGE_THRESHOLDS = {"NDVI": 0.1, "NDWI": 0.1, "NDBI": 0.1, "LST": 2.0}
+
+# Working-set budget for one chunk of the two inputs and their outputs
+CHANGE_MEMORY_BUDGET_MB = 64
+
+# float64 before/after/diff/rel arrays plus boolean masks, per pixel
+_BYTES_PER_PIXEL = 4 * 8 + 4
+
+
+def chunk_rows(width, block_height, budget_mb=CHANGE_MEMORY_BUDGET_MB):
+    """Rows per chunk that fit `budget_mb`, rounded down to whole blocks."""
+    rows = int(budget_mb * 1024**2 // (width * _BYTES_PER_PIXEL))
+    return max(block_height, rows - rows % block_height)
+
+
+def _read_scaled(src, window, scale):
+    raw = src.read(1, window=window)
+    values = raw.astype(np.float64) * scale
+    values[raw == COG_NODATA] = np.nan
+    return values
+
+
+# --------------------------
+# Chunked change detection
+# --------------------------
+def detect_change(
+    before_path,
+    after_path,
+    index_name,
+    threshold=None,
+    rel_threshold=None,
+    out_prefix=None,
+    budget_mb=CHANGE_MEMORY_BUDGET_MB,
+):
+    """
+    Pixel change between two index COGs (see `write_index_cogs`), e.g. the
+    same month of two years.
+
+    The `after` raster is aligned to the `before` grid on the fly, and both
+    are processed in row chunks sized to `budget_mb`, so full scenes never
+    have to fit in memory. A pixel counts as significant gain/loss when
+    |after - before| >= `threshold` (default `CHANGE_THRESHOLDS[index_name]`)
+    and, if given, |relative change| >= `rel_threshold`.
+
+    With `out_prefix`, the difference and relative-change rasters are written
+    chunk by chunk to `<out_prefix>_diff.tif` and `<out_prefix>_rel.tif`.
+
+    Returns a report with valid/gain/loss areas in km² and percent of the
+    valid area, and the mean difference.
+    """
+    if threshold is None:
+        threshold = CHANGE_THRESHOLDS[index_name]
+
+    with rasterio.open(before_path) as before, rasterio.open(after_path) as after:
+        with WarpedVRT(
+            after,
+            crs=before.crs,
+            transform=before.transform,
+            width=before.width,
+            height=before.height,
+            resampling=Resampling.nearest,
+        ) as after_vrt:
+            pixel_km2 = abs(before.transform.a * before.transform.e) / 1e6
+            rows = chunk_rows(before.width, before.block_shapes[0][0], budget_mb)
+
+            outputs = []
+            if out_prefix:
+                profile = before.profile.copy()
+                profile.update(
+                    driver="GTiff",
+                    dtype="float32",
+                    nodata=np.nan,
+                    tiled=True,
+                    blockxsize=512,
+                    blockysize=512,
+                    compress="deflate",
+                    predictor=3,
+                )
+                outputs = [
+                    rasterio.open(f"{out_prefix}_{kind}.tif", "w", **profile)
+                    for kind in ("diff", "rel")
+                ]
+
+            n_valid = n_gain = n_loss = 0
+            diff_sum = 0.0
+            try:
+                for row_off in range(0, before.height, rows):
+                    window = Window(
+                        0, row_off, before.width, min(rows, before.height - row_off)
+                    )
+                    b = _read_scaled(before, window, before.scales[0])
+                    a = _read_scaled(after_vrt, window, after.scales[0])
+
+                    diff = a - b
+                    with np.errstate(divide="ignore", invalid="ignore"):
+                        rel = diff / np.abs(b)
+                    valid = np.isfinite(diff)
+
+                    significant = np.abs(diff) >= threshold
+                    if rel_threshold is not None:
+                        significant &= np.abs(rel) >= rel_threshold
+                    significant &= valid
+
+                    n_valid += int(valid.sum())
+                    n_gain += int((significant & (diff > 0)).sum())
+                    n_loss += int((significant & (diff < 0)).sum())
+                    diff_sum += float(diff[valid].sum())
+
+                    for dst, arr in zip(outputs, (diff, rel)):
+                        dst.write(arr.astype(np.float32), 1, window=window)
+            finally:
+                for dst in outputs:
+                    dst.close()
+
+    def pct(n):
+        return 100.0 * n / n_valid if n_valid else float("nan")
+
+    return {
+        "index": index_name,
+        "threshold": threshold,
+        "valid_km2": n_valid * pixel_km2,
+        "gain_km2": n_gain * pixel_km2,
+        "loss_km2": n_loss * pixel_km2,
+        "gain_pct": pct(n_gain),
+        "loss_pct": pct(n_loss),
+        "mean_diff": diff_sum / n_valid if n_valid else float("nan"),
+    }
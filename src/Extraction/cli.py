@@ -0,0 +1,196 @@
+import argparse
+import cProfile
+import json
+import os
+import sys
+from datetime import datetime
+
+from Extraction.bands import BAND_READ_THREADS
+from Extraction.catalog import SceneCatalog
+from Extraction.distributions import save_timeseries
+from Extraction.pipeline import (
+    ExtractionOptions,
+    build_timeseries,
+    update_timeseries,
+)
+from Extraction.profiling import StageProfiler, stage
+from Extraction.qa import MIN_VALID_FRACTION
+from Extraction.tiles import render_cog_dir_tiles
+
+
+# --------------------------
+# Command line
+# --------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="extract",
+        description=(
+            "Build the Landsat index time series (NDVI, NDWI, NDBI, LST) of an "
+            "AOI from the scene folders under a data root, as the "
+            "Data-Extraction notebook does."
+        ),
+    )
+    parser.add_argument(
+        "data_root", nargs="?", default="data", help="year/month scene folders"
+    )
+    parser.add_argument("--aoi", help="AOI GeoJSON (default: <data_root>/aoi.geojson)")
+    parser.add_argument(
+        "--output", help="CSV to write (default: <data_root>/all-landsat-data.csv)"
+    )
+
+    run = parser.add_argument_group("extraction")
+    run.add_argument("--workers", type=int, help="scene processes (default: serial)")
+    run.add_argument(
+        "--distributions", action="store_true", help="per-scene histograms"
+    )
+    run.add_argument("--qa-mask", action="store_true", help="QA_PIXEL screening")
+    run.add_argument("--min-valid-fraction", type=float, default=MIN_VALID_FRACTION)
+    run.add_argument("--streaming", action="store_true", help="block-wise reads")
+    run.add_argument("--zonal", action="store_true", help="per-index zonal_stats path")
+    run.add_argument("--cog-dir", help="also write the index rasters as COGs here")
+    run.add_argument("--read-threads", type=int, default=BAND_READ_THREADS)
+    run.add_argument("--no-prefetch", action="store_true")
+    run.add_argument(
+        "--cache-dir", help="incremental run: reuse per-scene results cached here"
+    )
+    run.add_argument("--catalog", help="select scenes through this SQLite catalog")
+    run.add_argument(
+        "--refresh-catalog",
+        action="store_true",
+        help="sync the catalog with the data root first (after adding scenes)",
+    )
+    run.add_argument("--years", type=int, nargs="+", help="catalog filter")
+    run.add_argument("--max-cloud", type=float, help="catalog filter (percent)")
+
+    tiles = parser.add_argument_group("overlay tiles")
+    tiles.add_argument(
+        "--tiles-dir",
+        help=(
+            "after the run, render XYZ tiles of the --cog-dir COGs here (e.g. "
+            "src/static/tiles for the dashboard overlays); up-to-date scenes "
+            "are skipped"
+        ),
+    )
+    tiles.add_argument(
+        "--tile-zooms",
+        type=int,
+        nargs=2,
+        default=(8, 13),
+        metavar=("MIN", "MAX"),
+        help="inclusive zoom range of the tiles (default: 8 13)",
+    )
+
+    prof = parser.add_argument_group("profiling")
+    prof.add_argument(
+        "--profile",
+        help=(
+            "write wall time, bytes read (from storage and through read "
+            "syscalls) and peak RSS per stage and scene (.json summary or .csv "
+            "records); scenes are then loaded one at a time, and --workers "
+            "profile their own scenes"
+        ),
+    )
+    prof.add_argument(
+        "--cprofile",
+        help="dump cProfile stats here (main process only), see `python -m pstats`",
+    )
+
+    args = parser.parse_args(argv)
+    if args.tiles_dir and not args.cog_dir:
+        parser.error("--tiles-dir renders the COGs, so it requires --cog-dir")
+    if args.streaming and args.cog_dir:
+        parser.error("--cog-dir writes whole index rasters, so it excludes --streaming")
+    if args.refresh_catalog and not args.catalog:
+        parser.error("--refresh-catalog requires --catalog")
+    args.aoi = args.aoi or os.path.join(args.data_root, "aoi.geojson")
+    args.output = args.output or os.path.join(args.data_root, "all-landsat-data.csv")
+    return args
+
+
+def run_extraction(args, profiler=None):
+    """Build (or incrementally update) and save the time series for `args`."""
+    with open(args.aoi) as f:
+        aoi_geojson = json.load(f)
+
+    scene_filter = {}
+    if args.years:
+        scene_filter["years"] = args.years
+    if args.max_cloud is not None:
+        scene_filter["max_cloud"] = args.max_cloud
+    catalog = SceneCatalog(args.catalog) if args.catalog else None
+    options = ExtractionOptions(
+        fused=not args.zonal,
+        workers=args.workers,
+        streaming=args.streaming,
+        cog_dir=args.cog_dir,
+        distributions=args.distributions,
+        qa_mask=args.qa_mask,
+        min_valid_fraction=args.min_valid_fraction,
+        read_threads=args.read_threads,
+        prefetch=not args.no_prefetch,
+    )
+    kwargs = {
+        "options": options,
+        "catalog": catalog,
+        "scene_filter": scene_filter,
+        "refresh_catalog": args.refresh_catalog,
+        "profiler": profiler,
+    }
+
+    try:
+        if args.cache_dir:
+            return update_timeseries(
+                args.data_root, aoi_geojson, args.output, args.cache_dir, **kwargs
+            )
+        df = build_timeseries(args.data_root, aoi_geojson, **kwargs)
+        with stage(profiler, "write"):
+            save_timeseries(df, args.output)
+        return df
+    finally:
+        if catalog is not None:
+            catalog.close()
+
+
+def main(argv=None):
+    """
+    Command-line entry point, e.g. from `src/`:
+
+        python -m Extraction.cli ../data --qa-mask --profile profile.json
+
+    Returns the process exit code.
+    """
+    args = parse_args(argv)
+    started = datetime.now().isoformat(timespec="seconds")
+    profiler = StageProfiler() if args.profile else None
+    cprof = cProfile.Profile() if args.cprofile else None
+
+    if cprof is not None:
+        cprof.enable()
+    df = run_extraction(args, profiler)
+    if cprof is not None:
+        cprof.disable()
+        cprof.dump_stats(args.cprofile)
+
+    print(f"{len(df)} scenes -> {args.output}")
+    if args.tiles_dir:
+        with stage(profiler, "tiles"):
+            tiles = render_cog_dir_tiles(
+                args.cog_dir, args.tiles_dir, tuple(args.tile_zooms)
+            )
+        print(f"tiles of {len(tiles)} scenes -> {args.tiles_dir}")
+    if profiler is not None:
+        profiler.write(
+            args.profile,
+            started=started,
+            argv=sys.argv[1:] if argv is None else list(argv),
+            data_root=args.data_root,
+            output=args.output,
+            n_rows=len(df),
+        )
+        print(profiler.stage_totals().to_string())
+        print(f"profile -> {args.profile}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+import calendar
+import json
+import os
+from contextlib import ExitStack
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import rasterio
+from rasterio.windows import Window
+
+from Extraction.aoi import reproject_aoi
+from Extraction.catalog import read_scene_record
+from Extraction.distributions import IndexHistograms
+from Extraction.export import (
+    COG_NODATA,
+    INDEX_SCALES,
+    index_cog_path,
+    scale_index,
+    write_cog,
+)
+from Extraction.mosaic import MOSAIC_BANDS, grid_vrt, mosaic_grid
+from Extraction.pipeline import add_distributions, discover_scene_folders, scene_row
+from Extraction.qa import QA_FILL, QA_REJECT_BITS, qa_valid
+from Extraction.stats import (
+    INDEX_NAMES,
+    RunningStats,
+    aoi_mask,
+    index_stack,
+    stats_dict,
+)
+from Extraction.streaming import aoi_blocks
+
+COMPOSITE_PERIODS = ("month", "season")
+
+# Meteorological seasons, labelled by their months; December opens the DJF
+# season of the following winter
+SEASONS = {
+    12: "DJF",
+    1: "DJF",
+    2: "DJF",
+    3: "MAM",
+    4: "MAM",
+    5: "MAM",
+    6: "JJA",
+    7: "JJA",
+    8: "JJA",
+    9: "SON",
+    10: "SON",
+    11: "SON",
+}
+
+# Composite grid block read from every scene at once
+COMPOSITE_BLOCK_SHAPE = (256, 256)
+
+
+# --------------------------
+# Compositing periods
+# --------------------------
+def period_start(day, period="month"):
+    """First day of the month or season (see `SEASONS`) holding `day`."""
+    if period == "month":
+        return date(day.year, day.month, 1)
+    if period == "season":
+        month = day.month - day.month % 12 % 3
+        if month <= 0:
+            return date(day.year - 1, month + 12, 1)
+        return date(day.year, month, 1)
+    raise ValueError(f"period must be one of {COMPOSITE_PERIODS}, got {period!r}")
+
+
+def period_label(start, period="month"):
+    """Month name ("March") or season label ("MAM") of a period start."""
+    if period == "month":
+        return calendar.month_name[start.month]
+    return SEASONS[start.month]
+
+
+def group_composite_scenes(records, period="month"):
+    """
+    Group catalog rows (see `SceneCatalog.query` / `read_scene_record`) by
+    month or season of acquisition. Returns (period start, records by date)
+    pairs, oldest period first.
+    """
+    groups = {}
+    for record in sorted(records, key=lambda r: (r["date"], r["folder"])):
+        start = period_start(date.fromisoformat(record["date"]), period)
+        groups.setdefault(start, []).append(record)
+    return sorted(groups.items())
+
+
+# --------------------------
+# Streaming per-pixel median composites
+# --------------------------
+def median_over_scenes(values):
+    """
+    Median along the first (scene) axis, ignoring NaNs; all-NaN pixels stay
+    NaN. Same result as `np.nanmedian(values, axis=0)`, but one sort of the
+    short scene axis instead of a masked-array median, and no "All-NaN
+    slice" warning for pixels without a clear observation.
+    """
+    # NaNs sort last, so the k clear observations of a pixel come first
+    ordered = np.sort(values, axis=0)
+    k = np.count_nonzero(~np.isnan(ordered), axis=0)
+    lo = np.take_along_axis(ordered, np.maximum((k - 1) // 2, 0)[None], axis=0)
+    hi = np.take_along_axis(ordered, (k // 2)[None], axis=0)
+    return (lo[0] + hi[0]) / 2
+
+
+def stream_median_composite(
+    records,
+    grid,
+    mask,
+    qa_mask=False,
+    reject_bits=QA_REJECT_BITS,
+    block_shape=COMPOSITE_BLOCK_SHAPE,
+):
+    """
+    Per-pixel median NDVI, NDWI, NDBI and LST over `records`, computed block
+    by block on `grid` (see `mosaic_grid`) inside the boolean AOI `mask`.
+
+    For every block touching the AOI, the block is read from each scene
+    (warped onto the grid on the fly), fill pixels and, with `qa_mask`,
+    pixels flagged with `reject_bits` in QA_PIXEL are dropped, and the
+    median is taken across the remaining observations. Only one block of
+    every scene is held in memory, whatever the number of scenes.
+
+    Yields (block window, block AOI mask, composite values (4, n_pixels),
+    number of clear observations per pixel); pixels without any clear
+    observation are NaN.
+    """
+    window = Window(0, 0, grid["width"], grid["height"])
+    packed = np.packbits(mask, axis=1)
+    with ExitStack() as stack:
+        scenes = []
+        for record in records:
+            srcs = [stack.enter_context(rasterio.open(record[b])) for b in MOSAIC_BANDS]
+            nodata = [src.nodata if src.nodata is not None else 0 for src in srcs]
+            vrts = [
+                stack.enter_context(grid_vrt(src, grid, nd))
+                for src, nd in zip(srcs, nodata)
+            ]
+            qa_vrt = None
+            if qa_mask:
+                if record["qa"] is None:
+                    raise FileNotFoundError(f"No QA_PIXEL band in {record['folder']}")
+                qa_src = stack.enter_context(rasterio.open(record["qa"]))
+                qa_vrt = stack.enter_context(grid_vrt(qa_src, grid, QA_FILL))
+            scenes.append((vrts, nodata[0], qa_vrt))
+
+        for block, block_mask in aoi_blocks(window, packed, block_shape):
+            n = int(np.count_nonzero(block_mask))
+            values = np.full((len(scenes), len(INDEX_NAMES), n), np.nan)
+            n_obs = np.zeros(n, dtype=np.int64)
+            for scene_values, (vrts, nodata, qa_vrt) in zip(values, scenes):
+                red = vrts[0].read(1, window=block)[block_mask]
+                take = red != nodata
+                if qa_vrt is not None:
+                    qa = qa_vrt.read(1, window=block)[block_mask]
+                    take &= qa_valid(qa, reject_bits)
+                if not take.any():
+                    continue
+                bands = [red[take]] + [
+                    vrt.read(1, window=block)[block_mask][take] for vrt in vrts[1:]
+                ]
+                scene_values[:, take] = index_stack(
+                    *(b.astype(np.float64) for b in bands)
+                )
+                n_obs += take
+            yield block, block_mask, median_over_scenes(values), n_obs
+
+
+def process_composite(
+    records,
+    aoi_geojson,
+    start,
+    period="month",
+    qa_mask=False,
+    distributions=False,
+    reject_bits=QA_REJECT_BITS,
+    composite_dir=None,
+):
+    """
+    AOI statistics of the median composite of `records` (one group from
+    `group_composite_scenes`), as a `scene_row` dated by the period `start`,
+    with the number of scenes and the share of the AOI with at least one
+    clear observation (`valid_fraction`).
+
+    With `composite_dir` the composite NDVI/NDWI/NDBI/LST are also written
+    there as COGs named like the per-scene ones (see `write_index_cogs`),
+    e.g. `composite_20230301_month_NDVI.tif`.
+    """
+    grid = mosaic_grid(records, aoi_geojson)
+    geojson_grid = json.loads(reproject_aoi(aoi_geojson, grid["crs"]).to_json())
+    in_aoi = aoi_mask(geojson_grid, grid)
+
+    acc = RunningStats()
+    histograms = IndexHistograms() if distributions else None
+    out = None
+    if composite_dir:
+        shape = (len(INDEX_NAMES), grid["height"], grid["width"])
+        out = np.full(shape, COG_NODATA, dtype=np.int16)
+    n_filled = 0
+
+    for block, block_mask, composite, n_obs in stream_median_composite(
+        records, grid, in_aoi, qa_mask, reject_bits
+    ):
+        acc.update(composite)
+        if histograms is not None:
+            histograms.update(composite)
+        n_filled += int(np.count_nonzero(n_obs))
+        if out is not None:
+            rows, cols = block.toslices()
+            for band, values, name in zip(out, composite, INDEX_NAMES):
+                band[rows, cols][block_mask] = scale_index(values, INDEX_SCALES[name])
+
+    if out is not None:
+        os.makedirs(composite_dir, exist_ok=True)
+        scene_id = f"composite_{start:%Y%m%d}_{period}"
+        for band, name in zip(out, INDEX_NAMES):
+            scale = INDEX_SCALES[name]
+            write_cog(band, grid, index_cog_path(composite_dir, scene_id, name), scale)
+
+    stats = stats_dict(*acc.result())
+    row = scene_row(start, *(stats[name] for name in INDEX_NAMES))
+    row["n_scenes"] = len(records)
+    n_aoi = int(np.count_nonzero(in_aoi))
+    row["valid_fraction"] = n_filled / n_aoi if n_aoi else 0.0
+    return add_distributions(row, histograms)
+
+
+def build_composite_timeseries(
+    data_root,
+    aoi_geojson,
+    period="month",
+    catalog=None,
+    scene_filter=None,
+    refresh_catalog=False,
+    qa_mask=False,
+    distributions=False,
+    composite_dir=None,
+):
+    """
+    Time series of monthly (`period="month"`) or seasonal (`"season"`)
+    per-pixel median composites, an alternative to the per-scene rows of
+    `build_timeseries`: hazy single acquisitions are outvoted by the other
+    scenes of the period instead of standing in for the whole month.
+
+    Scenes come from the `catalog` (`SceneCatalog`, filtered by the AOI and
+    `scene_filter`; synced with `data_root` first with `refresh_catalog`)
+    or, without one, from the folders under `data_root`. Scenes of a period on different
+    path/rows or CRSs are warped onto one AOI grid (see `mosaic_grid`).
+
+    Rows have the `build_timeseries` columns plus `n_scenes` and
+    `valid_fraction`; `date` is the first day of the period, `year` its year
+    and `scene` the month name or season label (DJF rows start in December
+    of the previous year). Save them with `save_timeseries`.
+    """
+    if period not in COMPOSITE_PERIODS:
+        raise ValueError(f"period must be one of {COMPOSITE_PERIODS}, got {period!r}")
+    if catalog is not None:
+        if refresh_catalog:
+            catalog.refresh(data_root)
+        filters = dict(scene_filter or {})
+        filters["aoi_geojson"] = aoi_geojson
+        records = catalog.query(**filters)
+    else:
+        records = [
+            read_scene_record(m) for _, _, m in discover_scene_folders(data_root)
+        ]
+        records = [r for r in records if r is not None]
+
+    rows = []
+    for start, group in group_composite_scenes(records, period):
+        row = process_composite(
+            group,
+            aoi_geojson,
+            start,
+            period,
+            qa_mask=qa_mask,
+            distributions=distributions,
+            composite_dir=composite_dir,
+        )
+        row["year"] = str(start.year)
+        row["scene"] = period_label(start, period)
+        rows.append(row)
+
+    if not rows:
+        return pd.DataFrame()
+    df = pd.DataFrame(rows).dropna().sort_values("date").reset_index(drop=True)
+    return df
@@ -0,0 +1,157 @@
+import json
+import os
+
+import numpy as np
+import rasterio
+from affine import Affine
+from rasterio.crs import CRS
+from rasterio.vrt import WarpedVRT
+from rasterio.warp import Resampling
+
+from Extraction.export import COG_NODATA, index_cog_files
+
+try:
+    import zarr
+except ImportError:  # optional; fall back to a memory-mapped .npy cube
+    zarr = None
+
+# (time, y, x) chunks: 8 dates per chunk keeps one-date map reads cheap, and
+# 256 x 256 pixel tiles keep long per-pixel time-series reads to few chunks
+CUBE_CHUNKS = (8, 256, 256)
+
+
+def _cube_paths(cube_dir, index_name):
+    base = os.path.join(cube_dir, index_name)
+    return base + ".json", base + ".zarr", base + ".npy"
+
+
+# --------------------------
+# Datacube writer
+# --------------------------
+def write_datacube(cog_dir, cube_dir, index_name, backend=None, chunks=CUBE_CHUNKS):
+    """
+    Stack every per-scene `index_name` COG in `cog_dir` (see
+    `write_index_cogs`) into one (time, y, x) int16 cube under `cube_dir`,
+    ordered by scene date. Values keep the COG scaling and nodata.
+
+    The grid is the first scene's AOI window; scenes on a different grid are
+    aligned to it on the fly. `backend` is "zarr" (chunked, compressed;
+    default when zarr is installed) or "npy" (a memory-mapped C-order array).
+    Only one scene is held in memory while writing. Returns the cube metadata.
+    """
+    scenes = index_cog_files(cog_dir, index_name)
+    if not scenes:
+        raise FileNotFoundError(f"No {index_name} rasters found in {cog_dir}")
+    backend = backend or ("zarr" if zarr is not None else "npy")
+    if backend == "zarr" and zarr is None:
+        raise ImportError("backend='zarr' requires the zarr package")
+
+    with rasterio.open(scenes[0][1]) as ref:
+        crs, transform = ref.crs, ref.transform
+        height, width = ref.height, ref.width
+        scale = ref.scales[0]
+    shape = (len(scenes), height, width)
+
+    os.makedirs(cube_dir, exist_ok=True)
+    meta_path, zarr_path, npy_path = _cube_paths(cube_dir, index_name)
+    if backend == "zarr":
+        cube = zarr.open_array(
+            store=zarr_path,
+            mode="w",
+            shape=shape,
+            chunks=tuple(min(c, n) for c, n in zip(chunks, shape)),
+            dtype="int16",
+            fill_value=COG_NODATA,
+        )
+    else:
+        cube = np.lib.format.open_memmap(
+            npy_path, mode="w+", dtype=np.int16, shape=shape
+        )
+
+    for t, (_, path) in enumerate(scenes):
+        with rasterio.open(path) as src:
+            same_grid = src.crs == crs and src.transform == transform
+            if same_grid and src.shape == (height, width):
+                cube[t] = src.read(1)
+            else:
+                with WarpedVRT(
+                    src,
+                    crs=crs,
+                    transform=transform,
+                    width=width,
+                    height=height,
+                    nodata=COG_NODATA,
+                    resampling=Resampling.nearest,
+                ) as vrt:
+                    cube[t] = vrt.read(1)
+    if backend == "npy":
+        cube.flush()
+        del cube
+
+    meta = {
+        "index": index_name,
+        "backend": backend,
+        "times": [d.isoformat() for d, _ in scenes],
+        "scenes": [os.path.basename(p) for _, p in scenes],
+        "shape": list(shape),
+        "chunks": list(chunks),
+        "crs": crs.to_wkt(),
+        "transform": list(transform)[:6],
+        "scale": scale,
+        "nodata": COG_NODATA,
+    }
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    return meta
+
+
+# --------------------------
+# Datacube reader
+# --------------------------
+class DataCube:
+    """
+    Read access to a cube written by `write_datacube`. Reads return float64
+    physical values with NaN for nodata.
+    """
+
+    def __init__(self, cube_dir, index_name):
+        meta_path, zarr_path, npy_path = _cube_paths(cube_dir, index_name)
+        with open(meta_path) as f:
+            self.meta = json.load(f)
+        self.times = [np.datetime64(t) for t in self.meta["times"]]
+        self.crs = CRS.from_wkt(self.meta["crs"])
+        self.transform = Affine(*self.meta["transform"])
+        self.shape = tuple(self.meta["shape"])
+        self.scale = self.meta["scale"]
+        if self.meta["backend"] == "zarr":
+            if zarr is None:
+                raise ImportError("this cube was written with zarr; install zarr")
+            self._array = zarr.open_array(store=zarr_path, mode="r")
+        else:
+            self._array = np.load(npy_path, mmap_mode="r")
+
+    def _to_values(self, raw):
+        values = raw.astype(np.float64) * self.scale
+        values[raw == COG_NODATA] = np.nan
+        return values
+
+    def read(self, times=slice(None), rows=slice(None), cols=slice(None)):
+        """Values of a (time, y, x) selection given as slices."""
+        return self._to_values(np.asarray(self._array[times, rows, cols]))
+
+    def read_date(self, t):
+        """Whole AOI map of the t-th date."""
+        return self.read(t)
+
+    def read_pixels(self, rows, cols):
+        """Time series of the pixels (rows[i], cols[i]); shape (time, n)."""
+        rows, cols = np.asarray(rows), np.asarray(cols)
+        out = np.empty((self.shape[0], rows.size), dtype=np.float64)
+        for i, (r, c) in enumerate(zip(rows, cols)):
+            out[:, i] = self.read(slice(None), r, c)
+        return out
+
+    def pixel_at(self, x, y):
+        """(row, col) of the pixel containing map coordinate x/y (cube CRS)."""
+        col, row = ~self.transform * (x, y)
+        return int(row), int(col)
@@ -0,0 +1,199 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from Extraction.aggregates import (
+    aggregates_path,
+    build_aggregate_cube,
+    write_aggregate_cube,
+)
+from Extraction.indices import INDEX_NAMES
+from Extraction.storage import DEFAULT_AOI, parquet_path, write_timeseries_parquet
+
+# Fixed histogram bins per index: (low, high, bin width). Values outside
+# [low, high] (e.g. LST fill pixels far below -30 °C) are not binned and do not
+# enter the percentiles; they are counted separately (see `outside_column`).
+HISTOGRAM_BINS = {
+    "NDVI": (-1.0, 1.0, 0.01),
+    "NDWI": (-1.0, 1.0, 0.01),
+    "NDBI": (-1.0, 1.0, 0.01),
+    "LST": (-30.0, 70.0, 0.1),
+}
+
+# Percentiles stored per scene and index (CSV columns <INDEX>_p5 ... _p95)
+QUANTILES = (5, 25, 50, 75, 95)
+
+
+def histogram_edges(index_name):
+    low, high, width = HISTOGRAM_BINS[index_name]
+    n_bins = int(round((high - low) / width))
+    return np.linspace(low, high, n_bins + 1)
+
+
+def quantile_columns(index_name):
+    return [f"{index_name}_p{q}" for q in QUANTILES]
+
+
+def histogram_column(index_name):
+    return f"{index_name}_hist"
+
+
+def outside_column(index_name):
+    """Row column of the [below, above] counts of out-of-range pixels."""
+    return f"{index_name}_outside"
+
+
+def quantiles_from_histogram(counts, edges, quantiles=QUANTILES):
+    """
+    Percentiles of a binned distribution, interpolating linearly inside the
+    bin that holds each rank. The error is at most one bin width.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    total = counts.sum()
+    if total == 0:
+        return np.full(len(quantiles), np.nan)
+    cum = np.cumsum(counts)
+    ranks = np.asarray(quantiles, dtype=np.float64) / 100.0 * total
+    bins = np.minimum(np.searchsorted(cum, ranks, side="left"), counts.size - 1)
+    below = np.where(bins > 0, cum[bins - 1], 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frac = np.where(counts[bins] > 0, (ranks - below) / counts[bins], 0.0)
+    return edges[bins] + np.clip(frac, 0.0, 1.0) * (edges[bins + 1] - edges[bins])
+
+
+# --------------------------
+# Streaming histograms / quantile sketches
+# --------------------------
+class IndexHistograms:
+    """
+    Fixed-bin histograms for each row of an index stack (`INDEX_NAMES`
+    order). Blocks are binned as they arrive and merge by adding counts, so
+    block-wise, per-scene and per-worker results combine exactly. The
+    histograms double as quantile sketches (see `quantiles_from_histogram`).
+    Values outside an index's `HISTOGRAM_BINS` range are only counted, in
+    `outside` ([below, above] per index).
+    """
+
+    def __init__(self, index_names=INDEX_NAMES):
+        self.index_names = list(index_names)
+        self.edges = [histogram_edges(name) for name in self.index_names]
+        self.counts = [np.zeros(e.size - 1, dtype=np.int64) for e in self.edges]
+        self.outside = [np.zeros(2, dtype=np.int64) for _ in self.index_names]
+
+    def update(self, values):
+        """Fold a (n, n_pixels) block of values (non-finite values ignored)."""
+        for row, name, counts, outside in zip(
+            values, self.index_names, self.counts, self.outside
+        ):
+            row = row[np.isfinite(row)]
+            if row.size == 0:
+                continue
+            low, high, width = HISTOGRAM_BINS[name]
+            below, above = row < low, row > high
+            outside += (np.count_nonzero(below), np.count_nonzero(above))
+            row = row[~(below | above)]
+            # `high` itself falls in the last bin
+            bins = np.minimum(((row - low) / width).astype(np.int64), counts.size - 1)
+            counts += np.bincount(bins, minlength=counts.size)
+
+    def merge(self, other):
+        for counts, other_counts in zip(self.counts, other.counts):
+            counts += other_counts
+        for outside, other_outside in zip(self.outside, other.outside):
+            outside += other_outside
+
+    def quantiles(self, quantiles=QUANTILES):
+        """{index: array of percentiles}."""
+        return {
+            name: quantiles_from_histogram(counts, edges, quantiles)
+            for name, counts, edges in zip(self.index_names, self.counts, self.edges)
+        }
+
+    def row_fields(self):
+        """
+        Scene-row columns: the `QUANTILES` percentiles of every index, its
+        histogram counts and its out-of-range counts (as lists, dropped from
+        the CSV by `save_timeseries`).
+        """
+        fields = {}
+        for name, counts, outside, values in zip(
+            self.index_names, self.counts, self.outside, self.quantiles().values()
+        ):
+            fields.update(zip(quantile_columns(name), values.tolist()))
+            fields[histogram_column(name)] = counts.tolist()
+            fields[outside_column(name)] = outside.tolist()
+        return fields
+
+
+# --------------------------
+# Histogram storage next to the CSV
+# --------------------------
+def histograms_path(output_csv):
+    """`data/all-landsat-data.csv` -> `data/all-landsat-data_hist.npz`."""
+    return os.path.splitext(output_csv)[0] + "_hist.npz"
+
+
+def save_timeseries(df, output_csv, aoi=DEFAULT_AOI):
+    """
+    Write the time series CSV and the same rows as typed Parquet next to it
+    (see `parquet_path` / `write_timeseries_parquet`; `aoi` labels
+    single-AOI rows), plus the dashboards' aggregate cube (see
+    `build_aggregate_cube`). Histogram columns, when present, go to a
+    compressed `.npz` next to it (see `histograms_path`): one uint32 count
+    matrix (scenes x bins), the bin edges and the out-of-range counts
+    (scenes x [below, above]) per index, keyed by the (year, scene) of each
+    CSV row. Rows without a histogram get zero counts.
+    """
+    hist_cols = [histogram_column(n) for n in INDEX_NAMES]
+    hist_cols += [outside_column(n) for n in INDEX_NAMES]
+    hist_cols = [c for c in hist_cols if c in df.columns]
+    rows = df.drop(columns=hist_cols)
+    rows.to_csv(output_csv, index=False)
+    write_timeseries_parquet(rows, parquet_path(output_csv), aoi)
+    write_aggregate_cube(build_aggregate_cube(rows, aoi), aggregates_path(output_csv))
+    if not hist_cols:
+        return
+
+    arrays = {
+        "date": df["date"].astype(str).to_numpy(dtype=str),
+        "year": df["year"].astype(str).to_numpy(dtype=str),
+        "scene": df["scene"].astype(str).to_numpy(dtype=str),
+    }
+    for name in INDEX_NAMES:
+        col = histogram_column(name)
+        if col in df.columns:
+            edges = histogram_edges(name)
+            empty = np.zeros(edges.size - 1)
+            arrays[f"{name}_edges"] = edges
+            arrays[f"{name}_counts"] = np.array(
+                [empty if np.isscalar(c) else c for c in df[col]], dtype=np.uint32
+            )
+        col = outside_column(name)
+        if col in df.columns:
+            arrays[f"{name}_outside"] = np.array(
+                [np.zeros(2) if np.isscalar(c) else c for c in df[col]],
+                dtype=np.uint32,
+            )
+    np.savez_compressed(histograms_path(output_csv), **arrays)
+
+
+def load_histograms(path):
+    """
+    Read a histogram file written by `save_timeseries`. Returns a DataFrame
+    with date/year/scene, one `<INDEX>_hist` column of count arrays and,
+    when stored, one `<INDEX>_outside` column of [below, above] counts, plus
+    {index: bin edges}.
+    """
+    with np.load(path, allow_pickle=False) as f:
+        df = pd.DataFrame(
+            {"date": pd.to_datetime(f["date"]), "year": f["year"], "scene": f["scene"]}
+        )
+        edges = {}
+        for name in INDEX_NAMES:
+            if f"{name}_counts" in f:
+                edges[name] = f[f"{name}_edges"]
+                df[histogram_column(name)] = list(f[f"{name}_counts"])
+            if f"{name}_outside" in f:
+                df[outside_column(name)] = list(f[f"{name}_outside"])
+    return df, edges
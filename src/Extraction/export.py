@@ -0,0 +1,123 @@
+import os
+
+import numpy as np
+import rasterio
+from rasterio.io import MemoryFile
+from rasterio.shutil import copy as rio_copy
+
+from Extraction.bands import scene_date_from_filename
+from Extraction.stats import INDEX_NAMES
+
+# Stored value = physical value * scale (NDVI/NDWI/NDBI in 1e-4, LST in centi-degrees C)
+INDEX_SCALES = {"NDVI": 10000, "NDWI": 10000, "NDBI": 10000, "LST": 100}
+COG_NODATA = -32768
+
+COG_OPTIONS = {
+    "compress": "DEFLATE",
+    "predictor": 2,
+    "blocksize": 512,
+    "overview_resampling": "average",
+}
+
+
+def scene_id_from_filename(fname):
+    # LC08_L2SP_141041_20230404_20230412_02_T1_SR_B4.TIF -> LC08_L2SP_141041_20230404_20230412_02_T1
+    return fname.split("_SR_")[0].split("_ST_")[0]
+
+
+def index_cog_path(out_dir, scene_id, index_name):
+    return os.path.join(out_dir, f"{scene_id}_{index_name}.tif")
+
+
+def index_cog_files(cog_dir, index_name):
+    """(date, path) of every `index_name` COG in `cog_dir`, sorted by date."""
+    if not os.path.isdir(cog_dir):
+        return []
+    files = []
+    for fname in os.listdir(cog_dir):
+        if fname.endswith(f"_{index_name}.tif"):
+            scene_date = scene_date_from_filename(fname)
+            if scene_date is not None:
+                files.append((scene_date, os.path.join(cog_dir, fname)))
+    return sorted(files)
+
+
+def scale_index(values, scale):
+    """Scale a float index array to int16, mapping NaN to `COG_NODATA`."""
+    scaled = np.round(values * scale)
+    scaled = np.clip(scaled, -32767, 32767)
+    return np.where(np.isfinite(values), scaled, COG_NODATA).astype(np.int16)
+
+
+def write_cog(arr, profile, path, scale):
+    """
+    Write a scaled int16 array as a tiled, DEFLATE-compressed Cloud-Optimized
+    GeoTIFF with internal overviews. The scale is recorded in the band
+    metadata so readers can recover physical values.
+    """
+    mem_profile = {
+        "driver": "GTiff",
+        "width": arr.shape[1],
+        "height": arr.shape[0],
+        "count": 1,
+        "dtype": "int16",
+        "crs": profile["crs"],
+        "transform": profile["transform"],
+        "nodata": COG_NODATA,
+    }
+    with MemoryFile() as mem:
+        with mem.open(**mem_profile) as tmp:
+            tmp.write(arr, 1)
+            tmp.scales = (1.0 / scale,)
+            tmp.offsets = (0.0,)
+        with mem.open() as tmp:
+            rio_copy(tmp, path, driver="COG", **COG_OPTIONS)
+    return path
+
+
+# --------------------------
+# Per-pixel index export
+# --------------------------
+def write_index_cogs(stack, mask, profile, out_dir, scene_id):
+    """
+    Write NDVI, NDWI, NDBI and LST for the AOI window as one COG each.
+    `stack` holds the index values of the `mask` pixels (see `index_stack`);
+    pixels outside the AOI `mask` are nodata. Returns {index: path}.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+
+    paths = {}
+    grid = np.empty(mask.shape, dtype=np.float64)
+    for values, name in zip(stack, INDEX_NAMES):
+        grid.fill(np.nan)
+        grid[mask] = values
+        scale = INDEX_SCALES[name]
+        paths[name] = write_cog(
+            scale_index(grid, scale),
+            profile,
+            index_cog_path(out_dir, scene_id, name),
+            scale,
+        )
+    return paths
+
+
+def read_index_cog(path, window=None, overview_level=None):
+    """
+    Read an index COG back as float64 physical values (NaN for nodata) and
+    return it with the raster profile. `overview_level` reads one of the
+    internal overviews instead of the full resolution.
+    """
+    kwargs = {} if overview_level is None else {"overview_level": overview_level}
+    with rasterio.open(path, **kwargs) as src:
+        raw = src.read(1, window=window)
+        profile = src.profile.copy()
+        if window is not None:
+            profile.update(
+                transform=src.window_transform(window),
+                width=raw.shape[1],
+                height=raw.shape[0],
+            )
+        scale = src.scales[0]
+    values = raw.astype(np.float64) * scale
+    values[raw == COG_NODATA] = np.nan
+    return values, profile
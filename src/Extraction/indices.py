@@ -0,0 +1,58 @@
+import numpy as np
+
+# Order of the stacked indices in the fused kernel output
+INDEX_NAMES = ["NDVI", "NDWI", "NDBI", "LST"]
+
+# Column names of the per-index statistics in the output frame
+STAT_COLUMNS = {
+    "NDVI": ("NDVI_mean", "NDVI_std"),
+    "NDWI": ("NDWI_mean", "NDWI_std"),
+    "NDBI": ("NDBI_mean", "NDBI_std"),
+    "LST": ("LST_mean_C", "LST_std_C"),
+}
+
+
+# --------------------------
+# NDVI (Normalized Difference Vegetation Index)
+# --------------------------
+# NDVI = (NIR - Red) / (NIR + Red)
+def compute_ndvi(nir, red):
+    np.seterr(divide="ignore", invalid="ignore")
+    ndvi = (nir - red) / (nir + red)
+    ndvi = np.where(np.isfinite(ndvi), ndvi, np.nan)
+    return ndvi
+
+
+# --------------------------
+# NDWI (Normalized Difference Water Index)
+# --------------------------
+# NDWI = (NIR - SWIR) / (NIR + SWIR)
+def compute_ndwi(nir, swir):
+    np.seterr(divide="ignore", invalid="ignore")
+    ndwi = (nir - swir) / (nir + swir)
+    ndwi = np.where(np.isfinite(ndwi), ndwi, np.nan)
+    return ndwi
+
+
+# --------------------------
+# NDBI (Normalized Difference Built-up Index)
+# --------------------------
+# NDBI = (SWIR - NIR) / (SWIR + NIR)
+def compute_ndbi(swir, nir):
+    np.seterr(divide="ignore", invalid="ignore")
+    ndbi = (swir - nir) / (swir + nir)
+    ndbi = np.where(np.isfinite(ndbi), ndbi, np.nan)
+    return ndbi
+
+
+# --------------------------
+# Land Surface Temperature (LST)
+# --------------------------
+# LST (°C) = B10 * mult + add - 273.15
+def compute_lst(b10, mult=0.00341802, add=149.0):
+    """
+    Convert ST_B10 scaled values to LST in Celsius.
+    """
+    lst_kelvin = b10 * mult + add
+    lst_c = lst_kelvin - 273.15
+    return lst_c
@@ -0,0 +1,222 @@
+import calendar
+import json
+from collections import Counter
+from contextlib import ExitStack
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import rasterio
+from rasterio.vrt import WarpedVRT
+from rasterio.warp import Resampling
+from rasterio.windows import Window, from_bounds
+from rasterio.windows import transform as window_transform
+
+from Extraction.aoi import reproject_aoi
+from Extraction.bands import WINDOW_BUFFER_PX
+from Extraction.distributions import IndexHistograms
+from Extraction.pipeline import add_distributions, scene_row
+from Extraction.qa import QA_FILL, QA_REJECT_BITS, qa_valid
+from Extraction.stats import (
+    INDEX_NAMES,
+    aoi_mask,
+    index_stack,
+    masked_stats,
+    stats_dict,
+)
+
+# Scenes acquired within this many days of a group's first scene are mosaicked
+MOSAIC_MAX_DAYS = 1
+
+MOSAIC_BANDS = ("red", "nir", "swir", "thermal")
+
+
+# --------------------------
+# Grouping catalog scenes into mosaics
+# --------------------------
+def group_mosaic_scenes(records, max_days=MOSAIC_MAX_DAYS):
+    """
+    Group catalog rows (see `SceneCatalog.query`) into mosaics: scenes
+    acquired within `max_days` of a group's first scene, one per WRS
+    path/row (the least cloudy one). Each group is ordered by cloud cover,
+    which is also the compositing priority.
+    """
+    groups = []
+    for record in sorted(records, key=lambda r: (r["date"], r["folder"])):
+        day = date.fromisoformat(record["date"])
+        if groups and (day - groups[-1]["start"]).days <= max_days:
+            groups[-1]["records"].append(record)
+        else:
+            groups.append({"start": day, "records": [record]})
+
+    mosaics = []
+    for group in groups:
+        best = {}
+        for r in group["records"]:
+            tile = (r["wrs_path"], r["wrs_row"]) if r["wrs_path"] else r["folder"]
+            cloud = r["cloud_cover"] if r["cloud_cover"] is not None else 100.0
+            if tile not in best or cloud < best[tile][0]:
+                best[tile] = (cloud, r)
+        mosaics.append([r for _, r in sorted(best.values(), key=lambda t: t[0])])
+    return mosaics
+
+
+def mosaic_grid(records, aoi_geojson, buffer=WINDOW_BUFFER_PX):
+    """
+    Common grid of a mosaic: the AOI bounds, padded by `buffer` pixels, on
+    the pixel lattice of the first scene in the CRS most of the scenes share,
+    so scenes on that grid are read without resampling. Returns a profile
+    dict (crs, transform, width, height).
+    """
+    crs_name = Counter(r["crs"] for r in records).most_common(1)[0][0]
+    ref = next(r for r in records if r["crs"] == crs_name)
+    with rasterio.open(ref["red"]) as src:
+        crs, transform = src.crs, src.transform
+
+    bounds = reproject_aoi(aoi_geojson, crs).total_bounds
+    win = from_bounds(*bounds, transform=transform)
+    win = win.round_offsets(op="floor").round_lengths(op="ceil")
+    win = Window(
+        win.col_off - buffer,
+        win.row_off - buffer,
+        win.width + 2 * buffer,
+        win.height + 2 * buffer,
+    )
+    return {
+        "crs": crs,
+        "transform": window_transform(win, transform),
+        "width": int(win.width),
+        "height": int(win.height),
+    }
+
+
+def grid_vrt(src, grid, nodata):
+    """
+    Nearest-neighbour `WarpedVRT` of `src` on a `mosaic_grid`; GDAL only
+    reads the source blocks that overlap it (or the window read from it).
+    """
+    return WarpedVRT(
+        src,
+        crs=grid["crs"],
+        transform=grid["transform"],
+        width=grid["width"],
+        height=grid["height"],
+        src_nodata=nodata,
+        nodata=nodata,
+        resampling=Resampling.nearest,
+    )
+
+
+def _warped_read(src, grid, nodata):
+    with grid_vrt(src, grid, nodata) as vrt:
+        return vrt.read(1)
+
+
+# --------------------------
+# Virtual mosaic reads
+# --------------------------
+def read_mosaic(records, grid, qa_mask=False, reject_bits=QA_REJECT_BITS):
+    """
+    Composite the red, NIR, SWIR and thermal bands of `records` on `grid`,
+    warping each scene on the fly (no intermediate rasters). Pixels come
+    from the first scene, in `records` order, that has data there (and,
+    with `qa_mask`, is clear in QA_PIXEL), so all bands of a pixel come
+    from the same scene.
+
+    Returns the four float64 band arrays (NaN where no scene contributes)
+    and the boolean mask of filled pixels.
+    """
+    shape = (grid["height"], grid["width"])
+    bands = [np.full(shape, np.nan) for _ in MOSAIC_BANDS]
+    filled = np.zeros(shape, dtype=bool)
+
+    for record in records:
+        with ExitStack() as stack:
+            srcs = [stack.enter_context(rasterio.open(record[b])) for b in MOSAIC_BANDS]
+            nodata = srcs[0].nodata if srcs[0].nodata is not None else 0
+            red = _warped_read(srcs[0], grid, nodata)
+            take = (red != nodata) & ~filled
+            if qa_mask:
+                if record["qa"] is None:
+                    raise FileNotFoundError(f"No QA_PIXEL band in {record['folder']}")
+                with rasterio.open(record["qa"]) as qa_src:
+                    qa = _warped_read(qa_src, grid, QA_FILL)
+                take &= qa_valid(qa, reject_bits)
+            if not take.any():
+                continue
+
+            bands[0][take] = red[take]
+            for out, src in zip(bands[1:], srcs[1:]):
+                band_nodata = src.nodata if src.nodata is not None else 0
+                out[take] = _warped_read(src, grid, band_nodata)[take]
+            filled |= take
+    return bands, filled
+
+
+def process_mosaic(
+    records, aoi_geojson, qa_mask=False, distributions=False, reject_bits=QA_REJECT_BITS
+):
+    """
+    AOI statistics of one virtual mosaic (a group from
+    `group_mosaic_scenes`), as a `scene_row` dated by its first scene, with
+    the number of scenes and the filled share of the AOI.
+    """
+    grid = mosaic_grid(records, aoi_geojson)
+    bands, filled = read_mosaic(records, grid, qa_mask, reject_bits)
+
+    geojson_grid = json.loads(reproject_aoi(aoi_geojson, grid["crs"]).to_json())
+    in_aoi = aoi_mask(geojson_grid, grid)
+    mask = in_aoi & filled
+
+    stack = index_stack(*(band[mask] for band in bands))
+    stats = stats_dict(*masked_stats(stack))
+    histograms = None
+    if distributions:
+        histograms = IndexHistograms()
+        histograms.update(stack)
+
+    first_date = min(date.fromisoformat(r["date"]) for r in records)
+    row = scene_row(first_date, *(stats[name] for name in INDEX_NAMES))
+    row["n_scenes"] = len(records)
+    n_aoi = int(in_aoi.sum())
+    row["valid_fraction"] = int(mask.sum()) / n_aoi if n_aoi else 0.0
+    return add_distributions(row, histograms)
+
+
+def build_mosaic_timeseries(
+    catalog,
+    aoi_geojson,
+    data_root=None,
+    scene_filter=None,
+    max_days=MOSAIC_MAX_DAYS,
+    qa_mask=False,
+    distributions=False,
+):
+    """
+    Time series for AOIs spanning several WRS path/rows: the catalog scenes
+    intersecting the AOI (plus `scene_filter`, see `SceneCatalog.query`) are
+    grouped into near-date mosaics (`group_mosaic_scenes`), each mosaic is
+    warped onto one common grid in memory and reduced like a single scene.
+    `data_root`, when given, refreshes the catalog first.
+
+    Rows have the `build_timeseries` columns plus `n_scenes` and
+    `valid_fraction`; `year` / `scene` are the year and month name of the
+    mosaic date.
+    """
+    if data_root is not None:
+        catalog.refresh(data_root)
+    filters = dict(scene_filter or {})
+    filters["aoi_geojson"] = aoi_geojson
+    records = catalog.query(**filters)
+
+    rows = []
+    for group in group_mosaic_scenes(records, max_days):
+        row = process_mosaic(group, aoi_geojson, qa_mask, distributions)
+        row["year"] = str(row["date"].year)
+        row["scene"] = calendar.month_name[row["date"].month]
+        rows.append(row)
+
+    if not rows:
+        return pd.DataFrame()
+    df = pd.DataFrame(rows).dropna().sort_values("date").reset_index(drop=True)
+    return df
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+import rasterio
+from rasterio.features import rasterize
+
+from Extraction.aoi import AOIMaskCache
+from Extraction.bands import find_band_files, read_bands, scene_files
+from Extraction.indices import INDEX_NAMES, STAT_COLUMNS
+from Extraction.pipeline import discover_scene_folders, scene_date_from_filename
+from Extraction.stats import index_stack
+
+
+def feature_ids(aoi_geojson, id_field=None):
+    """
+    AOI id of every feature: `properties[id_field]` when given, else the
+    feature `id`, else its position in the collection.
+    """
+    ids = []
+    for i, feat in enumerate(aoi_geojson["features"]):
+        if id_field is not None:
+            ids.append(feat["properties"][id_field])
+        else:
+            ids.append(feat.get("id", i))
+    return ids
+
+
+# --------------------------
+# AOI label grid
+# --------------------------
+class AOILabelCache(AOIMaskCache):
+    """
+    `AOIMaskCache` variant whose `mask` is an int32 label grid: pixel value
+    i + 1 for the i-th AOI feature and 0 outside every AOI. The read window
+    covers the union of all features. Features are expected not to overlap
+    (wards, watersheds); where they do, the later feature wins.
+    """
+
+    kind = "labels"
+
+    def _encode(self, geojson_utm, grid):
+        shapes = (
+            (feat["geometry"], i + 1) for i, feat in enumerate(geojson_utm["features"])
+        )
+        return rasterize(
+            shapes,
+            out_shape=(grid["height"], grid["width"]),
+            transform=grid["transform"],
+            fill=0,
+            dtype="int32",
+        )
+
+    def _decode(self, entry, unpack):
+        return entry["mask"]
+
+
+DEFAULT_LABEL_CACHE = AOILabelCache()
+
+
+def label_index_stats(red, nir, swir, b10, labels, n_labels):
+    """
+    Per-label mean/std/count of NDVI, NDWI, NDBI and LST in one pass over the
+    labelled pixels, using `np.bincount` sums. Returns three
+    (n_indices, n_labels) arrays; column i holds the i-th AOI feature.
+    """
+    inside = labels > 0
+    lab = labels[inside] - 1
+    stack = index_stack(red[inside], nir[inside], swir[inside], b10[inside])
+
+    mean = np.empty((len(INDEX_NAMES), n_labels))
+    std = np.empty((len(INDEX_NAMES), n_labels))
+    count = np.empty((len(INDEX_NAMES), n_labels), dtype=np.int64)
+    for k, values in enumerate(stack):
+        valid = np.isfinite(values)
+        lk, vk = lab[valid], values[valid]
+        n = np.bincount(lk, minlength=n_labels)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean[k] = np.bincount(lk, weights=vk, minlength=n_labels) / n
+            dev = vk - mean[k][lk]
+            std[k] = np.sqrt(np.bincount(lk, weights=dev * dev, minlength=n_labels) / n)
+        count[k] = n
+    return mean, std, count
+
+
+# Process one scene folder for every AOI feature at once
+def process_scene_folder_multi(
+    scene_folder, aoi_geojson, id_field=None, label_cache=None
+):
+    """
+    Read the bands once over the window covering all AOI features and return
+    one row per feature (long format, keyed by `aoi_id`).
+    """
+    files = scene_files(scene_folder)
+    names = find_band_files(scene_folder, files)
+    paths = [files[n] for n in names]
+
+    with rasterio.open(paths[0]) as src:
+        aoi_grid = (label_cache or DEFAULT_LABEL_CACHE).get(
+            aoi_geojson, src.crs, src.transform, src.shape
+        )
+    if not aoi_grid["mask"].any():
+        return []
+    red, nir, swir, b10 = (arr for arr, _ in read_bands(paths, aoi_grid["window"]))
+
+    ids = feature_ids(aoi_geojson, id_field)
+    mean, std, count = label_index_stats(
+        red, nir, swir, b10, aoi_grid["mask"], len(ids)
+    )
+
+    scene_date = scene_date_from_filename(names[0])
+    rows = []
+    for i, aoi_id in enumerate(ids):
+        row = {"date": scene_date, "aoi_id": aoi_id}
+        for k, name in enumerate(INDEX_NAMES):
+            mean_col, std_col = STAT_COLUMNS[name]
+            row[mean_col] = mean[k, i]
+            row[std_col] = std[k, i]
+        row["count"] = int(count[0, i])
+        rows.append(row)
+    return rows
+
+
+# Build a long-format (date, aoi_id) time series for all scenes and AOI features
+def build_multi_aoi_timeseries(data_root, aoi_geojson, id_field=None, label_cache=None):
+    rows = []
+    for year, month, mpath in discover_scene_folders(data_root):
+        try:
+            scene_rows = process_scene_folder_multi(
+                mpath, aoi_geojson, id_field=id_field, label_cache=label_cache
+            )
+        except StopIteration:
+            continue
+        for r in scene_rows:
+            r["year"] = year
+            r["scene"] = month
+        rows.extend(scene_rows)
+
+    df = (
+        pd.DataFrame(rows)
+        .dropna()
+        .sort_values(["date", "aoi_id"], kind="stable")
+        .reset_index(drop=True)
+    )
+    return df
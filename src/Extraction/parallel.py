@@ -0,0 +1,60 @@
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from itertools import islice
+
+
+# --------------------------
+# Bounded process-pool map
+# --------------------------
+def bounded_process_map(
+    fn, items, workers, max_in_flight=None, initializer=None, initargs=()
+):
+    """
+    Run `fn(item)` for every item on a ProcessPoolExecutor with `workers`
+    processes, keeping at most `max_in_flight` tasks submitted at once
+    (defaults to 2 per worker) so only that many scenes are ever held in
+    memory. Results are returned in the order of `items`, regardless of the
+    order in which the tasks finish.
+    """
+    items = list(items)
+    max_in_flight = max_in_flight or 2 * workers
+    results = [None] * len(items)
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=initializer, initargs=initargs
+    ) as pool:
+        pending = {}
+        next_idx = 0
+        while next_idx < len(items) or pending:
+            while next_idx < len(items) and len(pending) < max_in_flight:
+                pending[pool.submit(fn, items[next_idx])] = next_idx
+                next_idx += 1
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                results[pending.pop(fut)] = fut.result()
+    return results
+
+
+# --------------------------
+# Read-ahead of the next items
+# --------------------------
+def prefetched(load, items, depth=1):
+    """
+    Yield a future of `load(item)` for every item, in order, while a
+    background thread already loads up to `depth` items ahead. The caller
+    works on one result (e.g. reduces a scene) while the next ones are read,
+    so I/O and compute overlap; `depth=0` loads each item only when it is
+    reached. Errors of `load` are raised by the future's `result()`.
+    """
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        queue = deque(pool.submit(load, item) for item in islice(items, depth + 1))
+        while queue:
+            yield queue.popleft()
+            for item in islice(items, 1):
+                queue.append(pool.submit(load, item))
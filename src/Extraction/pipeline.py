@@ -0,0 +1,586 @@
+import os
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+import rasterio
+
+from Extraction.aoi import AOIMaskCache
+from Extraction.bands import (
+    BAND_READ_THREADS,
+    find_band_files,
+    read_bands,
+    scene_date_from_filename,
+    scene_files,
+)
+from Extraction.distributions import (
+    IndexHistograms,
+    histograms_path,
+    load_histograms,
+    outside_column,
+    save_timeseries,
+)
+from Extraction.export import scene_id_from_filename, write_index_cogs
+from Extraction.indices import compute_lst, compute_ndbi, compute_ndvi, compute_ndwi
+from Extraction.parallel import bounded_process_map, prefetched
+from Extraction.profiling import StageProfiler, stage
+from Extraction.qa import (
+    MIN_VALID_FRACTION,
+    QA_REJECT_BITS,
+    find_qa_file,
+    read_qa_valid,
+    valid_fraction,
+)
+from Extraction.scene_cache import SceneResultCache, scene_fingerprint
+from Extraction.stats import (
+    INDEX_NAMES,
+    index_stack,
+    masked_stats,
+    mean_index_in_aoi,
+    stats_dict,
+)
+from Extraction.streaming import stream_index_stats, stream_valid_fraction
+
+# Shared across scenes; every scene of one path/row reuses one AOI mask
+DEFAULT_MASK_CACHE = AOIMaskCache()
+
+
+# --------------------------
+# Extraction options
+# --------------------------
+@dataclass
+class ExtractionOptions:
+    """
+    How scenes are read and reduced, passed as one `options` object through
+    `build_timeseries`, `process_scene_folder` and `load_scene` (which also
+    take any field as a keyword override, e.g.
+    `build_timeseries(root, aoi, distributions=True)`).
+
+    Reads:
+    - windowed: read only the window around the reprojected AOI bounds
+    - streaming: never load the bands whole; accumulate the statistics block
+      by block (`stream_index_stats`), bounding peak memory by the block size
+    - read_threads: threads reading the four band windows of a scene
+    - prefetch: a serial run loads the next scene while the current one is
+      reduced, holding one extra scene window in memory
+
+    Screening and reduction:
+    - qa_mask: decode QA_PIXEL first; scenes whose clear share of the AOI is
+      below `min_valid_fraction` are skipped without reading another band,
+      and pixels flagged with `reject_bits` (fill, cloud, cirrus, shadow) are
+      left out of the statistics. Rows then have a `valid_fraction`.
+    - fused: stack all indices and reduce them in one pass against one AOI
+      mask; False keeps the per-index zonal_stats path
+    - distributions: rows also carry the p5/p25/p50/p75/p95 percentiles and
+      fixed-bin histogram of every index (see `IndexHistograms`)
+    - cog_dir: also write the AOI-clipped index rasters there as COGs (see
+      `write_index_cogs`); needs the in-memory path (streaming=False)
+
+    Process pool:
+    - workers: > 1 spreads the scenes over that many processes, with at most
+      `max_in_flight` queued at once (see `bounded_process_map`), each retried
+      `retries` times by its worker
+    """
+
+    windowed: bool = True
+    streaming: bool = False
+    read_threads: int = BAND_READ_THREADS
+    prefetch: bool = True
+    qa_mask: bool = False
+    min_valid_fraction: float = MIN_VALID_FRACTION
+    reject_bits: int = QA_REJECT_BITS
+    fused: bool = True
+    distributions: bool = False
+    cog_dir: str = None
+    workers: int = None
+    max_in_flight: int = None
+    retries: int = 1
+
+    def cache_options(self):
+        """
+        The options that change a scene's result, for `scene_fingerprint`:
+        None without QA screening, so unscreened fingerprints stay stable.
+        """
+        if not self.qa_mask:
+            return None
+        options = {"qa_mask": True, "min_valid_fraction": self.min_valid_fraction}
+        if self.reject_bits != QA_REJECT_BITS:
+            options["reject_bits"] = self.reject_bits
+        return options
+
+
+def extraction_options(options=None, **overrides):
+    """`options` (default `ExtractionOptions()`) with the given fields replaced."""
+    options = options or ExtractionOptions()
+    return replace(options, **overrides) if overrides else options
+
+
+# --------------------------
+# Scene I/O stage
+# --------------------------
+def load_scene(
+    scene_folder,
+    aoi_geojson,
+    options=None,
+    mask_cache=None,
+    band_paths=None,
+    qa_path=None,
+    **overrides,
+):
+    """
+    The I/O half of `process_scene_folder`: locate the band files, fetch the
+    AOI grid, screen the scene with QA_PIXEL (with `options.qa_mask`) and
+    read the four band windows. Returns a dict for
+    `process_scene_folder(..., loaded=...)`, or None when the scene holds no
+    AOI pixel or the QA screening rejects it. With `options.streaming` the bands are not read here;
+    they are read block by block during the reduction.
+    """
+    options = extraction_options(options, **overrides)
+    qa_mask = options.qa_mask
+
+    # find band files
+    if band_paths is None or (qa_mask and qa_path is None):
+        files = scene_files(scene_folder)
+    if band_paths is None:
+        band_paths = [files[b] for b in find_band_files(scene_folder, files)]
+    paths = list(band_paths)
+    if qa_mask and qa_path is None:
+        qa_name = find_qa_file(scene_folder, files)
+        if qa_name is None:
+            raise FileNotFoundError(f"No QA_PIXEL band in {scene_folder}")
+        qa_path = files[qa_name]
+
+    # AOI geometry, read window and mask for this scene grid (cached per path/row)
+    with rasterio.open(paths[0]) as src:
+        aoi_grid = (mask_cache or DEFAULT_MASK_CACHE).get(
+            aoi_geojson,
+            src.crs,
+            src.transform,
+            src.shape,
+            windowed=options.windowed,
+            unpack=not options.streaming,
+        )
+    # scenes whose grid holds no AOI pixel (another path/row) are skipped,
+    # like scenes rejected by the QA screening
+    if not aoi_grid["mask"].any():
+        return None
+
+    loaded = {
+        "paths": paths,
+        "aoi_grid": aoi_grid,
+        "qa_path": qa_path if qa_mask else None,
+        "clear": None,
+        "mask": aoi_grid["mask"],
+    }
+
+    # cloud / shadow / fill screening from QA_PIXEL before the science bands
+    if qa_mask and options.streaming:
+        loaded["clear"] = stream_valid_fraction(
+            qa_path, aoi_grid["window"], aoi_grid["mask"], options.reject_bits
+        )
+    elif qa_mask:
+        valid = read_qa_valid(qa_path, aoi_grid["window"], options.reject_bits)
+        loaded["clear"] = valid_fraction(valid, aoi_grid["mask"])
+        loaded["valid"] = valid
+        loaded["mask"] = aoi_grid["mask"] & valid
+    if qa_mask and loaded["clear"] < options.min_valid_fraction:
+        return None
+
+    # read bands (concurrently; GDAL releases the GIL while reading)
+    if not options.streaming:
+        window = aoi_grid["window"] if options.windowed else None
+        loaded["bands"] = read_bands(paths, window, threads=options.read_threads)
+    return loaded
+
+
+# Process a single satellite scene folder to compute NDVI, NDWI, NDBI, LST and their statistics over the AOI
+def process_scene_folder(
+    scene_folder,
+    aoi_geojson,
+    options=None,
+    mask_cache=None,
+    band_paths=None,
+    qa_path=None,
+    loaded=None,
+    profiler=None,
+    **overrides,
+):
+    """
+    `scene_folder` is an extracted scene folder, a folder holding the
+    scene's USGS .tar bundle, or the .tar itself; bundled bands are read in
+    place through GDAL `/vsitar/` paths, so windowed reads only fetch the AOI
+    blocks from the archive (see `scene_files`).
+    `options` (`ExtractionOptions`, or keyword overrides of its fields)
+    select windowed / streaming reads, QA screening, the fused or zonal_stats
+    reduction, distributions and COG export; a scene without AOI pixels or
+    rejected by the QA screening returns None.
+    `band_paths` are the (red, nir, swir, thermal) files of the scene, e.g.
+    from a `SceneCatalog` row, and `qa_path` its QA_PIXEL file; when omitted
+    they are found with one listing of `scene_folder`.
+    The reprojected AOI, window and mask come from `mask_cache` (an
+    `AOIMaskCache`, `DEFAULT_MASK_CACHE` when omitted).
+    `loaded` is the output of an earlier `load_scene` call for this scene
+    (e.g. prefetched while the previous scene was reduced); the I/O
+    arguments are then not used.
+    With a `profiler` (`StageProfiler`) the read, compute, reduce and write
+    stages of the scene are timed.
+    """
+    options = extraction_options(options, **overrides)
+    if options.streaming and options.cog_dir:
+        raise ValueError("cog_dir requires the in-memory path (streaming=False)")
+
+    if loaded is None:
+        with stage(profiler, "read", scene_folder):
+            loaded = load_scene(
+                scene_folder,
+                aoi_geojson,
+                options,
+                mask_cache=mask_cache,
+                band_paths=band_paths,
+                qa_path=qa_path,
+            )
+        if loaded is None:
+            return None
+    paths, aoi_grid, clear = loaded["paths"], loaded["aoi_grid"], loaded["clear"]
+    b4 = os.path.basename(paths[0])
+    aoi_geojson_utm = aoi_grid["geojson"]
+    scene_date = scene_date_from_filename(b4)
+    histograms = IndexHistograms() if options.distributions else None
+
+    if "bands" not in loaded:
+        with stage(profiler, "stream", scene_folder):
+            stats = stream_index_stats(
+                paths,
+                aoi_grid["window"],
+                aoi_grid["mask"],
+                histograms,
+                qa_path=loaded["qa_path"],
+                reject_bits=options.reject_bits,
+            )
+        row = scene_row(scene_date, *(stats[name] for name in INDEX_NAMES))
+        if clear is not None:
+            row["valid_fraction"] = clear
+        return add_distributions(row, histograms)
+
+    mask = loaded["mask"]
+    (b4_arr, prof), (b5_arr, _), (b6_arr, _), (b10_arr, _) = loaded["bands"]
+
+    if options.fused or options.cog_dir:
+        # one cached AOI mask and one masked pass for all indices; the AOI
+        # pixel stack feeds the moments, the histograms and the COGs
+        with stage(profiler, "compute", scene_folder):
+            stack = index_stack(b4_arr[mask], b5_arr[mask], b6_arr[mask], b10_arr[mask])
+
+    if options.cog_dir:
+        with stage(profiler, "write", scene_folder):
+            write_index_cogs(
+                stack, mask, prof, options.cog_dir, scene_id_from_filename(b4)
+            )
+
+    if options.fused:
+        with stage(profiler, "reduce", scene_folder):
+            stats = stats_dict(*masked_stats(stack))
+            if histograms is not None:
+                histograms.update(stack)
+        ndvi_stats, ndwi_stats, ndbi_stats, lst_stats = (
+            stats[name] for name in INDEX_NAMES
+        )
+    else:
+        # compute indices
+        with stage(profiler, "compute", scene_folder):
+            ndvi = compute_ndvi(b5_arr, b4_arr)
+            ndwi = compute_ndwi(b5_arr, b6_arr)
+            ndbi = compute_ndbi(b6_arr, b5_arr)
+            lst_c = compute_lst(b10_arr)
+            if "valid" in loaded:
+                for index_arr in (ndvi, ndwi, ndbi, lst_c):
+                    index_arr[~loaded["valid"]] = np.nan
+
+        # compute stats
+        with stage(profiler, "reduce", scene_folder):
+            ndvi_stats = mean_index_in_aoi(ndvi, prof, aoi_geojson_utm)
+            ndwi_stats = mean_index_in_aoi(ndwi, prof, aoi_geojson_utm)
+            ndbi_stats = mean_index_in_aoi(ndbi, prof, aoi_geojson_utm)
+            lst_stats = mean_index_in_aoi(lst_c, prof, aoi_geojson_utm)
+
+            if histograms is not None:
+                histograms.update([ndvi[mask], ndwi[mask], ndbi[mask], lst_c[mask]])
+
+    row = scene_row(scene_date, ndvi_stats, ndwi_stats, ndbi_stats, lst_stats)
+    if clear is not None:
+        row["valid_fraction"] = clear
+    return add_distributions(row, histograms)
+
+
+# One CSV row from the per-index AOI statistics of a scene
+def scene_row(scene_date, ndvi_stats, ndwi_stats, ndbi_stats, lst_stats):
+    return {
+        "date": scene_date,
+        "NDVI_mean": ndvi_stats["mean"],
+        "NDVI_std": ndvi_stats["std"],
+        "NDWI_mean": ndwi_stats["mean"],
+        "NDWI_std": ndwi_stats["std"],
+        "NDBI_mean": ndbi_stats["mean"],
+        "NDBI_std": ndbi_stats["std"],
+        "LST_mean_C": lst_stats["mean"],
+        "LST_std_C": lst_stats["std"],
+        "count": ndvi_stats["count"],  # single count column
+    }
+
+
+# Append the percentile / histogram columns of a scene, if they were collected
+def add_distributions(row, histograms):
+    if histograms is not None:
+        row.update(histograms.row_fields())
+    return row
+
+
+# Walk the data/<year>/<month> tree and list the scene folders in it
+def discover_scene_folders(data_root):
+    folders = []
+    for year in os.listdir(data_root):
+        ypath = os.path.join(data_root, year)
+        if not os.path.isdir(ypath):
+            continue
+        for month in os.listdir(ypath):
+            mpath = os.path.join(ypath, month)
+            if not os.path.isdir(mpath):
+                continue
+            folders.append((year, month, mpath))
+    return folders
+
+
+# --------------------------
+# Parallel scene processing
+# --------------------------
+def _init_scene_worker(mask_cache_dir):
+    # each worker process keeps its own in-memory mask LRU over a shared disk store
+    DEFAULT_MASK_CACHE.cache_dir = mask_cache_dir
+
+
+def process_scene_task(task):
+    """
+    Process-pool entry point. `task` is (scene_folder, aoi_geojson, options,
+    band_paths, qa_path, profile); failures are retried in the worker up to
+    `options.retries` times before the last error is raised. Folders with
+    missing bands give a None row. Returns (row, profile records): with
+    `profile` the worker times the scene's stages with its own
+    `StageProfiler`, so the records carry the worker's I/O and RSS;
+    otherwise the records are empty.
+    """
+    scene_folder, aoi_geojson, options, band_paths, qa_path, profile = task
+    profiler = StageProfiler() if profile else None
+    for attempt in range(options.retries + 1):
+        try:
+            row = process_scene_folder(
+                scene_folder,
+                aoi_geojson,
+                options,
+                band_paths=band_paths,
+                qa_path=qa_path,
+                profiler=profiler,
+            )
+            break
+        except StopIteration:
+            row = None
+            break
+        except Exception:
+            if attempt == options.retries:
+                raise
+    return row, profiler.records if profiler else []
+
+
+# Build timeseries for all scenes
+def build_timeseries(
+    data_root,
+    aoi_geojson,
+    options=None,
+    mask_cache=None,
+    result_cache=None,
+    catalog=None,
+    scene_filter=None,
+    refresh_catalog=False,
+    profiler=None,
+    **overrides,
+):
+    """
+    One row per scene folder under `data_root`, processed with `options`
+    (`ExtractionOptions`, or keyword overrides of its fields, e.g.
+    `build_timeseries(root, aoi, workers=4, qa_mask=True)`); see
+    `process_scene_folder`.
+
+    With a `catalog` (`SceneCatalog`) the scenes to process are selected by
+    an indexed catalog query with the `scene_filter` keyword arguments (see
+    `SceneCatalog.query`, e.g. {"years": [2023], "max_cloud": 20}) instead of
+    listing every folder. The folders are not visited unless
+    `refresh_catalog` is set: the catalog is then synced with `data_root`
+    first, which stats every scene file but re-reads only new or modified
+    folders.
+
+    With `options.workers` > 1 the scene folders are spread over a process
+    pool. Rows keep the folder discovery order before the final sort, so
+    serial and parallel runs produce the same DataFrame; serial runs overlap
+    the next scene's reads with the current reduction (`options.prefetch`),
+    process-pool runs already overlap I/O and compute across workers.
+
+    With a `result_cache` (`SceneResultCache`) only scenes whose fingerprint is
+    not cached yet are processed; all other rows come from the cache.
+
+    With a `profiler` (`StageProfiler`) the discover stage and the read,
+    compute, reduce and write stages of every scene are recorded; scenes are
+    then loaded one at a time (no prefetch) so the process counters of each
+    stage are its own. In process-pool runs every worker profiles its scenes
+    and the records are merged into `profiler`, next to one "process" stage
+    for the pool's wall time.
+    """
+    options = extraction_options(options, **overrides)
+    with stage(profiler, "discover"):
+        if catalog is not None:
+            if refresh_catalog:
+                catalog.refresh(data_root)
+            records = catalog.query(**(scene_filter or {}))
+            folders = [(r["year"], r["scene"], r["folder"]) for r in records]
+            bands = [catalog.band_paths(r) for r in records]
+            qa_paths = [r["qa"] for r in records]
+        else:
+            folders = discover_scene_folders(data_root)
+            bands = [None] * len(folders)
+            qa_paths = [None] * len(folders)
+
+    results = [None] * len(folders)
+    todo = list(range(len(folders)))
+    if result_cache is not None:
+        # QA screening changes the results, so it is part of the cache key
+        cache_options = options.cache_options()
+        with stage(profiler, "discover"):
+            fingerprints = [
+                scene_fingerprint(mpath, aoi_geojson, cache_options)
+                for _, _, mpath in folders
+            ]
+        todo = []
+        for i, fp in enumerate(fingerprints):
+            cached = fp in result_cache
+            row = result_cache.get(fp) if cached else None
+            # rows cached without distributions (or without the out-of-range
+            # counts) are reprocessed when they are asked for
+            stale = options.distributions and row and outside_column("NDVI") not in row
+            if cached and not stale:
+                results[i] = row
+            else:
+                todo.append(i)
+
+    if options.workers and options.workers > 1 and todo:
+        cache_dir = mask_cache.cache_dir if mask_cache else None
+        with stage(profiler, "process"):
+            processed = bounded_process_map(
+                process_scene_task,
+                [
+                    (
+                        folders[i][2],
+                        aoi_geojson,
+                        options,
+                        bands[i],
+                        qa_paths[i],
+                        profiler is not None,
+                    )
+                    for i in todo
+                ],
+                options.workers,
+                max_in_flight=options.max_in_flight,
+                initializer=_init_scene_worker,
+                initargs=(cache_dir,),
+            )
+        if profiler is not None:
+            for _, records in processed:
+                profiler.extend(records)
+        processed = [row for row, _ in processed]
+    else:
+
+        def load(i):
+            try:
+                with stage(profiler, "read", folders[i][2]):
+                    return load_scene(
+                        folders[i][2],
+                        aoi_geojson,
+                        options,
+                        mask_cache=mask_cache,
+                        band_paths=bands[i],
+                        qa_path=qa_paths[i],
+                    )
+            except StopIteration:
+                return None
+
+        processed = []
+        depth = int(options.prefetch and profiler is None)
+        for i, future in zip(todo, prefetched(load, todo, depth=depth)):
+            loaded = future.result()
+            if loaded is None:
+                processed.append(None)
+                continue
+            processed.append(
+                process_scene_folder(
+                    folders[i][2],
+                    aoi_geojson,
+                    options,
+                    loaded=loaded,
+                    profiler=profiler,
+                )
+            )
+
+    for i, r in zip(todo, processed):
+        results[i] = r
+        if result_cache is not None:
+            result_cache.put(fingerprints[i], r)
+
+    rows = []
+    for (year, month, _), r in zip(folders, results):
+        if r is None:
+            continue
+        r = dict(r)
+        r["year"] = year
+        r["scene"] = month
+        rows.append(r)
+
+    df = pd.DataFrame(rows).dropna().sort_values("date").reset_index(drop=True)
+    return df
+
+
+# --------------------------
+# Incremental extraction
+# --------------------------
+def update_timeseries(data_root, aoi_geojson, output_csv, cache_dir, **kwargs):
+    """
+    Incrementally refresh `output_csv`: only new or changed scene folders are
+    processed (see `SceneResultCache`; `kwargs` go to `build_timeseries`,
+    e.g. `options=` and `profiler=`), and the resulting rows replace or extend
+    the existing CSV rows with the same (year, scene). Rows of scenes whose raw
+    bands are no longer on disk are kept, with their stored histograms.
+    """
+    df = build_timeseries(
+        data_root, aoi_geojson, result_cache=SceneResultCache(cache_dir), **kwargs
+    )
+    profiler = kwargs.get("profiler")
+
+    if os.path.exists(output_csv):
+        existing = pd.read_csv(output_csv)
+        existing["date"] = pd.to_datetime(existing["date"]).dt.date
+        existing["year"] = existing["year"].astype(str)
+        hist_file = histograms_path(output_csv)
+        if os.path.exists(hist_file):
+            hists, _ = load_histograms(hist_file)
+            existing = existing.merge(
+                hists.drop(columns="date"), on=["year", "scene"], how="left"
+            )
+        current = set(zip(df["year"].astype(str), df["scene"]))
+        keep = [
+            (y, s) not in current for y, s in zip(existing["year"], existing["scene"])
+        ]
+        df = (
+            pd.concat([existing[keep], df], ignore_index=True)
+            .sort_values("date")
+            .reset_index(drop=True)
+        )
+
+    with stage(profiler, "write"):
+        save_timeseries(df, output_csv)
+    return df
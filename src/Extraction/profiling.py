@@ -0,0 +1,198 @@
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # not available on Windows; peak RSS is then not recorded
+    resource = None
+
+# Stages of an extraction run, in pipeline order ("stream" is the block-wise
+# read + reduce of streaming runs, "process" a whole process-pool run, "tiles"
+# the optional overlay tile rendering). The workers' own stages are recorded
+# too; "process" I/O also counts them, as Linux folds the I/O of reaped
+# worker processes into the parent's counters.
+STAGES = (
+    "discover",
+    "read",
+    "compute",
+    "reduce",
+    "stream",
+    "process",
+    "write",
+    "tiles",
+)
+
+
+# --------------------------
+# Process counters (Linux /proc, getrusage elsewhere)
+# --------------------------
+def io_counters():
+    """
+    (bytes fetched from storage, bytes passed through read syscalls) from
+    /proc/self/io (`read_bytes`, `rchar`), or (None, None) where it is not
+    available. The second includes page-cache hits, i.e. what GDAL asked
+    for, so it stays high on a warm cache while the first drops to zero.
+    """
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return int(fields["read_bytes"]), int(fields["rchar"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def reset_peak_rss():
+    """Reset the process's peak RSS mark (Linux); False when not supported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss():
+    """Peak resident set size in bytes since start or the last reset, or None."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    # ru_maxrss is in kB on Linux, bytes on macOS
+    scale = 1 if os.uname().sysname == "Darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _delta(after, before):
+    return None if after is None or before is None else after - before
+
+
+# --------------------------
+# Per-stage / per-scene profile
+# --------------------------
+class StageProfiler:
+    """
+    Wall time, bytes read and peak RSS of every pipeline stage (see
+    `STAGES`), per scene. Pass one to `build_timeseries(..., profiler=...)`.
+
+    `storage_bytes_read` counts what the process fetched from storage,
+    `syscall_bytes_read` everything its read syscalls returned, page-cache
+    hits included (see `io_counters`). Counters are process-wide, so
+    profiled runs process the scenes one at a time (no prefetch);
+    `peak_rss_bytes` is the peak within the stage where the kernel allows
+    resetting it, else the process high-water mark. Process-pool workers
+    profile their own scenes and the records are merged (see `extend`),
+    tagged with the worker's `pid`.
+    """
+
+    COLUMNS = [
+        "stage",
+        "scene",
+        "pid",
+        "wall_s",
+        "storage_bytes_read",
+        "syscall_bytes_read",
+        "peak_rss_bytes",
+    ]
+
+    def __init__(self):
+        self.records = []
+        self.start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, scene=None):
+        reset_peak_rss()
+        storage, syscall = io_counters()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - t0
+            storage_end, syscall_end = io_counters()
+            self.records.append(
+                {
+                    "stage": name,
+                    "scene": scene,
+                    "pid": os.getpid(),
+                    "wall_s": wall,
+                    "storage_bytes_read": _delta(storage_end, storage),
+                    "syscall_bytes_read": _delta(syscall_end, syscall),
+                    "peak_rss_bytes": peak_rss(),
+                }
+            )
+
+    def extend(self, records):
+        """Add records profiled elsewhere, e.g. returned by a pool worker."""
+        self.records.extend(records)
+
+    def to_frame(self):
+        return pd.DataFrame(self.records, columns=self.COLUMNS)
+
+    def _totals(self, df, by):
+        return df.groupby(by, sort=False).agg(
+            wall_s=("wall_s", "sum"),
+            storage_bytes_read=("storage_bytes_read", "sum"),
+            syscall_bytes_read=("syscall_bytes_read", "sum"),
+            peak_rss_bytes=("peak_rss_bytes", "max"),
+            calls=("wall_s", "size"),
+        )
+
+    def stage_totals(self):
+        """Totals per stage, in `STAGES` order."""
+        totals = self._totals(self.to_frame(), "stage")
+        return totals.reindex([s for s in STAGES if s in totals.index])
+
+    def scene_totals(self):
+        """Totals per scene, with one wall-time column per stage."""
+        df = self.to_frame().dropna(subset=["scene"])
+        totals = self._totals(df, "scene")
+        per_stage = df.pivot_table(
+            index="scene", columns="stage", values="wall_s", aggfunc="sum"
+        )
+        per_stage.columns = [f"{stage}_s" for stage in per_stage.columns]
+        return totals.join(per_stage)
+
+    def summary(self, **run_info):
+        """JSON-ready profile: run info, stage totals, scene totals, records."""
+
+        def rows(df):
+            return json.loads(df.reset_index().to_json(orient="records"))
+
+        # stage resets clear the process high-water mark, so take the max
+        peaks = [r["peak_rss_bytes"] for r in self.records] + [peak_rss()]
+        peaks = [p for p in peaks if p is not None]
+        return {
+            "run": {
+                **run_info,
+                "wall_s": time.perf_counter() - self.start,
+                "peak_rss_bytes": max(peaks) if peaks else None,
+            },
+            "stages": rows(self.stage_totals()),
+            "scenes": rows(self.scene_totals()),
+            "records": rows(self.to_frame()),
+        }
+
+    def write(self, path, **run_info):
+        """
+        Write the profile: `.json` gets `summary(**run_info)`, any other
+        extension the per-stage, per-scene records as CSV.
+        """
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump(self.summary(**run_info), f, indent=2)
+        else:
+            self.to_frame().to_csv(path, index=False)
+        return path
+
+
+def stage(profiler, name, scene=None):
+    """`profiler.stage(name, scene)`, or a no-op context without a profiler."""
+    return nullcontext() if profiler is None else profiler.stage(name, scene)
@@ -0,0 +1,55 @@
+from functools import lru_cache
+
+import numpy as np
+import rasterio
+
+from Extraction.bands import QA_MARKER, scene_files
+
+# Landsat Collection 2 QA_PIXEL bit flags
+QA_FILL = 1 << 0
+QA_DILATED_CLOUD = 1 << 1
+QA_CIRRUS = 1 << 2
+QA_CLOUD = 1 << 3
+QA_CLOUD_SHADOW = 1 << 4
+QA_SNOW = 1 << 5
+
+# Flags that make a pixel unusable for the index statistics
+QA_REJECT_BITS = QA_FILL | QA_DILATED_CLOUD | QA_CIRRUS | QA_CLOUD | QA_CLOUD_SHADOW
+
+# With QA screening on, scenes with a smaller clear share of the AOI are skipped
+MIN_VALID_FRACTION = 0.2
+
+
+def find_qa_file(scene_folder, names=None):
+    """File name of the QA_PIXEL band of a scene folder, or None."""
+    if names is None:
+        names = scene_files(scene_folder)
+    return next((n for n in names if QA_MARKER in n), None)
+
+
+@lru_cache(maxsize=None)
+def qa_lookup(reject_bits=QA_REJECT_BITS):
+    """
+    Boolean lookup table over every 16-bit QA_PIXEL value: True where none of
+    `reject_bits` is set.
+    """
+    return (np.arange(1 << 16, dtype=np.uint32) & reject_bits) == 0
+
+
+def qa_valid(qa, reject_bits=QA_REJECT_BITS):
+    """Valid-pixel mask of a QA_PIXEL array, decoded with one table lookup."""
+    return qa_lookup(reject_bits)[qa.astype(np.uint16, copy=False)]
+
+
+def read_qa_valid(qa_path, window, reject_bits=QA_REJECT_BITS):
+    """Valid-pixel mask over `window` of a QA_PIXEL raster."""
+    with rasterio.open(qa_path) as src:
+        return qa_valid(src.read(1, window=window), reject_bits)
+
+
+def valid_fraction(valid, aoi_mask):
+    """Share of the AOI pixels that are valid (0 when the AOI is empty)."""
+    n_aoi = int(np.count_nonzero(aoi_mask))
+    if n_aoi == 0:
+        return 0.0
+    return int(np.count_nonzero(valid & aoi_mask)) / n_aoi
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+from datetime import date
+
+from Extraction.aoi import aoi_id
+from Extraction.bands import BAND_MARKERS, QA_MARKER, local_file, scene_files
+
+
+def scene_fingerprint(scene_folder, aoi_geojson, options=None):
+    """
+    Content address of one scene's result: the names, sizes and mtimes of its
+    band files plus the AOI hash, and any result-changing processing
+    `options` (a JSON-serializable dict). Any change to a band file, the AOI
+    or the options gives a new fingerprint.
+    """
+    h = hashlib.sha1(aoi_id(aoi_geojson).encode())
+    markers = BAND_MARKERS
+    if options:
+        h.update(json.dumps(options, sort_keys=True).encode())
+        if options.get("qa_mask"):
+            markers = BAND_MARKERS + (QA_MARKER,)
+    for name, path in sorted(scene_files(scene_folder).items()):
+        if not any(marker in name for marker in markers):
+            continue
+        # members of a .tar bundle are covered by the archive's size and mtime
+        st = os.stat(local_file(path))
+        h.update(f"|{name}:{st.st_size}:{st.st_mtime_ns}".encode())
+    return h.hexdigest()
+
+
+# --------------------------
+# Per-scene result cache
+# --------------------------
+class SceneResultCache:
+    """
+    On-disk store of `process_scene_folder` results, one JSON file per scene
+    fingerprint under `cache_dir`. Scenes whose fingerprint is already stored
+    are not processed again. A stored `None` records a folder without the
+    required bands.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def _path(self, fingerprint):
+        return os.path.join(self.cache_dir, fingerprint + ".json")
+
+    def __contains__(self, fingerprint):
+        return os.path.exists(self._path(fingerprint))
+
+    def get(self, fingerprint):
+        with open(self._path(fingerprint)) as f:
+            row = json.load(f)["row"]
+        if row is not None and row["date"] is not None:
+            row["date"] = date.fromisoformat(row["date"])
+        return row
+
+    def put(self, fingerprint, row):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if row is not None:
+            row = dict(row)
+            if row["date"] is not None:
+                row["date"] = row["date"].isoformat()
+        path = self._path(fingerprint)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"row": row}, f)
+        os.replace(tmp, path)
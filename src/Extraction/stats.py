@@ -0,0 +1,125 @@
+import numpy as np
+from rasterio.features import geometry_mask
+from rasterstats import zonal_stats
+
+from Extraction.indices import INDEX_NAMES, compute_lst
+
+
+# Compute mean, standard deviation, and count of an index within a given AOI using zonal statistics
+def mean_index_in_aoi(index_arr, profile, aoi_geojson):
+    """
+    Compute mean, std, count over AOI using zonal_stats.
+    """
+    stats = zonal_stats(
+        aoi_geojson,
+        index_arr,
+        affine=profile["transform"],
+        stats=["mean", "std", "count"],
+        nodata=np.nan,
+    )
+    return stats[0]
+
+
+# --------------------------
+# Fused single-pass AOI statistics
+# --------------------------
+def aoi_mask(aoi_geojson, profile):
+    """
+    Rasterize the (first) AOI feature onto the raster grid described by
+    `profile`. Returns a boolean array that is True inside the AOI, using the
+    same pixel-centre rule as zonal_stats.
+    """
+    geom = aoi_geojson["features"][0]["geometry"]
+    return geometry_mask(
+        [geom],
+        out_shape=(profile["height"], profile["width"]),
+        transform=profile["transform"],
+        invert=True,
+    )
+
+
+def masked_stats(values):
+    """
+    Mean, std (population, as zonal_stats) and count of every row of a
+    (n_indices, n_pixels) array, ignoring non-finite values.
+    """
+    valid = np.isfinite(values)
+    count = valid.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(valid, values, 0.0).sum(axis=1) / count
+        dev = np.where(valid, values - mean[:, None], 0.0)
+        std = np.sqrt((dev * dev).sum(axis=1) / count)
+    return mean, std, count
+
+
+def index_stack(red, nir, swir, b10):
+    """
+    Stack NDVI, NDWI, NDBI and LST (rows, in `INDEX_NAMES` order) for 1-D
+    arrays of band values.
+
+    NDBI is the exact negation of NDWI (same NIR/SWIR bands), so it is derived
+    from NDWI instead of being recomputed.
+    """
+    stack = np.empty((len(INDEX_NAMES), red.size), dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(nir - red, nir + red, out=stack[0])
+        np.divide(nir - swir, nir + swir, out=stack[1])
+    np.negative(stack[1], out=stack[2])
+    stack[3] = compute_lst(b10)
+    return stack
+
+
+def fused_index_stats(red, nir, swir, b10, mask):
+    """
+    Compute NDVI, NDWI, NDBI and LST only for the pixels inside `mask` and
+    reduce them to mean/std/count in one stacked pass.
+    """
+    stack = index_stack(red[mask], nir[mask], swir[mask], b10[mask])
+    mean, std, count = masked_stats(stack)
+    return stats_dict(mean, std, count)
+
+
+def stats_dict(mean, std, count):
+    return {
+        name: {"mean": mean[i], "std": std[i], "count": int(count[i])}
+        for i, name in enumerate(INDEX_NAMES)
+    }
+
+
+# --------------------------
+# Streaming (block-wise) statistics
+# --------------------------
+class RunningStats:
+    """
+    Running count/mean/M2 accumulators for each row of an index stack.
+
+    Blocks are reduced on their own and merged with Chan et al.'s parallel
+    form of Welford's update, so the result equals a single pass over all
+    pixels while only one block is ever held in memory.
+    """
+
+    def __init__(self, n=len(INDEX_NAMES)):
+        self.count = np.zeros(n, dtype=np.int64)
+        self.mean = np.zeros(n, dtype=np.float64)
+        self.m2 = np.zeros(n, dtype=np.float64)
+
+    def update(self, values):
+        """Fold a (n, n_pixels) block of values (non-finite values ignored)."""
+        mean_b, std_b, count_b = masked_stats(values)
+        self.merge(count_b, np.nan_to_num(mean_b), np.nan_to_num(std_b**2 * count_b))
+
+    def merge(self, count_b, mean_b, m2_b):
+        count = self.count + count_b
+        with np.errstate(divide="ignore", invalid="ignore"):
+            delta = mean_b - self.mean
+            weight = np.where(count > 0, count_b / count, 0.0)
+            self.mean = self.mean + delta * weight
+            self.m2 = self.m2 + m2_b + delta**2 * self.count * weight
+        self.count = count
+
+    def result(self):
+        """Mean, std (population) and count, as returned by `masked_stats`."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(self.count > 0, self.mean, np.nan)
+            std = np.sqrt(self.m2 / self.count)
+        return mean, std, self.count
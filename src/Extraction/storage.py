@@ -0,0 +1,102 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# AOI label of single-AOI time series (multi-AOI rows carry their `aoi_id`)
+DEFAULT_AOI = "aoi"
+
+# Leading columns of the Parquet time series; rows are sorted by them and
+# written as one row group per (AOI, year), so readers can skip whole groups
+KEY_COLUMNS = ("aoi", "year", "date", "scene")
+
+# Typed columns; every other column is a float32 metric
+COLUMN_TYPES = {
+    "aoi": pa.dictionary(pa.int32(), pa.string()),
+    "year": pa.int16(),
+    "date": pa.date32(),
+    "scene": pa.dictionary(pa.int32(), pa.string()),
+    "count": pa.int32(),
+    "n_scenes": pa.int16(),
+}
+
+
+def parquet_path(output_csv):
+    """`data/all-landsat-data.csv` -> `data/all-landsat-data.parquet`."""
+    return os.path.splitext(output_csv)[0] + ".parquet"
+
+
+# --------------------------
+# Typed Arrow table
+# --------------------------
+def timeseries_table(df, aoi=DEFAULT_AOI):
+    """
+    Arrow table of a time series DataFrame with the typed schema: `aoi` and
+    `scene` dictionary-encoded, `year` int16, `date` date32, `count` int32,
+    `n_scenes` int16 and every other column float32. `aoi` labels the rows
+    unless they already have an `aoi_id` (multi-AOI) or `aoi` column.
+    Rows are ordered by `KEY_COLUMNS`.
+    """
+    df = df.rename(columns={"aoi_id": "aoi"})
+    if "aoi" not in df.columns:
+        df = df.assign(aoi=aoi)
+    df = df.assign(aoi=df["aoi"].astype(str), date=pd.to_datetime(df["date"]))
+    df["year"] = df["year"].astype(int) if "year" in df else df["date"].dt.year
+    df["date"] = df["date"].dt.date
+
+    keys = [c for c in KEY_COLUMNS if c in df.columns]
+    df = df[keys + [c for c in df.columns if c not in keys]]
+    df = df.sort_values(keys[:3], kind="stable").reset_index(drop=True)
+    if "scene" in df.columns:
+        df["scene"] = df["scene"].astype(str)
+
+    schema = pa.schema(
+        [pa.field(c, COLUMN_TYPES.get(c, pa.float32())) for c in df.columns]
+    )
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    # the Arrow types already round-trip; the pandas metadata is not needed
+    return table.replace_schema_metadata(None)
+
+
+def write_timeseries_parquet(df, path, aoi=DEFAULT_AOI):
+    """
+    Write a time series as Parquet with the `timeseries_table` schema, one
+    row group per (AOI, year), ZSTD-compressed. Returns `path`.
+    """
+    table = timeseries_table(df, aoi)
+    groups = table.select(["aoi", "year"]).to_pandas()
+    # row boundaries where the (aoi, year) key changes (rows are sorted)
+    changed = (groups != groups.shift()).any(axis=1).to_numpy()
+    starts = list(changed.nonzero()[0]) + [table.num_rows]
+
+    with pq.ParquetWriter(path, table.schema, compression="zstd") as writer:
+        for start, end in zip(starts[:-1], starts[1:]):
+            writer.write_table(table.slice(start, end - start))
+    return path
+
+
+# --------------------------
+# Projected / filtered reads
+# --------------------------
+def read_timeseries(path, columns=None, years=None, aois=None):
+    """
+    Read a time series written by `write_timeseries_parquet`, only the
+    `columns` asked for (plus `date`) and only the rows of `years` / `aois`.
+    Row groups whose year / AOI statistics rule them out are not read.
+
+    Returns a DataFrame with `date` as datetime64, `year` int16, categorical
+    `aoi` / `scene` and float32 metrics.
+    """
+    if columns is not None:
+        columns = ["date"] + [c for c in columns if c != "date"]
+    filters = []
+    if years:
+        filters.append(("year", "in", [int(y) for y in years]))
+    if aois:
+        filters.append(("aoi", "in", [str(a) for a in aois]))
+
+    table = pq.read_table(path, columns=columns, filters=filters or None)
+    df = table.to_pandas(date_as_object=False)
+    df["date"] = df["date"].astype("datetime64[ns]")
+    return df
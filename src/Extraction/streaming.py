@@ -0,0 +1,105 @@
+from contextlib import ExitStack
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+from Extraction.aoi import unpack_mask_rows
+from Extraction.qa import QA_REJECT_BITS, qa_valid
+from Extraction.stats import RunningStats, index_stack, stats_dict
+
+# Striped (non-tiled) GeoTIFFs have one-row blocks; read at least this many rows
+MIN_BLOCK_ROWS = 256
+
+
+def block_windows(window, block_shape, min_rows=MIN_BLOCK_ROWS):
+    """
+    Tile `window` with sub-windows aligned to the raster's internal
+    `block_shape` (rows, cols), so every read touches whole blocks.
+    """
+    bh, bw = block_shape
+    bh = bh * max(1, -(-min_rows // bh)) if bh < min_rows else bh
+    row_off, col_off = int(window.row_off), int(window.col_off)
+    row_end, col_end = row_off + int(window.height), col_off + int(window.width)
+
+    r0 = row_off - row_off % bh
+    while r0 < row_end:
+        r1 = min(r0 + bh, row_end)
+        c0 = col_off - col_off % bw
+        while c0 < col_end:
+            c1 = min(c0 + bw, col_end)
+            rs, cs = max(r0, row_off), max(c0, col_off)
+            yield Window(cs, rs, c1 - cs, r1 - rs)
+            c0 += bw
+        r0 += bh
+
+
+def aoi_blocks(window, packed_mask, block_shape):
+    """
+    (block window, AOI mask of the block) for every block of `window` that
+    touches the AOI. The packed mask is unpacked once per row of blocks.
+    """
+    width = int(window.width)
+    rows, row_mask = None, None
+    for block in block_windows(window, block_shape):
+        r0 = int(block.row_off - window.row_off)
+        c0 = int(block.col_off - window.col_off)
+        if rows is None or rows.start != r0:
+            rows = slice(r0, r0 + int(block.height))
+            row_mask = unpack_mask_rows(packed_mask, rows, width)
+        mask = row_mask[:, c0 : c0 + int(block.width)]
+        if mask.any():
+            yield block, mask
+
+
+def stream_valid_fraction(qa_path, window, packed_mask, reject_bits=QA_REJECT_BITS):
+    """
+    Share of the AOI pixels that are clear in the QA_PIXEL band, read block
+    by block, so a cloudy scene can be rejected before any science band is
+    read.
+    """
+    n_aoi = n_valid = 0
+    with rasterio.open(qa_path) as src:
+        for block, mask in aoi_blocks(window, packed_mask, src.block_shapes[0]):
+            n_aoi += int(np.count_nonzero(mask))
+            valid = qa_valid(src.read(1, window=block), reject_bits)
+            n_valid += int(np.count_nonzero(valid & mask))
+    return n_valid / n_aoi if n_aoi else 0.0
+
+
+def stream_index_stats(
+    paths,
+    window,
+    packed_mask,
+    histograms=None,
+    qa_path=None,
+    reject_bits=QA_REJECT_BITS,
+):
+    """
+    Mean/std/count of NDVI, NDWI, NDBI and LST inside the AOI, computed block
+    by block over `window` of the (red, nir, swir, b10) rasters in `paths`.
+
+    `packed_mask` is the row-packed AOI mask over `window` (see
+    `AOIMaskCache.get(..., unpack=False)`). Peak memory is a few blocks of
+    each band, independent of the scene size. Blocks are also binned into
+    `histograms` (an `IndexHistograms`) when given. With `qa_path`, pixels
+    flagged with any of `reject_bits` in QA_PIXEL are left out, and blocks
+    without clear AOI pixels are not read from the science bands.
+    """
+    acc = RunningStats()
+    with ExitStack() as stack:
+        srcs = [stack.enter_context(rasterio.open(p)) for p in paths]
+        qa_src = stack.enter_context(rasterio.open(qa_path)) if qa_path else None
+        for block, mask in aoi_blocks(window, packed_mask, srcs[0].block_shapes[0]):
+            if qa_src is not None:
+                mask = mask & qa_valid(qa_src.read(1, window=block), reject_bits)
+                if not mask.any():
+                    continue
+            red, nir, swir, b10 = (
+                src.read(1, window=block)[mask].astype(np.float64) for src in srcs
+            )
+            values = index_stack(red, nir, swir, b10)
+            acc.update(values)
+            if histograms is not None:
+                histograms.update(values)
+    return stats_dict(*acc.result())
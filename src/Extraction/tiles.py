@@ -0,0 +1,165 @@
+import math
+import os
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import rasterio
+from matplotlib import colormaps
+from PIL import Image
+from rasterio.transform import from_bounds
+from rasterio.warp import Resampling, reproject, transform_bounds
+
+from Extraction.export import COG_NODATA, index_cog_files
+
+TILE_SIZE = 256
+WEB_MERCATOR_HALF = 20037508.342789244
+
+# Colormap and value range of each index, matching the dashboards' color scales
+INDEX_TILE_STYLES = {
+    "NDVI": ("YlGn", -0.2, 0.8),
+    "NDWI": ("Blues", -0.5, 0.5),
+    "NDBI": ("Oranges", -0.5, 0.5),
+    "LST": ("RdYlBu_r", 0.0, 45.0),
+}
+
+
+# --------------------------
+# Web Mercator tile math
+# --------------------------
+def lonlat_to_tile(lon, lat, z):
+    n = 2**z
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bounds(x, y, z):
+    """EPSG:3857 bounds (left, bottom, right, top) of XYZ tile x/y/z."""
+    size = 2 * WEB_MERCATOR_HALF / 2**z
+    left = -WEB_MERCATOR_HALF + x * size
+    top = WEB_MERCATOR_HALF - y * size
+    return left, top - size, left + size, top
+
+
+def tile_url_template(base_url, scene_id, index_name):
+    return f"{base_url.rstrip('/')}/{scene_id}/{index_name}/{{z}}/{{x}}/{{y}}.png"
+
+
+def colorize(values, index_name):
+    """Map index values to RGBA with the index colormap; NaN is transparent."""
+    cmap_name, vmin, vmax = INDEX_TILE_STYLES[index_name]
+    norm = np.clip((values - vmin) / (vmax - vmin), 0.0, 1.0)
+    rgba = colormaps[cmap_name](np.nan_to_num(norm), bytes=True)
+    rgba[..., 3] = np.where(np.isfinite(values), 255, 0)
+    return rgba
+
+
+def _overview_level(src, tile_res):
+    # deepest internal overview still at least as fine as the tile resolution
+    level = None
+    for i, factor in enumerate(src.overviews(1)):
+        if src.res[0] * factor <= tile_res:
+            level = i
+    return level
+
+
+# --------------------------
+# Tile pyramid rendering
+# --------------------------
+def render_index_tiles(cog_path, tile_dir, scene_id, index_name, zooms=(8, 13)):
+    """
+    Pre-render colorized PNG tiles of an index COG (see `write_index_cogs`)
+    into `tile_dir/<scene_id>/<index_name>/{z}/{x}/{y}.png` for every zoom in
+    the inclusive `zooms` range. Each tile is warped to Web Mercator from the
+    COG overview closest to its resolution; fully empty tiles are skipped.
+    Returns the number of tiles written.
+    """
+    out_root = os.path.join(tile_dir, scene_id, index_name)
+    written = 0
+    with rasterio.open(cog_path) as src:
+        west, south, east, north = transform_bounds(src.crs, "EPSG:4326", *src.bounds)
+        lat_scale = math.cos(math.radians((south + north) / 2))
+        scale = src.scales[0]
+        crs = src.crs
+
+        for z in range(zooms[0], zooms[1] + 1):
+            tile_res = 2 * WEB_MERCATOR_HALF / 2**z / TILE_SIZE * lat_scale
+            level = _overview_level(src, tile_res)
+            kwargs = {} if level is None else {"overview_level": level}
+            x0, y0 = lonlat_to_tile(west, north, z)
+            x1, y1 = lonlat_to_tile(east, south, z)
+
+            with rasterio.open(cog_path, **kwargs) as level_src:
+                for x in range(x0, x1 + 1):
+                    for y in range(y0, y1 + 1):
+                        dest = np.full((TILE_SIZE, TILE_SIZE), np.nan, np.float32)
+                        reproject(
+                            source=rasterio.band(level_src, 1),
+                            destination=dest,
+                            src_crs=crs,
+                            src_nodata=COG_NODATA,
+                            dst_transform=from_bounds(
+                                *tile_bounds(x, y, z), TILE_SIZE, TILE_SIZE
+                            ),
+                            dst_crs="EPSG:3857",
+                            dst_nodata=np.nan,
+                            resampling=Resampling.bilinear,
+                        )
+                        if not np.isfinite(dest).any():
+                            continue
+                        path = os.path.join(out_root, str(z), str(x), f"{y}.png")
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+                        Image.fromarray(colorize(dest * scale, index_name)).save(path)
+                        written += 1
+    return written
+
+
+def render_scene_tiles(cog_paths, tile_dir, scene_id, zooms=(8, 13)):
+    """Render tiles for every {index: cog_path} of one scene."""
+    return {
+        name: render_index_tiles(path, tile_dir, scene_id, name, zooms)
+        for name, path in cog_paths.items()
+    }
+
+
+def render_cog_dir_tiles(cog_dir, tile_dir, zooms=(8, 13)):
+    """
+    Render tiles for every index COG in `cog_dir` whose pyramid in
+    `tile_dir` is missing or older than the COG, so incremental runs only
+    render their new scenes (remove a pyramid to re-render it at other
+    zooms). Returns {scene_id: {index: tiles written}}.
+    """
+    written = {}
+    for index_name in INDEX_TILE_STYLES:
+        for _, path in index_cog_files(cog_dir, index_name):
+            scene_id = os.path.basename(path)[: -len(f"_{index_name}.tif")]
+            out_root = os.path.join(tile_dir, scene_id, index_name)
+            if os.path.isdir(out_root) and os.path.getmtime(
+                out_root
+            ) >= os.path.getmtime(path):
+                continue
+            written.setdefault(scene_id, {})[index_name] = render_index_tiles(
+                path, tile_dir, scene_id, index_name, zooms
+            )
+            # stamp the finished pyramid (also when every tile was empty); a
+            # directory's own mtime changes only when entries are added
+            os.makedirs(out_root, exist_ok=True)
+            os.utime(out_root)
+    return written
+
+
+# --------------------------
+# Local static tile server
+# --------------------------
+def serve_tiles(tile_dir, host="127.0.0.1", port=8765):
+    """
+    Serve `tile_dir` over HTTP from a daemon thread, for map viewers outside
+    the Streamlit app. Returns the server; call `shutdown()` to stop it.
+    """
+    handler = partial(SimpleHTTPRequestHandler, directory=tile_dir)
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
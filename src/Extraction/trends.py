@@ -0,0 +1,179 @@
+import math
+import os
+
+import numpy as np
+import rasterio
+from scipy.special import erfc
+
+from Extraction.datacube import DataCube
+from Extraction.parallel import bounded_process_map
+
+# Working-set budget per pixel block (pairwise differences dominate)
+TREND_MEMORY_BUDGET_MB = 64
+# Pixels with fewer valid observations get no trend
+MIN_OBSERVATIONS = 4
+
+TREND_BANDS = ("sen_slope", "mk_s", "p_value")
+
+
+def decimal_years(times):
+    """Years since the first date, as floats, for numpy datetime64 dates."""
+    days = (np.asarray(times, dtype="datetime64[D]") - times[0]).astype(np.float64)
+    return days / 365.25
+
+
+# --------------------------
+# Vectorized Mann-Kendall / Sen's slope
+# --------------------------
+def mann_kendall_sen(values, years):
+    """
+    Sen's slope (units per year), Mann-Kendall S and two-sided p-value for
+    every column of a (time, n_pixels) array, vectorized over pixels.
+
+    NaN observations are ignored per pixel; the variance of S includes the
+    usual correction for tied values. Pixels with fewer than
+    `MIN_OBSERVATIONS` valid values get NaN.
+    """
+    n_times, n_pixels = values.shape
+    i, j = np.triu_indices(n_times, k=1)
+
+    diff = values[j] - values[i]  # (pairs, pixels)
+    valid_pairs = np.isfinite(diff)
+    with np.errstate(invalid="ignore"):
+        slopes = diff / (years[j] - years[i])[:, None]
+        s = np.where(valid_pairs, np.sign(diff), 0.0).sum(axis=0)
+        # plain median where every pair is valid, nanmedian only for gappy
+        # pixels; pixels without a valid pair stay NaN (nanmedian would warn
+        # about their all-NaN slices)
+        slope = np.full(n_pixels, np.nan)
+        complete = valid_pairs.all(axis=0)
+        gappy = ~complete & valid_pairs.any(axis=0)
+        slope[complete] = np.median(slopes[:, complete], axis=0)
+        slope[gappy] = np.nanmedian(slopes[:, gappy], axis=0)
+
+    # variance of S with tie correction: sum over values of (c - 1)(2c + 5),
+    # where c is the size of the value's tie group
+    valid = np.isfinite(values)
+    n = valid.sum(axis=0).astype(np.float64)
+    ties = (values[:, None, :] == values[None, :, :]).sum(axis=1)
+    tie_term = np.where(valid, (ties - 1) * (2 * ties + 5), 0).sum(axis=0)
+    var_s = (n * (n - 1) * (2 * n + 5) - tie_term) / 18.0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(var_s > 0, (s - np.sign(s)) / np.sqrt(var_s), 0.0)
+    p = erfc(np.abs(z) / math.sqrt(2.0))
+
+    enough = n >= MIN_OBSERVATIONS
+    nan = np.full(n_pixels, np.nan)
+    return (
+        np.where(enough, slope, nan),
+        np.where(enough, s, nan),
+        np.where(enough, p, nan),
+    )
+
+
+def block_size(n_times, budget_mb=TREND_MEMORY_BUDGET_MB):
+    """Side of a square pixel block whose pairwise arrays fit `budget_mb`."""
+    pairs = max(1, n_times * (n_times - 1) // 2)
+    # diff, slopes and their masked copy in float64, plus the tie comparison
+    per_pixel = pairs * 8 * 3 + n_times * n_times
+    side = int(math.sqrt(budget_mb * 1024**2 / per_pixel))
+    return max(16, side)
+
+
+def trend_block_task(task):
+    """Process-pool entry point: trends for one (row, col) block of a cube."""
+    cube_dir, index_name, r0, r1, c0, c1 = task
+    cube = DataCube(cube_dir, index_name)
+    values = cube.read(slice(None), slice(r0, r1), slice(c0, c1))
+    shape = values.shape[1:]
+    out = np.full((len(TREND_BANDS),) + shape, np.nan, dtype=np.float32)
+    flat = values.reshape(values.shape[0], -1)
+    has_data = np.isfinite(flat).any(axis=0)
+    if has_data.any():
+        results = mann_kendall_sen(flat[:, has_data], decimal_years(cube.times))
+        for band, result in zip(out, results):
+            band.reshape(-1)[has_data] = result
+    return r0, c0, out
+
+
+# --------------------------
+# Whole-AOI trend rasters
+# --------------------------
+def compute_trends(
+    cube_dir,
+    index_name,
+    out_dir=None,
+    alpha=0.05,
+    workers=None,
+    budget_mb=TREND_MEMORY_BUDGET_MB,
+):
+    """
+    Per-pixel Sen's slope, Mann-Kendall S and p-value for every pixel of the
+    `index_name` datacube (see `write_datacube`), computed in pixel blocks
+    sized to `budget_mb`, on `workers` processes when > 1.
+
+    With `out_dir`, writes `<index_name>_trend.tif` (bands: sen_slope,
+    mk_s, p_value). Returns the (3, y, x) trend array and a summary with the
+    number of valid pixels and of significantly increasing / decreasing
+    pixels at `alpha`, plus their areas in km².
+    """
+    cube = DataCube(cube_dir, index_name)
+    n_times, height, width = cube.shape
+    side = block_size(n_times, budget_mb)
+    tasks = [
+        (cube_dir, index_name, r0, min(r0 + side, height), c0, min(c0 + side, width))
+        for r0 in range(0, height, side)
+        for c0 in range(0, width, side)
+    ]
+
+    if workers and workers > 1:
+        results = bounded_process_map(trend_block_task, tasks, workers)
+    else:
+        results = map(trend_block_task, tasks)
+
+    trend = np.full((len(TREND_BANDS), height, width), np.nan, dtype=np.float32)
+    for r0, c0, block in results:
+        trend[:, r0 : r0 + block.shape[1], c0 : c0 + block.shape[2]] = block
+
+    slope, _, p = trend
+    valid = np.isfinite(p)
+    significant = valid & (p < alpha)
+    pixel_km2 = abs(cube.transform.a * cube.transform.e) / 1e6
+    n_up = int((significant & (slope > 0)).sum())
+    n_down = int((significant & (slope < 0)).sum())
+    summary = {
+        "index": index_name,
+        "n_times": n_times,
+        "alpha": alpha,
+        "valid_pixels": int(valid.sum()),
+        "increasing_pixels": n_up,
+        "decreasing_pixels": n_down,
+        "increasing_km2": n_up * pixel_km2,
+        "decreasing_km2": n_down * pixel_km2,
+    }
+
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+        profile = {
+            "driver": "GTiff",
+            "width": width,
+            "height": height,
+            "count": len(TREND_BANDS),
+            "dtype": "float32",
+            "crs": cube.crs,
+            "transform": cube.transform,
+            "nodata": np.nan,
+            "tiled": True,
+            "blockxsize": 256,
+            "blockysize": 256,
+            "compress": "deflate",
+            "predictor": 3,
+        }
+        path = os.path.join(out_dir, f"{index_name}_trend.tif")
+        with rasterio.open(path, "w", **profile) as dst:
+            dst.write(trend)
+            dst.descriptions = TREND_BANDS
+        summary["path"] = path
+
+    return trend, summary
@@ -1,16 +1,48 @@
 import os
-import geopandas as gpd
 import pandas as pd
 import streamlit as st
-
+from Extraction.aggregates import (
+    aggregates_path,
+    build_aggregate_cube,
+    heatmap_from_cube,
+    index_summary_from_cube,
+    read_aggregate_cube,
+)
+from Extraction.distributions import histograms_path, load_histograms
+from Extraction.storage import parquet_path, read_timeseries
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # /app/src
 AOI_PATH = os.path.join(BASE_DIR, "..", "data", "aoi.geojson")
 DATA_PATH = os.path.join(BASE_DIR, "..", "data", "all-landsat-data.csv")
+# Typed columnar copy of the CSV written by the extraction pipeline
+PARQUET_PATH = parquet_path(DATA_PATH)
+# Per-(index, year, month) aggregates behind the metric cards and heatmaps
+AGG_PATH = aggregates_path(DATA_PATH)
+# Per-scene index histograms saved next to the CSV (distributions=True)
+HIST_PATH = histograms_path(DATA_PATH)
+# src/static/ as served by Streamlit's static serving (.streamlit/config.toml)
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+STATIC_URL = "/app/static"
+# Pre-rendered index tiles (Extraction/tiles.py)
+TILES_DIR = os.path.join(STATIC_DIR, "tiles")
+TILES_URL = f"{STATIC_URL}/tiles"
+# Optional offline basemap: any XYZ PNG pyramid copied to static/basemap/{z}/{x}/{y}.png
+BASEMAP_DIR = os.path.join(STATIC_DIR, "basemap")
+BASEMAP_URL = f"{STATIC_URL}/basemap/{{z}}/{{x}}/{{y}}.png"
+# Vendored Leaflet, so the AOI map loads no script or stylesheet from a CDN
+LEAFLET_JS_URL = f"{STATIC_URL}/leaflet/leaflet.js"
+LEAFLET_CSS_URL = f"{STATIC_URL}/leaflet/leaflet.css"
+# Per-scene index COGs written by the extraction pipeline (cog_dir=...)
+INDEX_COG_DIR = os.path.join(BASE_DIR, "..", "data", "index_cogs")
 
 
-def load_aoi_data():
-    gdf = gpd.read_file(AOI_PATH)
+@st.cache_data
+def read_aoi_data(path, mtime):
+    # geopandas (like rasterio below) is only needed by the dashboards, so it
+    # is imported on first use to keep it off the app's startup path
+    import geopandas as gpd
+
+    gdf = gpd.read_file(path)
     # Ensure CRS is WGS84
     if gdf.crs is None:
         gdf.set_crs(epsg=4326, inplace=True)
@@ -19,8 +51,163 @@ def load_aoi_data():
     return gdf.to_json()
 
 
+def load_aoi_data():
+    """AOI GeoJSON string (WGS84), re-read only when the file changes."""
+    return read_aoi_data(AOI_PATH, os.path.getmtime(AOI_PATH))
+
+
+def tile_scenes(index_name):
+    """Scene ids that have a pre-rendered tile pyramid for `index_name`."""
+    if not os.path.isdir(TILES_DIR):
+        return []
+    return sorted(
+        scene
+        for scene in os.listdir(TILES_DIR)
+        if os.path.isdir(os.path.join(TILES_DIR, scene, index_name))
+    )
+
+
+def index_tile_url(scene_id, index_name):
+    return f"{TILES_URL}/{scene_id}/{index_name}/{{z}}/{{x}}/{{y}}.png"
+
+
+def map_views():
+    """
+    Basemap choices of the AOI maps, the default first: "Local" when an
+    offline basemap is installed, else "None" (no basemap). "Standard"
+    (OpenStreetMap) and "Satellite" (Esri) fetch tiles from the internet.
+    """
+    local = ["Local"] if os.path.isdir(BASEMAP_DIR) else []
+    return local + ["None", "Standard", "Satellite"]
+
+
+def index_cog_scenes(index_name):
+    """(date, path) of every index COG available for `index_name`, by date."""
+    from Extraction.export import index_cog_files
+
+    return index_cog_files(INDEX_COG_DIR, index_name)
+
+
+def default_change_pair(dates):
+    """
+    Indices of the (before, after) scenes to compare by default: the latest
+    scene and the earliest one from the same month of another year, else the
+    earliest scene.
+    """
+    after = len(dates) - 1
+    for i, d in enumerate(dates[:after]):
+        if d.month == dates[after].month and d.year != dates[after].year:
+            return i, after
+    return 0, after
+
+
+@st.cache_data
+def read_change_report(before_path, after_path, index_name, mtimes):
+    from Extraction.change import detect_change
+
+    return detect_change(before_path, after_path, index_name)
+
+
+def change_report(before_path, after_path, index_name):
+    """Change between two index COGs, recomputed when either file changes."""
+    mtimes = (os.path.getmtime(before_path), os.path.getmtime(after_path))
+    return read_change_report(before_path, after_path, index_name, mtimes)
+
+
+# --------------------------
+# Time series accessors
+# --------------------------
+def data_version():
+    """
+    (file, mtime, size) of every time series file the dashboards read. The
+    cached readers below and the dashboard figure cache are keyed on it, so
+    a new extraction (`save_timeseries` / `update_timeseries`) is picked up
+    without restarting the server.
+    """
+    return tuple(
+        (os.path.basename(p), os.path.getmtime(p), os.path.getsize(p))
+        for p in (DATA_PATH, PARQUET_PATH, AGG_PATH, HIST_PATH)
+        if os.path.exists(p)
+    )
+
+
+@st.cache_data
+def read_histogram_data(version):
+    if not os.path.exists(HIST_PATH):
+        return None, {}
+    return load_histograms(HIST_PATH)
+
+
+def load_histogram_data():
+    """
+    Per-scene index histograms and bin edges, or (None, {}) when the
+    extraction was run without distributions.
+    """
+    return read_histogram_data(data_version())
+
+
 @st.cache_data
-def load_data():
+def read_data(version, years=None, aois=None, columns=None):
+    if os.path.exists(PARQUET_PATH):
+        return read_timeseries(PARQUET_PATH, columns, years, aois)
     data = pd.read_csv(DATA_PATH)
     data["date"] = pd.to_datetime(data["date"])
+    if years:
+        data = data[data["year"].isin(years)]
+    if columns:
+        data = data[["date"] + [c for c in columns if c != "date"]]
     return data
+
+
+def load_data(years=None, aois=None, columns=None):
+    """
+    The index time series, only the rows of `years` / `aois` and only
+    `columns` (plus `date`) when given. Read from the typed Parquet file
+    (row groups of other years / AOIs are skipped), or from the CSV when the
+    extraction predates it; cached until the data files change.
+    """
+    return read_data(data_version(), years, aois, columns)
+
+
+# --------------------------
+# Aggregate cube accessors
+# --------------------------
+@st.cache_data
+def read_aggregates(version):
+    if os.path.exists(AGG_PATH):
+        data_files = [p for p in (DATA_PATH, PARQUET_PATH) if os.path.exists(p)]
+        newest = max((os.path.getmtime(p) for p in data_files), default=0)
+        if os.path.getmtime(AGG_PATH) >= newest:
+            return read_aggregate_cube(AGG_PATH)
+    return build_aggregate_cube(read_data(version))
+
+
+def load_aggregates():
+    """
+    The aggregate cube written at ingest, or built once from the time series
+    when it is missing or older than the data.
+    """
+    return read_aggregates(data_version())
+
+
+@st.cache_data
+def read_index_summary(version, index_name, years=()):
+    return index_summary_from_cube(read_aggregates(version), index_name, years)
+
+
+def index_summary(index_name, years=()):
+    """
+    Metric-card values of `index_name` over `years` (all years when empty):
+    mean, std, min, max, latest pixel count and first / last scene date.
+    """
+    return read_index_summary(data_version(), index_name, years)
+
+
+@st.cache_data
+def read_seasonal_heatmap(version, index_name, years=()):
+    return heatmap_from_cube(read_aggregates(version), index_name, years)
+
+
+def seasonal_heatmap(index_name, years=()):
+    """Year x month mean of `index_name` over `years` (all when empty)."""
+    return read_seasonal_heatmap(data_version(), index_name, years)
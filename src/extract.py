@@ -0,0 +1,7 @@
+import sys
+
+from Extraction.cli import main
+
+# Headless extraction, e.g. `python src/extract.py data --profile profile.json`
+if __name__ == "__main__":
+    sys.exit(main())
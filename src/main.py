@@ -1,12 +1,15 @@
+import os
+
 import streamlit as st
 from streamlit_option_menu import option_menu
-from Dashboards.lst_dashboard import lst
-from Dashboards.ndvi_dashboard import ndvi
-from Dashboards.ndwi_dashboard import ndwi
-from Dashboards.ndbi_dashboard import ndbi
-from data_loader import load_data
+from Dashboards.registry import DASHBOARDS, import_times, load_dashboard
+from Dashboards.index_specs import INDEX_SPECS
+from data_loader import load_data, map_views
 
-df = load_data()
+# Startup measurement mode: `SHOW_IMPORT_TIMES=1 streamlit run src/main.py`
+# lists the first-import time of each dashboard module in the sidebar; see
+# `python -m Dashboards.registry` for the cold import cost per module
+SHOW_IMPORT_TIMES = bool(os.environ.get("SHOW_IMPORT_TIMES"))
 
 
 def main():
@@ -16,13 +19,13 @@ def main():
     with st.sidebar:
         selected = option_menu(
             menu_title="Dashboards",
-            options=["NDVI", "NDWI", "NDBI", "LST"],
-            icons=["tree", "droplet", "building", "sun"],
+            options=list(DASHBOARDS),
+            icons=[INDEX_SPECS[name]["icon"] for name in DASHBOARDS],
             menu_icon="list",
             default_index=0,
         )
 
-        map_view = st.radio("Map View", ["Standard", "Satellite"])
+        map_view = st.radio("Map View", map_views())
         # ---------------- Multi-Select Year Selector ----------------
         years = [2022, 2023, 2024]
         selected_years = st.multiselect(
@@ -31,39 +34,17 @@ def main():
             default=years,  # default to all selected
         )
 
-        # If nothing selected, fallback to all years
-        if not selected_years:
-            df_filtered = df.copy()
-        else:
-            df_filtered = df[df["year"].isin(selected_years)]
+        # Only the selected years are read (all years when nothing is selected)
+        df_filtered = load_data(years=tuple(selected_years))
 
         # Sidebar radio to toggle variability
         show_var = st.radio("Show Variability?", ["Yes", "No"]) == "Yes"
 
-    # Routing
-    if selected == "NDVI":
-        ndvi(
-            data=df_filtered,
-            selected_years=selected_years,
-            show_var=show_var,
-            map_view=map_view,
-        )
-    elif selected == "NDWI":
-        ndwi(
-            data=df_filtered,
-            selected_years=selected_years,
-            show_var=show_var,
-            map_view=map_view,
-        )
-    elif selected == "NDBI":
-        ndbi(
-            data=df_filtered,
-            selected_years=selected_years,
-            show_var=show_var,
-            map_view=map_view,
-        )
-    elif selected == "LST":
-        lst(
+    # Routing: the dashboard module is imported on its first selection
+    if selected in DASHBOARDS:
+        dashboard = load_dashboard(selected)
+        dashboard(
+            selected,
             data=df_filtered,
             selected_years=selected_years,
             show_var=show_var,
@@ -72,6 +53,10 @@ def main():
     else:
         st.warning("Select a valid dashboard from the sidebar.")
 
+    if SHOW_IMPORT_TIMES:
+        with st.sidebar.expander("Import times", expanded=True):
+            st.dataframe(import_times(), hide_index=True)
+
 
 if __name__ == "__main__":
     main()
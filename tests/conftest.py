@@ -0,0 +1,40 @@
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+from synthetic import default_aoi, write_scene  # noqa: E402
+
+# (year, month folder, acquisition date, seed, cloud rows/cols)
+SCENES = (
+    ("2022", "January", date(2022, 1, 27), 1, None),
+    ("2022", "March", date(2022, 3, 8), 2, (slice(30, 50), slice(20, 70))),
+    ("2023", "January", date(2023, 1, 14), 3, (slice(0, 96), slice(0, 90))),
+    ("2023", "April", date(2023, 4, 5), 4, None),
+)
+
+
+@pytest.fixture(scope="session")
+def aoi_geojson():
+    return default_aoi()
+
+
+@pytest.fixture(scope="session")
+def data_root(tmp_path_factory):
+    """
+    A data/<year>/<month> tree of four synthetic scenes on one grid: March
+    2022 is partly cloudy, January 2023 almost fully clouded.
+    """
+    root = tmp_path_factory.mktemp("data")
+    for year, month, day, seed, cloud in SCENES:
+        write_scene(os.path.join(root, year, month), day, seed, cloud=cloud)
+    return str(root)
+
+
+@pytest.fixture(scope="session")
+def scene_folder(data_root):
+    """The partly cloudy scene folder."""
+    return os.path.join(data_root, "2022", "March")
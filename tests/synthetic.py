@@ -0,0 +1,155 @@
+import os
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+from rasterio.warp import transform_geom
+
+from Extraction.indices import INDEX_NAMES, STAT_COLUMNS
+
+CRS = "EPSG:32645"
+ORIGIN = (300000.0, 3080000.0)
+PIXEL = 30.0
+SHAPE = (96, 96)
+BLOCK = 32
+
+QA_CLEAR = 21824
+QA_CLOUD = 22280
+QA_FILL = 1
+
+# (marker, low, high) of the synthetic band values
+BANDS = (
+    ("SR_B4", 7000, 12000),
+    ("SR_B5", 9000, 20000),
+    ("SR_B6", 8000, 18000),
+    ("ST_B10", 40000, 48000),
+)
+
+
+def scene_stem(day, wrs_path=141, wrs_row=41):
+    stamp = day.strftime("%Y%m%d")
+    return f"LC08_L2SP_{wrs_path:03d}{wrs_row:03d}_{stamp}_{stamp}_02_T1"
+
+
+def write_scene(
+    folder,
+    day,
+    seed,
+    origin=ORIGIN,
+    shape=SHAPE,
+    cloud=None,
+    fill_rows=4,
+    wrs_path=141,
+    wrs_row=41,
+    cols=None,
+):
+    """
+    Write a small tiled Landsat Collection 2 L2 scene (red, NIR, SWIR1,
+    ST_B10, QA_PIXEL and MTL) into `folder`. `cloud` is a (row slice, col
+    slice) flagged as cloud in QA_PIXEL; the first `fill_rows` rows are
+    fill (0 in the bands, fill in QA_PIXEL). With `cols` (a slice) only
+    those columns of the scene are written, on the same pixel grid, so
+    overlapping crops of one seed hold the same values. Returns the written
+    band values.
+    """
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    cols = slice(0, shape[1]) if cols is None else cols
+    origin = (origin[0] + cols.start * PIXEL, origin[1])
+    height, width = shape[0], cols.stop - cols.start
+    stem = scene_stem(day, wrs_path, wrs_row)
+    profile = {
+        "driver": "GTiff",
+        "width": width,
+        "height": height,
+        "count": 1,
+        "dtype": "uint16",
+        "crs": CRS,
+        "transform": from_origin(*origin, PIXEL, PIXEL),
+        "nodata": 0,
+        "tiled": True,
+        "blockxsize": BLOCK,
+        "blockysize": BLOCK,
+    }
+
+    values = {}
+    for marker, low, high in BANDS:
+        arr = rng.integers(low, high, size=shape).astype("uint16")
+        arr[:fill_rows] = 0
+        arr = arr[:, cols]
+        with rasterio.open(
+            os.path.join(folder, f"{stem}_{marker}.TIF"), "w", **profile
+        ) as dst:
+            dst.write(arr, 1)
+        values[marker] = arr
+
+    qa = np.full(shape, QA_CLEAR, dtype="uint16")
+    qa[:fill_rows] = QA_FILL
+    if cloud is not None:
+        qa[cloud] = QA_CLOUD
+    qa = qa[:, cols]
+    qa_profile = dict(profile, nodata=QA_FILL)
+    with rasterio.open(
+        os.path.join(folder, f"{stem}_QA_PIXEL.TIF"), "w", **qa_profile
+    ) as dst:
+        dst.write(qa, 1)
+    values["QA_PIXEL"] = qa
+
+    # MTL corners are pixel centres
+    x0, y0 = origin
+    half = PIXEL / 2
+    with open(os.path.join(folder, f"{stem}_MTL.txt"), "w") as f:
+        f.write(
+            "GROUP = LANDSAT_METADATA_FILE\n"
+            f'  LANDSAT_PRODUCT_ID = "{stem}"\n'
+            f"  DATE_ACQUIRED = {day.isoformat()}\n"
+            '  SPACECRAFT_ID = "LANDSAT_8"\n'
+            f"  WRS_PATH = {wrs_path}\n"
+            f"  WRS_ROW = {wrs_row}\n"
+            f"  CLOUD_COVER = {seed % 50}.00\n"
+            "  UTM_ZONE = 45\n"
+            f"  GRID_CELL_SIZE_REFLECTIVE = {PIXEL}\n"
+            f"  CORNER_UL_PROJECTION_X_PRODUCT = {x0 + half}\n"
+            f"  CORNER_UL_PROJECTION_Y_PRODUCT = {y0 - half}\n"
+            f"  CORNER_LR_PROJECTION_X_PRODUCT = {x0 + width * PIXEL - half}\n"
+            f"  CORNER_LR_PROJECTION_Y_PRODUCT = {y0 - height * PIXEL + half}\n"
+            "END_GROUP = LANDSAT_METADATA_FILE\n"
+            "END\n"
+        )
+    return values
+
+
+def aoi_feature_collection(coords_utm):
+    """WGS84 GeoJSON FeatureCollection of a polygon given in scene UTM metres."""
+    ring = list(coords_utm) + [coords_utm[0]]
+    geom = transform_geom(CRS, "EPSG:4326", {"type": "Polygon", "coordinates": [ring]})
+    return {
+        "type": "FeatureCollection",
+        "features": [{"type": "Feature", "properties": {}, "geometry": geom}],
+    }
+
+
+def default_aoi():
+    """An irregular AOI well inside the synthetic scene grid."""
+    x0, y0 = ORIGIN
+    return aoi_feature_collection(
+        [
+            (x0 + 310, y0 - 400),
+            (x0 + 2150, y0 - 250),
+            (x0 + 2600, y0 - 1500),
+            (x0 + 1700, y0 - 2500),
+            (x0 + 500, y0 - 2200),
+        ]
+    )
+
+
+# --------------------------
+# Row comparisons
+# --------------------------
+STAT_COLS = [c for name in INDEX_NAMES for c in STAT_COLUMNS[name]] + ["count"]
+
+
+def assert_rows_equal(a, b, columns=STAT_COLS, rtol=1e-9):
+    for col in columns:
+        assert a[col] == pytest.approx(b[col], rel=rtol), col
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Extraction.aggregates import (
+    build_aggregate_cube,
+    heatmap_from_cube,
+    index_summary_from_cube,
+    read_aggregate_cube,
+    write_aggregate_cube,
+)
+from Extraction.indices import INDEX_NAMES, STAT_COLUMNS
+
+MEAN_COLS = [STAT_COLUMNS[name][0] for name in INDEX_NAMES]
+
+
+@pytest.fixture(scope="module")
+def rows():
+    """Two AOIs of irregular scene rows over three years, a few NaN means."""
+    rng = np.random.default_rng(0)
+    parts = []
+    for aoi in ("north", "south"):
+        dates = pd.to_datetime("2021-01-01") + pd.to_timedelta(
+            np.sort(rng.choice(3 * 365, size=60, replace=False)), unit="D"
+        )
+        df = pd.DataFrame(
+            {
+                "date": dates.date,
+                "year": dates.year.astype(str),
+                "scene": dates.month_name(),
+                "count": rng.integers(100, 5000, size=dates.size),
+                "aoi_id": aoi,
+            }
+        )
+        for col in MEAN_COLS:
+            df[col] = rng.normal(0.2, 0.3, size=dates.size)
+        df.loc[rng.choice(dates.size, size=4, replace=False), "NDWI_mean"] = np.nan
+        parts.append(df)
+    return pd.concat(parts, ignore_index=True)
+
+
+@pytest.fixture(scope="module")
+def cube(rows, tmp_path_factory):
+    path = tmp_path_factory.mktemp("cube") / "agg.parquet"
+    return read_aggregate_cube(write_aggregate_cube(build_aggregate_cube(rows), path))
+
+
+def selected(rows, years=None, aois=None):
+    if years:
+        rows = rows[rows["year"].isin([str(y) for y in years])]
+    if aois:
+        rows = rows[rows["aoi_id"].isin(aois)]
+    return rows
+
+
+SELECTIONS = [
+    {},
+    {"years": [2022]},
+    {"years": [2021, 2023], "aois": ["south"]},
+]
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+@pytest.mark.parametrize("name", INDEX_NAMES)
+def test_summary_matches_pandas(rows, cube, name, selection):
+    col = STAT_COLUMNS[name][0]
+    sel = selected(rows, **selection).dropna(subset=[col])
+    summary = index_summary_from_cube(cube, name, **selection)
+
+    assert summary["n"] == len(sel)
+    assert summary["mean"] == pytest.approx(sel[col].mean(), rel=1e-9)
+    assert summary["std"] == pytest.approx(sel[col].std(), rel=1e-9)
+    assert summary["min"] == sel[col].min()
+    assert summary["max"] == sel[col].max()
+    latest = sel.sort_values("date", kind="stable")
+    assert summary["count_last"] == latest["count"].iloc[-1]
+    assert summary["date_min"].date() == sel["date"].min()
+    assert summary["date_max"].date() == sel["date"].max()
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_heatmap_matches_pivot_table(rows, cube, selection):
+    sel = selected(rows, **selection).assign(
+        year=lambda df: df["year"].astype(int),
+        month=lambda df: pd.to_datetime(df["date"]).dt.month,
+    )
+    expected = sel.pivot_table(
+        index="year", columns="month", values="NDVI_mean", aggfunc="mean"
+    ).reindex(columns=range(1, 13))
+    heatmap = heatmap_from_cube(cube, "NDVI", **selection)
+    pd.testing.assert_frame_equal(
+        heatmap, expected, check_names=False, check_index_type=False, rtol=1e-9
+    )
+
+
+def test_empty_selection(cube):
+    assert index_summary_from_cube(cube, "NDVI", years=[1999]) is None
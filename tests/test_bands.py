@@ -0,0 +1,59 @@
+import os
+import tarfile
+
+import pytest
+
+from Extraction.bands import (
+    local_file,
+    open_scene_text,
+    scene_archive,
+    scene_files,
+)
+from Extraction.pipeline import process_scene_folder
+
+
+@pytest.fixture
+def tar_folder(scene_folder, tmp_path):
+    """The partly cloudy scene as a USGS-style .tar bundle in its own folder."""
+    folder = tmp_path / "March"
+    folder.mkdir()
+    names = sorted(os.listdir(scene_folder))
+    stem = names[0].rsplit("_", 1)[0]  # the MTL sorts first
+    archive = folder / f"{stem}.tar"
+    with tarfile.open(archive, "w") as tar:
+        for name in names:
+            tar.add(os.path.join(scene_folder, name), arcname=name)
+    return str(folder)
+
+
+def test_scene_files_map_tar_members_to_vsitar(scene_folder, tar_folder):
+    archive = scene_archive(tar_folder)
+    assert archive.endswith(".tar")
+    assert scene_archive(scene_folder) is None
+    assert scene_archive(archive) == archive
+
+    files = scene_files(tar_folder)
+    assert sorted(files) == sorted(os.listdir(scene_folder))
+    for name, path in files.items():
+        assert path == f"/vsitar/{archive}/{name}"
+        assert local_file(path) == archive
+
+    mtl = next(p for n, p in files.items() if n.endswith("_MTL.txt"))
+    with open_scene_text(mtl) as f:
+        assert "LANDSAT_PRODUCT_ID" in f.read()
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"windowed": False},
+        {"qa_mask": True, "distributions": True},
+        {"streaming": True, "qa_mask": True},
+    ],
+)
+def test_tar_matches_extracted_folder(scene_folder, tar_folder, aoi_geojson, options):
+    extracted = process_scene_folder(scene_folder, aoi_geojson, **options)
+    assert process_scene_folder(tar_folder, aoi_geojson, **options) == extracted
+    archive = scene_archive(tar_folder)
+    assert process_scene_folder(archive, aoi_geojson, **options) == extracted
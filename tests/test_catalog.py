@@ -0,0 +1,137 @@
+import os
+import shutil
+import sqlite3
+from datetime import date
+
+import pytest
+
+from Extraction.catalog import CATALOG_VERSION, SceneCatalog
+from Extraction.pipeline import build_timeseries
+from synthetic import ORIGIN, write_scene
+
+FAR_ORIGIN = (ORIGIN[0] + 100000.0, ORIGIN[1])
+
+
+@pytest.fixture
+def root(data_root, tmp_path):
+    """The four scenes plus one of another path/row, 100 km east of the AOI."""
+    root = tmp_path / "data"
+    shutil.copytree(data_root, root)
+    write_scene(
+        os.path.join(root, "2022", "May"),
+        date(2022, 5, 2),
+        9,
+        origin=FAR_ORIGIN,
+        wrs_path=140,
+    )
+    return str(root)
+
+
+@pytest.fixture
+def catalog(root, tmp_path):
+    with SceneCatalog(str(tmp_path / "catalog.sqlite")) as catalog:
+        assert catalog.refresh(root) == 5
+        yield catalog
+
+
+def scenes(records):
+    return [(r["year"], r["scene"]) for r in records]
+
+
+# --------------------------
+# Queries
+# --------------------------
+def test_query_filters(catalog):
+    assert len(catalog) == 5
+    assert scenes(catalog.query()) == [
+        ("2022", "January"),
+        ("2022", "March"),
+        ("2022", "May"),
+        ("2023", "January"),
+        ("2023", "April"),
+    ]
+    assert scenes(catalog.query(years=[2023])) == [
+        ("2023", "January"),
+        ("2023", "April"),
+    ]
+    # CLOUD_COVER is the seed: 1, 2, 9, 3 and 4
+    assert scenes(catalog.query(max_cloud=2)) == [
+        ("2022", "January"),
+        ("2022", "March"),
+    ]
+    assert scenes(catalog.query(years=[2022, 2023], max_cloud=3.5)) == [
+        ("2022", "January"),
+        ("2022", "March"),
+        ("2023", "January"),
+    ]
+    assert scenes(catalog.query(wrs_path=140)) == [("2022", "May")]
+    assert scenes(catalog.query(start=date(2022, 3, 8), end="2023-01-14")) == [
+        ("2022", "March"),
+        ("2022", "May"),
+        ("2023", "January"),
+    ]
+
+
+def test_query_aoi_join(catalog, aoi_geojson):
+    # the R*Tree join drops the scene 100 km away
+    assert "May" not in [r["scene"] for r in catalog.query(aoi_geojson)]
+    assert len(catalog.query(aoi_geojson)) == 4
+    assert len(catalog.query(aoi_geojson, years=[2022])) == 2
+
+
+def test_build_timeseries_from_catalog(catalog, root, aoi_geojson):
+    expected = build_timeseries(root, aoi_geojson)
+    df = build_timeseries(
+        root, aoi_geojson, catalog=catalog, scene_filter={"aoi_geojson": aoi_geojson}
+    )
+    assert df.drop(columns=["year", "scene"]).equals(
+        expected.drop(columns=["year", "scene"])
+    )
+    assert scenes(df.to_dict("records")) == scenes(expected.to_dict("records"))
+
+
+# --------------------------
+# Refresh
+# --------------------------
+def test_scenes_are_only_picked_up_on_refresh(catalog, root, aoi_geojson):
+    write_scene(os.path.join(root, "2023", "June"), date(2023, 6, 9), 6)
+    df = build_timeseries(root, aoi_geojson, catalog=catalog)
+    assert "June" not in df["scene"].tolist()
+    df = build_timeseries(root, aoi_geojson, catalog=catalog, refresh_catalog=True)
+    assert "June" in df["scene"].tolist()
+    assert catalog.refresh(root) == 0
+
+
+def test_refresh_picks_up_files_rewritten_in_place(catalog, root):
+    folder = os.path.join(root, "2022", "March")
+    folder_stat = os.stat(folder)
+    # same file names and sizes, new content (CLOUD_COVER 8)
+    write_scene(folder, date(2022, 3, 8), 58)
+    os.utime(folder, ns=(folder_stat.st_atime_ns, folder_stat.st_mtime_ns))
+
+    assert catalog.refresh(root) == 1
+    record = next(r for r in catalog.query() if r["scene"] == "March")
+    assert record["cloud_cover"] == 8.0
+
+    shutil.rmtree(folder)
+    assert catalog.refresh(root) == 0
+    assert "March" not in [r["scene"] for r in catalog.query(years=[2022])]
+
+
+def test_catalog_of_another_version_is_rebuilt(root, tmp_path):
+    db_path = str(tmp_path / "old.sqlite")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE scenes (id INTEGER PRIMARY KEY, folder_mtime REAL)")
+    conn.execute("INSERT INTO scenes VALUES (1, 0.0)")
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+
+    with SceneCatalog(db_path) as catalog:
+        assert len(catalog) == 0
+        version = catalog.conn.execute("PRAGMA user_version").fetchone()[0]
+        assert version == CATALOG_VERSION
+        assert catalog.refresh(root) == 5
+    with SceneCatalog(db_path) as catalog:
+        assert len(catalog) == 5
+        assert catalog.refresh(root) == 0
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+from Extraction.change import chunk_rows, detect_change
+from Extraction.export import INDEX_SCALES, scale_index, write_cog
+from synthetic import CRS, ORIGIN, PIXEL
+
+# taller than two COG blocks (512 rows), so a small budget needs 3 chunks
+SHAPE = (1300, 300)
+SCALE = INDEX_SCALES["NDVI"]
+
+
+def grid(col_shift=0, row_shift=0):
+    x0, y0 = ORIGIN
+    transform = from_origin(
+        x0 + col_shift * PIXEL, y0 - row_shift * PIXEL, PIXEL, PIXEL
+    )
+    return {"crs": CRS, "transform": transform}
+
+
+def index_arrays(seed):
+    """Before/after NDVI with nodata patches, quantized as in the COGs."""
+    rng = np.random.default_rng(seed)
+    before = rng.uniform(-0.2, 0.8, SHAPE)
+    after = before + rng.normal(0, 0.15, SHAPE)
+    before[100:140, 20:60] = np.nan
+    after[700:720, :] = np.nan
+    before, after = (scale_index(v, SCALE) for v in (before, after))
+    # read back as the COG scale (1 / SCALE) times the stored integers
+    return [np.where(v == -32768, np.nan, v * (1.0 / SCALE)) for v in (before, after)]
+
+
+def expected_report(before, after, threshold, rel_threshold=None):
+    diff = after - before
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel = diff / np.abs(before)
+    valid = np.isfinite(diff)
+    significant = valid & (np.abs(diff) >= threshold)
+    if rel_threshold is not None:
+        significant &= np.abs(rel) >= rel_threshold
+    pixel_km2 = PIXEL * PIXEL / 1e6
+    return (
+        {
+            "valid_km2": valid.sum() * pixel_km2,
+            "gain_km2": (significant & (diff > 0)).sum() * pixel_km2,
+            "loss_km2": (significant & (diff < 0)).sum() * pixel_km2,
+            "gain_pct": 100.0 * (significant & (diff > 0)).sum() / valid.sum(),
+            "loss_pct": 100.0 * (significant & (diff < 0)).sum() / valid.sum(),
+            "mean_diff": diff[valid].mean(),
+        },
+        diff,
+        rel,
+    )
+
+
+def write(values, path, col_shift=0, row_shift=0):
+    return write_cog(
+        scale_index(values, SCALE), grid(col_shift, row_shift), str(path), SCALE
+    )
+
+
+@pytest.mark.parametrize("rel_threshold", [None, 0.5])
+def test_chunked_change_matches_whole_arrays(tmp_path, rel_threshold):
+    assert chunk_rows(SHAPE[1], 512, budget_mb=0.01) == 512
+    before, after = index_arrays(0)
+    before_path = write(before, tmp_path / "before.tif")
+    after_path = write(after, tmp_path / "after.tif")
+
+    prefix = str(tmp_path / "change")
+    report = detect_change(
+        before_path,
+        after_path,
+        "NDVI",
+        rel_threshold=rel_threshold,
+        out_prefix=prefix,
+        budget_mb=0.01,
+    )
+    expected, diff, rel = expected_report(before, after, 0.1, rel_threshold)
+    assert report["index"] == "NDVI" and report["threshold"] == 0.1
+    for key, value in expected.items():
+        assert report[key] == pytest.approx(value, rel=1e-9), key
+
+    with rasterio.open(f"{prefix}_diff.tif") as src:
+        np.testing.assert_allclose(src.read(1), diff.astype(np.float32))
+    with rasterio.open(f"{prefix}_rel.tif") as src:
+        np.testing.assert_allclose(src.read(1), rel.astype(np.float32))
+
+
+def test_after_on_a_shifted_grid_is_aligned(tmp_path):
+    before, after = index_arrays(1)
+    # `after` covers the same ground from a grid 7 columns east, 11 rows south
+    cols, rows = 7, 11
+    shifted = np.full(SHAPE, np.nan)
+    shifted[: SHAPE[0] - rows, : SHAPE[1] - cols] = after[rows:, cols:]
+    before_path = write(before, tmp_path / "before.tif")
+    after_path = write(shifted, tmp_path / "after.tif", cols, rows)
+
+    report = detect_change(
+        before_path, after_path, "NDVI", threshold=0.2, budget_mb=0.01
+    )
+    # pixels of `before` outside the shifted grid have no `after` value
+    aligned = after.copy()
+    aligned[:rows] = np.nan
+    aligned[:, :cols] = np.nan
+    expected, _, _ = expected_report(before, aligned, 0.2)
+    for key, value in expected.items():
+        assert report[key] == pytest.approx(value, rel=1e-9), key
@@ -0,0 +1,25 @@
+import pytest
+
+from Extraction.cli import parse_args
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["data", "--streaming", "--cog-dir", "cogs"],
+        ["data", "--tiles-dir", "tiles"],
+        ["data", "--refresh-catalog"],
+    ],
+)
+def test_conflicting_options_are_rejected(argv, capsys):
+    with pytest.raises(SystemExit) as exc:
+        parse_args(argv)
+    assert exc.value.code == 2
+    assert "error:" in capsys.readouterr().err
+
+
+def test_defaults():
+    args = parse_args(["data", "--cog-dir", "cogs", "--tiles-dir", "tiles"])
+    assert args.aoi.endswith("aoi.geojson")
+    assert args.output.endswith("all-landsat-data.csv")
+    assert not args.streaming and not args.refresh_catalog
@@ -0,0 +1,104 @@
+import json
+import os
+import warnings
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+import rasterio
+
+from Extraction.aoi import reproject_aoi
+from Extraction.bands import find_band_files, scene_files
+from Extraction.catalog import SceneCatalog
+from Extraction.composite import build_composite_timeseries, median_over_scenes
+from Extraction.indices import INDEX_NAMES, STAT_COLUMNS
+from Extraction.pipeline import build_timeseries
+from Extraction.qa import find_qa_file, qa_valid
+from Extraction.stats import aoi_mask, index_stack
+from synthetic import assert_rows_equal, write_scene
+
+# (folder, acquisition date, seed, cloud rows/cols) of one busy month
+MARCH_SCENES = (
+    ("March-a", date(2022, 3, 2), 11, None),
+    ("March-b", date(2022, 3, 18), 12, (slice(20, 60), slice(10, 60))),
+    ("March-c", date(2022, 3, 27), 13, None),
+    ("March-d", date(2022, 3, 30), 14, (slice(40, 96), slice(0, 96))),
+)
+
+
+def test_median_matches_nanmedian_without_warnings():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(5, 4, 300))
+    values[rng.random(values.shape) < 0.4] = np.nan
+    values[:, :, :10] = np.nan  # no clear observation at all
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        result = median_over_scenes(values)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        expected = np.nanmedian(values, axis=0)
+    np.testing.assert_allclose(result, expected, rtol=1e-12)
+    assert np.isnan(result[:, :10]).all()
+
+
+def test_single_scene_months_match_per_scene_rows(data_root, aoi_geojson):
+    composite = build_composite_timeseries(data_root, aoi_geojson, qa_mask=True)
+    scenes = build_timeseries(
+        data_root, aoi_geojson, qa_mask=True, min_valid_fraction=0
+    )
+    # the fully clouded scene has no clear pixel and is dropped by both
+    assert composite["scene"].tolist() == scenes["scene"].tolist()
+    assert (composite["n_scenes"] == 1).all()
+    for (_, a), (_, b) in zip(composite.iterrows(), scenes.iterrows()):
+        assert a["date"] == b["date"].replace(day=1)
+        assert a["valid_fraction"] == pytest.approx(b["valid_fraction"])
+        assert_rows_equal(a, b)
+
+
+def test_month_composite_matches_brute_force_median(aoi_geojson, tmp_path):
+    data_root = tmp_path / "data"
+    for folder, day, seed, cloud in MARCH_SCENES:
+        write_scene(os.path.join(data_root, "2022", folder), day, seed, cloud=cloud)
+
+    # reference: every scene read whole, cloudy pixels NaN, numpy nanmedian
+    per_scene = []
+    for folder, *_ in MARCH_SCENES:
+        scene_folder = os.path.join(data_root, "2022", folder)
+        files = scene_files(scene_folder)
+        bands = []
+        for name in find_band_files(scene_folder, files):
+            with rasterio.open(files[name]) as src:
+                bands.append(src.read(1).astype(np.float64))
+                profile = src.profile
+        with rasterio.open(files[find_qa_file(scene_folder, files)]) as src:
+            valid = qa_valid(src.read(1))
+        aoi_utm = json.loads(reproject_aoi(aoi_geojson, profile["crs"]).to_json())
+        mask = aoi_mask(aoi_utm, profile)
+        stack = index_stack(*(band[mask] for band in bands))
+        stack[:, ~valid[mask]] = np.nan
+        per_scene.append(stack)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        median = np.nanmedian(np.stack(per_scene), axis=0)
+
+    df = build_composite_timeseries(str(data_root), aoi_geojson, qa_mask=True)
+    assert len(df) == 1
+    row = df.iloc[0]
+    assert row["date"] == date(2022, 3, 1)
+    assert row["n_scenes"] == len(MARCH_SCENES)
+    assert row["count"] == np.isfinite(median[0]).sum()
+    for values, name in zip(median, INDEX_NAMES):
+        mean_col, std_col = STAT_COLUMNS[name]
+        assert row[mean_col] == pytest.approx(np.nanmean(values), rel=1e-9)
+        assert row[std_col] == pytest.approx(np.nanstd(values), rel=1e-9)
+
+
+def test_catalog_composites_match_folder_composites(data_root, aoi_geojson, tmp_path):
+    expected = build_composite_timeseries(data_root, aoi_geojson)
+    with SceneCatalog(str(tmp_path / "catalog.sqlite")) as catalog:
+        assert build_composite_timeseries(data_root, aoi_geojson, catalog=catalog).empty
+        df = build_composite_timeseries(
+            data_root, aoi_geojson, catalog=catalog, refresh_catalog=True
+        )
+    pd.testing.assert_frame_equal(df, expected)
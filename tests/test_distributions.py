@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Extraction.distributions import (
+    HISTOGRAM_BINS,
+    QUANTILES,
+    IndexHistograms,
+    histogram_column,
+    histograms_path,
+    load_histograms,
+    outside_column,
+    save_timeseries,
+)
+from Extraction.indices import INDEX_NAMES
+from Extraction.pipeline import build_timeseries
+
+
+def random_stack(seed, n=4000):
+    rng = np.random.default_rng(seed)
+    values = np.vstack(
+        [
+            rng.uniform(-0.2, 0.8, n),
+            rng.uniform(-0.6, 0.3, n),
+            rng.uniform(-0.3, 0.6, n),
+            rng.normal(25.0, 6.0, n),
+        ]
+    )
+    values[:, ::50] = np.nan
+    return values
+
+
+# --------------------------
+# Histograms
+# --------------------------
+def test_block_merge_is_exact():
+    values = random_stack(0)
+    whole = IndexHistograms()
+    whole.update(values)
+
+    merged = IndexHistograms()
+    for block in np.array_split(values, 7, axis=1):
+        part = IndexHistograms()
+        part.update(block)
+        merged.merge(part)
+
+    for a, b in zip(whole.counts, merged.counts):
+        np.testing.assert_array_equal(a, b)
+    assert sum(c.sum() for c in whole.counts) == np.isfinite(values).sum()
+
+
+def test_out_of_range_values_are_counted_not_binned():
+    values = random_stack(1)
+    lst = INDEX_NAMES.index("LST")
+    clean = IndexHistograms()
+    clean.update(values)
+
+    # LST fill (-124 °C) and a hot outlier, plus the exact upper edge
+    low, high, _ = HISTOGRAM_BINS["LST"]
+    extra = np.full((len(INDEX_NAMES), 4), np.nan)
+    extra[lst] = [-124.0, -124.0, 95.0, high]
+    hists = IndexHistograms()
+    hists.update(np.hstack([values, extra]))
+
+    assert hists.outside[lst].tolist() == [2, 1]
+    assert hists.counts[lst][-1] == clean.counts[lst][-1] + 1
+    assert hists.counts[lst].sum() == clean.counts[lst].sum() + 1
+    np.testing.assert_allclose(
+        hists.quantiles()["LST"], clean.quantiles()["LST"], atol=0.1
+    )
+
+
+def test_quantiles_within_one_bin_width():
+    values = random_stack(2)
+    hists = IndexHistograms()
+    hists.update(values)
+    for row, (name, quantiles) in zip(values, hists.quantiles().items()):
+        expected = np.percentile(row[np.isfinite(row)], QUANTILES)
+        _, _, width = HISTOGRAM_BINS[name]
+        np.testing.assert_allclose(quantiles, expected, atol=width)
+
+
+# --------------------------
+# Storage
+# --------------------------
+def test_histograms_round_trip(data_root, aoi_geojson, tmp_path):
+    df = build_timeseries(data_root, aoi_geojson, distributions=True)
+    output_csv = str(tmp_path / "series.csv")
+    save_timeseries(df, output_csv)
+
+    csv = pd.read_csv(output_csv)
+    assert not any(c.endswith(("_hist", "_outside")) for c in csv.columns)
+    assert csv["NDVI_p50"].tolist() == pytest.approx(df["NDVI_p50"].tolist())
+
+    hists, edges = load_histograms(histograms_path(output_csv))
+    assert hists["scene"].tolist() == df["scene"].tolist()
+    for name in INDEX_NAMES:
+        assert len(edges[name]) == len(df[histogram_column(name)].iloc[0]) + 1
+        for col in (histogram_column(name), outside_column(name)):
+            assert [list(c) for c in hists[col]] == [list(c) for c in df[col]]
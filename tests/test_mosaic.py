@@ -0,0 +1,63 @@
+import os
+from datetime import date
+
+import pytest
+
+from Extraction.catalog import SceneCatalog
+from Extraction.mosaic import build_mosaic_timeseries, group_mosaic_scenes
+from Extraction.pipeline import process_scene_folder
+from synthetic import assert_rows_equal, write_scene
+
+DAY = date(2022, 3, 8)
+CLOUD = (slice(30, 50), slice(20, 70))
+
+
+@pytest.fixture(scope="module")
+def split_scene(tmp_path_factory):
+    """
+    One scene written whole, and as overlapping west/east crops on two WRS
+    paths acquired the same day (a data root for the catalog).
+    """
+    root = tmp_path_factory.mktemp("mosaic")
+    full = os.path.join(root, "full")
+    write_scene(full, DAY, 7, cloud=CLOUD)
+    data_root = os.path.join(root, "data")
+    for name, cols, wrs_path in (
+        ("West", slice(0, 56), 141),
+        ("East", slice(40, 96), 142),
+    ):
+        folder = os.path.join(data_root, "2022", name)
+        write_scene(folder, DAY, 7, cloud=CLOUD, cols=cols, wrs_path=wrs_path)
+    return full, data_root, str(root / "catalog.sqlite")
+
+
+def test_same_day_scenes_form_one_mosaic(split_scene, aoi_geojson):
+    _, data_root, db_path = split_scene
+    with SceneCatalog(db_path) as catalog:
+        catalog.refresh(data_root)
+        records = catalog.query(aoi_geojson=aoi_geojson)
+    groups = group_mosaic_scenes(records)
+    assert len(groups) == 1
+    assert sorted(r["wrs_path"] for r in groups[0]) == [141, 142]
+
+
+@pytest.mark.parametrize("qa_mask", [False, True])
+def test_mosaic_matches_full_scene(split_scene, aoi_geojson, qa_mask):
+    full, data_root, db_path = split_scene
+    with SceneCatalog(db_path) as catalog:
+        df = build_mosaic_timeseries(
+            catalog, aoi_geojson, data_root=data_root, qa_mask=qa_mask
+        )
+    expected = process_scene_folder(full, aoi_geojson, qa_mask=qa_mask)
+
+    assert len(df) == 1
+    row = df.iloc[0]
+    assert row["date"] == DAY
+    assert row["n_scenes"] == 2
+    assert (row["year"], row["scene"]) == ("2022", "March")
+    assert row["count"] == expected["count"]
+    if qa_mask:
+        assert row["valid_fraction"] == pytest.approx(expected["valid_fraction"])
+    else:
+        assert row["valid_fraction"] == 1.0
+    assert_rows_equal(row, expected)
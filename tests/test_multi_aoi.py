@@ -0,0 +1,71 @@
+import pandas as pd
+from shapely.geometry import mapping, shape
+
+from Extraction.multi_aoi import build_multi_aoi_timeseries
+from Extraction.pipeline import build_timeseries
+from synthetic import ORIGIN, aoi_feature_collection, assert_rows_equal
+
+X0, Y0 = ORIGIN
+WEST = [(X0 + 310, Y0 - 400), (X0 + 1510, Y0 - 380), (X0 + 1490, Y0 - 2200)]
+WEST += [(X0 + 400, Y0 - 2100)]
+EAST = [(X0 + 1700, Y0 - 500), (X0 + 2600, Y0 - 520), (X0 + 2550, Y0 - 2000)]
+EAST += [(X0 + 1720, Y0 - 1900)]
+# overlaps the east part of WEST
+MIDDLE = [(X0 + 1100, Y0 - 1000), (X0 + 2000, Y0 - 1010), (X0 + 1990, Y0 - 1800)]
+MIDDLE += [(X0 + 1110, Y0 - 1790)]
+
+
+def collection(*rings):
+    features = [aoi_feature_collection(ring)["features"][0] for ring in rings]
+    return {"type": "FeatureCollection", "features": features}
+
+
+def single(geometry):
+    return {
+        "type": "FeatureCollection",
+        "features": [{"type": "Feature", "properties": {}, "geometry": geometry}],
+    }
+
+
+def assert_feature_matches(multi, aoi_id, expected):
+    rows = multi[multi["aoi_id"] == aoi_id].reset_index(drop=True)
+    assert rows["date"].tolist() == expected["date"].tolist()
+    for (_, a), (_, b) in zip(rows.iterrows(), expected.iterrows()):
+        assert_rows_equal(a, b)
+
+
+def test_disjoint_features_match_per_feature_runs(data_root):
+    aois = collection(WEST, EAST)
+    multi = build_multi_aoi_timeseries(data_root, aois)
+    assert sorted(multi["aoi_id"].unique()) == [0, 1]
+    for aoi_id, feature in enumerate(aois["features"]):
+        expected = build_timeseries(data_root, single(feature["geometry"]))
+        assert_feature_matches(multi, aoi_id, expected)
+
+
+def test_later_overlapping_feature_wins(data_root):
+    aois = collection(WEST, MIDDLE)
+    west, middle = (shape(f["geometry"]) for f in aois["features"])
+    multi = build_multi_aoi_timeseries(data_root, aois)
+
+    # the shared pixels belong to MIDDLE only
+    expected = build_timeseries(data_root, single(mapping(west.difference(middle))))
+    assert_feature_matches(multi, 0, expected)
+    expected = build_timeseries(data_root, single(mapping(middle)))
+    assert_feature_matches(multi, 1, expected)
+
+
+def test_id_field(data_root):
+    aois = collection(WEST, EAST)
+    for name, feature in zip(("west", "east"), aois["features"]):
+        feature["properties"]["ward"] = name
+    multi = build_multi_aoi_timeseries(data_root, aois, id_field="ward")
+    by_position = build_multi_aoi_timeseries(data_root, collection(WEST, EAST))
+    assert sorted(multi["aoi_id"].unique()) == ["east", "west"]
+    for name, position in (("west", 0), ("east", 1)):
+        named = multi[multi["aoi_id"] == name].drop(columns="aoi_id")
+        positional = by_position[by_position["aoi_id"] == position]
+        pd.testing.assert_frame_equal(
+            named.reset_index(drop=True),
+            positional.drop(columns="aoi_id").reset_index(drop=True),
+        )
@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pandas as pd
+
+from Extraction.parallel import bounded_process_map, prefetched
+from Extraction.pipeline import build_timeseries
+
+
+def slow_square(x):
+    # later items finish first
+    time.sleep(0.02 * (5 - x))
+    return x * x
+
+
+def test_bounded_process_map_keeps_item_order():
+    items = list(range(6))
+    assert bounded_process_map(slow_square, items, workers=3, max_in_flight=4) == [
+        x * x for x in items
+    ]
+
+
+def test_prefetched_yields_in_order_and_reads_ahead():
+    loaded = []
+    lock = threading.Lock()
+
+    def load(x):
+        with lock:
+            loaded.append(x)
+        return x
+
+    seen = []
+    for future in prefetched(load, range(5), depth=2):
+        seen.append(future.result())
+        if len(seen) == 1:
+            # the next `depth` items were already submitted
+            time.sleep(0.05)
+            assert loaded[:3] == [0, 1, 2]
+    assert seen == list(range(5))
+
+
+def test_workers_match_serial_run(data_root, aoi_geojson):
+    options = {"qa_mask": True, "min_valid_fraction": 0.5, "distributions": True}
+    serial = build_timeseries(data_root, aoi_geojson, **options)
+    parallel = build_timeseries(data_root, aoi_geojson, workers=2, **options)
+
+    assert len(serial) == 3  # the clouded scene is rejected
+    hist_cols = [c for c in serial.columns if c.endswith(("_hist", "_outside"))]
+    pd.testing.assert_frame_equal(
+        serial.drop(columns=hist_cols), parallel.drop(columns=hist_cols)
+    )
+    for col in hist_cols:
+        assert serial[col].map(list).tolist() == parallel[col].map(list).tolist()
@@ -0,0 +1,88 @@
+import json
+import os
+
+import numpy as np
+import pytest
+import rasterio
+
+from Extraction.aoi import reproject_aoi
+from Extraction.bands import find_band_files, scene_files
+from Extraction.indices import INDEX_NAMES, STAT_COLUMNS
+from Extraction.pipeline import build_timeseries, process_scene_folder
+from Extraction.qa import (
+    QA_CLOUD,
+    QA_REJECT_BITS,
+    QA_SNOW,
+    find_qa_file,
+    qa_valid,
+    valid_fraction,
+)
+from Extraction.stats import aoi_mask, index_stack
+
+
+def read_scene(scene_folder):
+    files = scene_files(scene_folder)
+    bands = []
+    for name in find_band_files(scene_folder, files):
+        with rasterio.open(files[name]) as src:
+            bands.append(src.read(1).astype(np.float64))
+            profile = src.profile
+    with rasterio.open(files[find_qa_file(scene_folder, files)]) as src:
+        qa = src.read(1)
+    return bands, qa, profile
+
+
+# --------------------------
+# QA_PIXEL decoding
+# --------------------------
+@pytest.mark.parametrize("reject_bits", [QA_REJECT_BITS, QA_CLOUD | QA_SNOW])
+def test_lookup_matches_bitwise_decoding(reject_bits):
+    qa = np.arange(1 << 16, dtype=np.uint16).reshape(256, 256)
+    np.testing.assert_array_equal(
+        qa_valid(qa, reject_bits), (qa.astype(np.uint32) & reject_bits) == 0
+    )
+
+
+def test_valid_fraction():
+    aoi = np.zeros((4, 4), dtype=bool)
+    assert valid_fraction(np.ones((4, 4), dtype=bool), aoi) == 0.0
+    aoi[:2] = True
+    valid = np.zeros((4, 4), dtype=bool)
+    valid[0] = True
+    valid[3] = True  # outside the AOI
+    assert valid_fraction(valid, aoi) == 0.5
+
+
+# --------------------------
+# Screening in the pipeline
+# --------------------------
+def test_clouded_scene_is_rejected(data_root, aoi_geojson):
+    screened = build_timeseries(data_root, aoi_geojson, qa_mask=True)
+    assert screened["scene"].tolist() == ["January", "March", "April"]
+    assert (screened["valid_fraction"] >= 0.2).all()
+    assert len(build_timeseries(data_root, aoi_geojson)) == 4
+    # without the threshold the scene is read, but no AOI pixel is clear
+    clouded = os.path.join(data_root, "2023", "January")
+    row = process_scene_folder(clouded, aoi_geojson, qa_mask=True, min_valid_fraction=0)
+    assert row["valid_fraction"] == 0.0 and row["count"] == 0
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_masked_pixels_are_excluded(scene_folder, aoi_geojson, streaming):
+    bands, qa, profile = read_scene(scene_folder)
+    aoi_utm = json.loads(reproject_aoi(aoi_geojson, profile["crs"]).to_json())
+    aoi = aoi_mask(aoi_utm, profile)
+    valid = qa_valid(qa)
+    mask = aoi & valid
+    assert 0 < mask.sum() < aoi.sum()  # the cloud overlaps the AOI
+    stack = index_stack(*(band[mask] for band in bands))
+
+    row = process_scene_folder(
+        scene_folder, aoi_geojson, qa_mask=True, streaming=streaming
+    )
+    assert row["count"] == mask.sum()
+    assert row["valid_fraction"] == pytest.approx(valid_fraction(valid, aoi))
+    for values, name in zip(stack, INDEX_NAMES):
+        mean_col, std_col = STAT_COLUMNS[name]
+        assert row[mean_col] == pytest.approx(values.mean(), rel=1e-9)
+        assert row[std_col] == pytest.approx(values.std(), rel=1e-9)
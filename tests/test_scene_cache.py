@@ -0,0 +1,119 @@
+import os
+import shutil
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from Extraction import pipeline
+from Extraction.scene_cache import SceneResultCache, scene_fingerprint
+from synthetic import ORIGIN, aoi_feature_collection, write_scene
+
+
+@pytest.fixture
+def scene_copy(scene_folder, tmp_path):
+    folder = tmp_path / "scene"
+    shutil.copytree(scene_folder, folder)
+    return str(folder)
+
+
+def band_file(folder, marker):
+    return next(
+        os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(marker)
+    )
+
+
+# --------------------------
+# Fingerprint
+# --------------------------
+def test_fingerprint_is_stable(scene_copy, aoi_geojson):
+    assert scene_fingerprint(scene_copy, aoi_geojson) == scene_fingerprint(
+        scene_copy, aoi_geojson
+    )
+
+
+def test_fingerprint_changes_with_band_mtime_and_size(scene_copy, aoi_geojson):
+    before = scene_fingerprint(scene_copy, aoi_geojson)
+    path = band_file(scene_copy, "_SR_B5.TIF")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    touched = scene_fingerprint(scene_copy, aoi_geojson)
+    assert touched != before
+
+    with open(path, "ab") as f:
+        f.write(b"\0")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert scene_fingerprint(scene_copy, aoi_geojson) not in (before, touched)
+
+
+def test_fingerprint_ignores_non_band_files(scene_copy, aoi_geojson):
+    before = scene_fingerprint(scene_copy, aoi_geojson)
+    with open(os.path.join(scene_copy, "notes.txt"), "w") as f:
+        f.write("x")
+    path = band_file(scene_copy, "_QA_PIXEL.TIF")
+    os.utime(path, ns=(0, 0))
+    assert scene_fingerprint(scene_copy, aoi_geojson) == before
+    # the QA band only counts when QA screening is on
+    assert scene_fingerprint(scene_copy, aoi_geojson, {"qa_mask": True}) != before
+
+
+def test_fingerprint_changes_with_aoi_and_options(scene_copy, aoi_geojson):
+    base = scene_fingerprint(scene_copy, aoi_geojson)
+    x0, y0 = ORIGIN
+    other_aoi = aoi_feature_collection(
+        [(x0 + 300, y0 - 300), (x0 + 900, y0 - 300), (x0 + 900, y0 - 900)]
+    )
+    assert scene_fingerprint(scene_copy, other_aoi) != base
+    qa = {"qa_mask": True, "min_valid_fraction": 0.5}
+    assert scene_fingerprint(scene_copy, aoi_geojson, qa) != base
+    assert scene_fingerprint(scene_copy, aoi_geojson, qa) != scene_fingerprint(
+        scene_copy, aoi_geojson, dict(qa, min_valid_fraction=0.6)
+    )
+
+
+# --------------------------
+# Result cache
+# --------------------------
+def test_result_cache_round_trip(tmp_path):
+    cache = SceneResultCache(str(tmp_path / "cache"))
+    row = {"date": date(2022, 3, 8), "NDVI_mean": 0.25, "count": 12}
+    assert "a" not in cache
+    cache.put("a", row)
+    cache.put("b", None)
+    assert "a" in cache and "b" in cache
+    assert cache.get("a") == row
+    assert cache.get("b") is None
+    assert row["date"] == date(2022, 3, 8)  # the caller's row is not modified
+
+
+def test_update_timeseries_processes_only_new_scenes(
+    data_root, aoi_geojson, tmp_path, monkeypatch
+):
+    root = tmp_path / "data"
+    shutil.copytree(data_root, root)
+    output_csv = str(tmp_path / "out.csv")
+    cache_dir = str(tmp_path / "cache")
+
+    calls = []
+    process = pipeline.process_scene_folder
+
+    def counting(scene_folder, *args, **kwargs):
+        calls.append(os.path.relpath(scene_folder, root))
+        return process(scene_folder, *args, **kwargs)
+
+    monkeypatch.setattr(pipeline, "process_scene_folder", counting)
+
+    first = pipeline.update_timeseries(str(root), aoi_geojson, output_csv, cache_dir)
+    assert len(calls) == 4 and len(first) == 4
+
+    calls.clear()
+    write_scene(str(root / "2023" / "May"), date(2023, 5, 23), 5)
+    second = pipeline.update_timeseries(str(root), aoi_geojson, output_csv, cache_dir)
+    assert calls == [os.path.join("2023", "May")]
+    assert len(second) == 5
+
+    pd.testing.assert_frame_equal(
+        second[second["scene"] != "May"].reset_index(drop=True), first
+    )
+    saved = pd.read_csv(output_csv)
+    assert list(saved["scene"]) == list(second["scene"])
@@ -0,0 +1,159 @@
+import json
+import os
+import shutil
+from datetime import date
+
+import numpy as np
+import pytest
+import rasterio
+
+from Extraction.aoi import AOIMaskCache, reproject_aoi
+from Extraction.bands import find_band_files, scene_files
+from Extraction.export import read_index_cog
+from Extraction.indices import INDEX_NAMES, STAT_COLUMNS
+from Extraction.pipeline import build_timeseries, process_scene_folder
+from Extraction.stats import RunningStats, aoi_mask, index_stack
+from synthetic import ORIGIN, STAT_COLS, assert_rows_equal, write_scene
+
+
+# --------------------------
+# Fused kernel vs per-index zonal_stats
+# --------------------------
+@pytest.mark.parametrize("qa_mask", [False, True])
+def test_fused_matches_zonal_stats(scene_folder, aoi_geojson, qa_mask):
+    fused = process_scene_folder(scene_folder, aoi_geojson, fused=True, qa_mask=qa_mask)
+    zonal = process_scene_folder(
+        scene_folder, aoi_geojson, fused=False, qa_mask=qa_mask
+    )
+    assert fused["count"] > 0
+    assert_rows_equal(fused, zonal, STAT_COLS)
+
+
+@pytest.mark.parametrize("fused", [True, False])
+def test_ndbi_is_negated_ndwi(scene_folder, aoi_geojson, fused):
+    row = process_scene_folder(scene_folder, aoi_geojson, fused=fused)
+    assert row["NDBI_mean"] == pytest.approx(-row["NDWI_mean"], rel=1e-12)
+    assert row["NDBI_std"] == pytest.approx(row["NDWI_std"], rel=1e-12)
+
+
+def test_fused_matches_full_scene_numpy(scene_folder, aoi_geojson):
+    # reference: whole bands, AOI rasterized on the full grid, numpy moments
+    files = scene_files(scene_folder)
+    bands = []
+    for name in find_band_files(scene_folder, files):
+        with rasterio.open(files[name]) as src:
+            bands.append(src.read(1).astype(np.float64))
+            profile = src.profile
+    aoi_utm = json.loads(reproject_aoi(aoi_geojson, profile["crs"]).to_json())
+    mask = aoi_mask(aoi_utm, profile)
+    stack = index_stack(*(band[mask] for band in bands))
+
+    row = process_scene_folder(scene_folder, aoi_geojson, windowed=True)
+    assert row["count"] == mask.sum()
+    for values, name in zip(stack, INDEX_NAMES):
+        mean_col, std_col = STAT_COLUMNS[name]
+        assert row[mean_col] == pytest.approx(values.mean(), rel=1e-9)
+        assert row[std_col] == pytest.approx(values.std(), rel=1e-9)
+
+
+# --------------------------
+# Chan/Welford block merge
+# --------------------------
+def test_running_stats_merge_matches_numpy():
+    rng = np.random.default_rng(0)
+    values = rng.normal(0.3, 0.2, size=(len(INDEX_NAMES), 5000))
+    values[1, ::7] = np.nan  # non-finite values are skipped per row
+    acc = RunningStats()
+    # uneven blocks, including an empty one
+    for lo, hi in [(0, 1), (1, 1), (1, 900), (900, 3100), (3100, 5000)]:
+        acc.update(values[:, lo:hi])
+    mean, std, count = acc.result()
+    assert count.tolist() == np.isfinite(values).sum(axis=1).tolist()
+    np.testing.assert_allclose(mean, np.nanmean(values, axis=1), rtol=1e-12)
+    np.testing.assert_allclose(std, np.nanstd(values, axis=1), rtol=1e-12)
+
+
+@pytest.mark.parametrize("qa_mask", [False, True])
+def test_streaming_matches_in_memory(scene_folder, aoi_geojson, qa_mask):
+    streamed = process_scene_folder(
+        scene_folder, aoi_geojson, streaming=True, qa_mask=qa_mask
+    )
+    in_memory = process_scene_folder(scene_folder, aoi_geojson, qa_mask=qa_mask)
+    assert streamed["count"] == in_memory["count"]
+    assert_rows_equal(streamed, in_memory, STAT_COLS)
+
+
+# --------------------------
+# Scenes that miss the AOI
+# --------------------------
+@pytest.fixture(scope="module")
+def mixed_root(data_root, tmp_path_factory):
+    """The four scenes plus one of another path/row, 100 km east of the AOI."""
+    root = tmp_path_factory.mktemp("mixed")
+    shutil.copytree(data_root, root, dirs_exist_ok=True)
+    far = (ORIGIN[0] + 100000.0, ORIGIN[1])
+    write_scene(
+        os.path.join(root, "2022", "May"), date(2022, 5, 2), 9, origin=far, wrs_path=140
+    )
+    return str(root)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"fused": False, "windowed": False},
+        {"streaming": True},
+        {"qa_mask": True, "min_valid_fraction": 0},
+        {"workers": 2},
+    ],
+)
+def test_scene_outside_aoi_is_skipped(mixed_root, data_root, aoi_geojson, options):
+    far = os.path.join(mixed_root, "2022", "May")
+    assert process_scene_folder(far, aoi_geojson, **options) is None
+
+    df = build_timeseries(mixed_root, aoi_geojson, **options)
+    assert "May" not in df["scene"].tolist()
+    expected = build_timeseries(data_root, aoi_geojson, **options)
+    assert len(df) == len(expected)
+    for (_, a), (_, b) in zip(df.iterrows(), expected.iterrows()):
+        assert_rows_equal(a, b)
+
+
+def test_empty_window_is_cached(mixed_root, aoi_geojson, tmp_path):
+    far = os.path.join(mixed_root, "2022", "May")
+    cache_dir = str(tmp_path / "masks")
+    assert (
+        process_scene_folder(
+            far, aoi_geojson, mask_cache=AOIMaskCache(cache_dir=cache_dir)
+        )
+        is None
+    )
+    assert os.listdir(cache_dir)
+    # a fresh cache reads the stored empty entry back
+    assert (
+        process_scene_folder(
+            far, aoi_geojson, mask_cache=AOIMaskCache(cache_dir=cache_dir)
+        )
+        is None
+    )
+
+
+# --------------------------
+# Index COGs
+# --------------------------
+@pytest.mark.parametrize("fused", [True, False])
+def test_cogs_hold_the_aoi_index_values(scene_folder, aoi_geojson, tmp_path, fused):
+    cog_dir = str(tmp_path / "cogs")
+    row = process_scene_folder(
+        scene_folder, aoi_geojson, fused=fused, qa_mask=True, cog_dir=cog_dir
+    )
+    cogs = sorted(os.listdir(cog_dir))
+    assert len(cogs) == len(INDEX_NAMES)
+    for name in INDEX_NAMES:
+        (path,) = [os.path.join(cog_dir, c) for c in cogs if c.endswith(f"_{name}.tif")]
+        values, _ = read_index_cog(path)
+        mean_col, _ = STAT_COLUMNS[name]
+        assert np.isfinite(values).sum() == row["count"]
+        # int16 quantization: NDVI/NDWI/NDBI x 10^4, LST x 100
+        assert np.nanmean(values) == pytest.approx(row[mean_col], abs=1e-2)
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from Extraction.pipeline import build_timeseries
+from Extraction.storage import read_timeseries, write_timeseries_parquet
+
+
+@pytest.fixture(scope="module")
+def series(data_root, aoi_geojson):
+    return build_timeseries(data_root, aoi_geojson)
+
+
+def metric_columns(df):
+    return [c for c in df.columns if c not in ("date", "year", "scene", "count")]
+
+
+def test_parquet_round_trip(series, tmp_path):
+    path = write_timeseries_parquet(series, str(tmp_path / "series.parquet"))
+    df = read_timeseries(path)
+
+    assert df["aoi"].astype(str).unique().tolist() == ["aoi"]
+    assert df["date"].dt.date.tolist() == series["date"].tolist()
+    assert df["year"].astype(str).tolist() == series["year"].tolist()
+    assert df["scene"].astype(str).tolist() == series["scene"].tolist()
+    assert df["count"].tolist() == series["count"].tolist()
+    for col in metric_columns(series):
+        assert df[col].dtype == np.float32
+        np.testing.assert_allclose(df[col], series[col], rtol=1e-6, err_msg=col)
+
+
+def test_year_and_aoi_filters(series, tmp_path):
+    multi = pd.concat(
+        [series.assign(aoi_id="north"), series.assign(aoi_id="south")],
+        ignore_index=True,
+    )
+    path = write_timeseries_parquet(multi, str(tmp_path / "multi.parquet"))
+    # one row group per (aoi, year)
+    assert pq.ParquetFile(path).num_row_groups == 4
+
+    df = read_timeseries(path, columns=["NDVI_mean"], years=["2023"], aois=["south"])
+    assert df.columns.tolist() == ["date", "NDVI_mean"]
+    expected = series[series["year"] == "2023"]
+    assert df["date"].dt.date.tolist() == expected["date"].tolist()
+    np.testing.assert_allclose(df["NDVI_mean"], expected["NDVI_mean"], rtol=1e-6)
+
+    both = read_timeseries(path, years=[2022])
+    assert sorted(both["aoi"].astype(str).unique()) == ["north", "south"]
+    assert (both["year"] == 2022).all()
+    assert len(both) == 2 * (series["year"] == "2022").sum()
@@ -0,0 +1,32 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from Extraction.trends import MIN_OBSERVATIONS, mann_kendall_sen
+
+
+def test_mann_kendall_sen_matches_per_pixel_loop():
+    rng = np.random.default_rng(0)
+    years = np.sort(rng.uniform(0, 8, size=12))
+    values = 0.05 * years[:, None] + rng.normal(0, 0.1, size=(12, 40))
+    values[rng.random(values.shape) < 0.3] = np.nan
+    values[:, :3] = np.nan  # no observation at all
+    values[2:, 3] = np.nan  # one valid pair only
+    values[:, 4] = np.round(values[:, 4], 1)  # tied values
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        slope, s, p = mann_kendall_sen(values, years)
+
+    for k in range(values.shape[1]):
+        ok = np.isfinite(values[:, k])
+        if ok.sum() < MIN_OBSERVATIONS:
+            assert np.isnan(slope[k]) and np.isnan(s[k]) and np.isnan(p[k])
+            continue
+        v, t = values[ok, k], years[ok]
+        i, j = np.triu_indices(v.size, k=1)
+        expected = np.median((v[j] - v[i]) / (t[j] - t[i]))
+        assert slope[k] == pytest.approx(expected, rel=1e-12)
+        assert s[k] == np.sign(v[j] - v[i]).sum()
+        assert 0.0 <= p[k] <= 1.0